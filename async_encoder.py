@@ -0,0 +1,135 @@
+import asyncio
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from threading import Lock
+from encoder import generate_qr_code, generate_qr_code_bytes
+from batch import encode_to_result
+
+
+# asyncio front end for the encoder, so async services don't have to wrap every call in run_in_executor themselves.
+# All the CPU work runs on an executor shared by the whole process (threads or processes), and every AsyncEncoder
+# has a limit on how many of its encodes are in flight at once, so a burst of requests can't queue up unbounded work.
+#
+#     encoder = AsyncEncoder("process", max_concurrency=8, err_corr="M")
+#     png_bytes = await encoder.encode_bytes("https://example.com")
+#     async for result in encoder.encode_batch(lines):
+#         ...
+#
+# With the "process" executor the event loop never competes with the encoder for the GIL, which keeps its
+# latency flat while large codes are being built. QrSymbols can't be sent between processes though, so with
+# a process executor only encode_bytes and encode_batch are available.
+# Cancelling a call (e.g. asyncio.wait_for timing out) cancels the work if it hasn't started yet, work that
+# is already running is finished in the background and its result thrown away.
+
+EXECUTOR_KINDS = ["thread", "process"]
+
+_SHARED_EXECUTORS = {}
+_SHARED_EXECUTORS_LOCK = Lock()
+
+
+
+# the executor of the given kind shared by every AsyncEncoder, created the first time it is asked for
+def get_shared_executor(kind="thread"):
+    if kind not in EXECUTOR_KINDS:
+        raise ValueError(f"Unknown executor {kind!r}, expected one of {', '.join(EXECUTOR_KINDS)}")
+    with _SHARED_EXECUTORS_LOCK:
+        if kind not in _SHARED_EXECUTORS:
+            _SHARED_EXECUTORS[kind] = ThreadPoolExecutor(os.cpu_count()) if kind == "thread" else ProcessPoolExecutor(os.cpu_count())
+        return _SHARED_EXECUTORS[kind]
+
+# e.g. when the service shuts down, the next AsyncEncoder starts new ones
+def shutdown_shared_executors(wait=True):
+    with _SHARED_EXECUTORS_LOCK:
+        executors = list(_SHARED_EXECUTORS.values())
+        _SHARED_EXECUTORS.clear()
+    for executor in executors:
+        executor.shutdown(wait)
+
+
+# BatchResult of line number index, encoded with the keyword arguments of generate_qr_code in options
+def encode_line(index, data, options, verify=False, output="png"):
+    return encode_to_result(index, data, partial(generate_qr_code, data, **options), verify, output=output)
+
+
+# iterate over lines whether they come from a normal or an async iterable
+async def iterate_lines(lines):
+    if hasattr(lines, "__aiter__"):
+        async for line in lines:
+            yield line
+    else:
+        for line in lines:
+            yield line
+
+
+
+# executor is one of EXECUTOR_KINDS for the shared executors, or any concurrent.futures.Executor
+# max_concurrency is the most encodes of this encoder running or waiting in the executor at once (default: one per CPU)
+# options are the keyword arguments of generate_qr_code used by every call, each call can override them
+class AsyncEncoder:
+
+    def __init__(self, executor="thread", max_concurrency=None, **options):
+        self.executor = get_shared_executor(executor) if isinstance(executor, str) else executor
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        if self.max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.options = options
+
+    def uses_processes(self):
+        return isinstance(self.executor, ProcessPoolExecutor)
+
+    def get_options(self, options):
+        return {**self.options, **options}
+
+    # run function(*args) on the executor once there is room under the concurrency limit
+    async def run(self, function, *args):
+        async with self.semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    def check_threads(self, method_name):
+        if self.uses_processes():
+            raise ValueError(f"{method_name} needs a thread executor since a QrSymbol can't be sent between processes, use encode_bytes instead")
+
+    # the QrSymbol for data, like generate_qr_code
+    async def encode(self, data, **options):
+        self.check_threads("encode")
+        return await self.run(partial(generate_qr_code, data, **self.get_options(options)))
+
+    # data straight to a file in memory, like generate_qr_code_bytes
+    async def encode_bytes(self, data, output_format="png", **options):
+        return await self.run(partial(generate_qr_code_bytes, data, output_format, **self.get_options(options)))
+
+    # an encoded symbol as a file in memory, see QrSymbol.to_bytes
+    async def render(self, qr_symbol, output_format="png"):
+        self.check_threads("render")
+        return await self.run(qr_symbol.to_bytes, output_format)
+
+    # images of an encoded symbol at several sizes, see QrSymbol.render_sizes
+    async def render_sizes(self, qr_symbol, targets):
+        self.check_threads("render_sizes")
+        return await self.run(qr_symbol.render_sizes, targets)
+
+    # encode every line of lines (a normal or an async iterable) and yield their BatchResults in input order,
+    # lines are numbered from 1 like batch.run_batch and output is one of batch.OUTPUT_FORMATS
+    # at most max_concurrency lines are read ahead, and closing the iterator early cancels the ones not done yet
+    # every option of generate_qr_code is passed on except timer, which would be shared by all the lines at once
+    async def encode_batch(self, lines, output="png", verify=False, **options):
+        options = self.get_options(options)
+        if "timer" in options:
+            raise ValueError("encode_batch can't use a timer since its lines are encoded at the same time, time single encode calls instead")
+        encode = partial(encode_line, options=options, verify=verify, output=output)
+        pending = deque()
+        try:
+            index = 0
+            async for line in iterate_lines(lines):
+                index += 1
+                pending.append(asyncio.ensure_future(self.run(encode, index, line)))
+                if len(pending) >= self.max_concurrency:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
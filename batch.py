@@ -0,0 +1,126 @@
+from encoder import generate_qr_code, TRANS_EC_LVL
+from masks import EXHAUSTIVE
+from decoder import verify_symbol
+from profiling import NULL_TIMER
+from multiprocessing import Pool
+from container import unpack_matrix
+from functools import partial
+from time import perf_counter
+
+
+
+# what encode_to_result keeps of every symbol: the PNG file, or the packed module matrix (see container.py)
+OUTPUT_FORMATS = ["png", "matrix"]
+# how worker processes hand their results back: pickled BatchResults, or packed matrices in shared memory (see shared_ring.py)
+TRANSPORTS = ["pickle", "shared_memory"]
+# symbol encodes every job on its own, tensor encodes same-size jobs together as NumPy arrays (see tensor_batch.py)
+ENGINES = ["symbol", "tensor"]
+
+
+
+# result of encoding one line of a batch
+# png_bytes (or packed_matrix when the output is "matrix") is None and error holds the message if the line could not be encoded
+class BatchResult:
+
+    def __init__(self, index, png_bytes, version_num=-1, ec_lvl=-1, error=None, mask_num=-1, packed_matrix=None):
+        self.index = index
+        self.png_bytes = png_bytes
+        self.version_num = version_num
+        self.ec_lvl = ec_lvl
+        self.error = error
+        self.mask_num = mask_num
+        self.packed_matrix = packed_matrix
+        # the data that was encoded, for captions and reports
+        self.data = None
+        # seconds the worker spent encoding and serializing this line
+        self.encode_time = 0.0
+
+    def get_default_filename(self):
+        return f"./image-{self.index}-{self.version_num}{TRANS_EC_LVL[self.ec_lvl]}.png"
+
+    # only available for results made with the "matrix" output
+    def get_matrix(self):
+        return unpack_matrix(self.packed_matrix, ((self.version_num - 1) * 4) + 21)
+
+
+
+# encode a single job and return its BatchResult
+# job = (index, data, err_corr, version_num, mask, header_bits)
+# if verify is set, the symbol is decoded again and a mismatch is reported as an error
+def encode_job(job, verify=False, backend="pil", timer=NULL_TIMER, mask_strategy=EXHAUSTIVE, output="png"):
+    index, data, err_corr, version_num, mask, header_bits = job
+    return encode_to_result(index, data, lambda: generate_qr_code(data, err_corr, version_num, mask, timer, header_bits, backend, mask_strategy), verify, timer, output)
+
+
+# call encode() to get the QrSymbol for data and turn it into a BatchResult holding the PNG or the packed matrix
+def encode_to_result(index, data, encode, verify=False, timer=NULL_TIMER, output="png"):
+    start_time = perf_counter()
+    try:
+        qr_symbol = encode()
+        if verify:
+            with timer.phase("verify"):
+                verify_symbol(qr_symbol, data)
+    except ValueError as e:
+        result = BatchResult(index, None, error=str(e))
+    else:
+        with timer.phase("save"):
+            if output == "matrix":
+                result = BatchResult(index, None, qr_symbol.version_num, qr_symbol.ec_lvl, mask_num=qr_symbol.mask_num, packed_matrix=qr_symbol.get_packed_rows())
+            else:
+                result = BatchResult(index, qr_symbol.to_bytes("png"), qr_symbol.version_num, qr_symbol.ec_lvl, mask_num=qr_symbol.mask_num)
+    result.data = data
+    result.encode_time = perf_counter() - start_time
+    return result
+
+
+# encode every job, in order, using a pool of worker processes if workers > 1
+# results are yielded in input order as soon as they are ready
+# transport is one of TRANSPORTS and only matters when workers > 1
+# engine is one of ENGINES, the tensor engine always searches all masks and ignores backend and transport
+def run_jobs(jobs, workers=1, verify=False, backend="pil", chunksize=8, timer=NULL_TIMER, mask_strategy=EXHAUSTIVE, output="png", transport="pickle", engine="symbol"):
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Unknown transport {transport!r}, expected one of {', '.join(TRANSPORTS)}")
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, expected one of {', '.join(ENGINES)}")
+    if engine == "tensor":
+        yield from run_tensor_jobs(jobs, workers, verify, mask_strategy, output)
+    elif workers > 1 and transport == "shared_memory":
+        from shared_ring import run_jobs_shared
+        yield from run_jobs_shared(jobs, workers, verify, backend, chunksize, mask_strategy, output)
+    elif workers > 1:
+        with Pool(workers) as pool:
+            for result in pool.imap(partial(encode_job, verify=verify, backend=backend, mask_strategy=mask_strategy, output=output), jobs, chunksize):
+                yield result
+    else:
+        for job in jobs:
+            yield encode_job(job, verify, backend, timer, mask_strategy, output)
+
+
+# encode every line of data with the same settings
+# lines are numbered starting at 1 so the output files match the line numbers of the input file
+def run_batch(lines, err_corr="LMQH", version_num=0, mask=-1, workers=1, verify=False, backend="pil", timer=NULL_TIMER, mask_strategy=EXHAUSTIVE, output="png", transport="pickle", engine="symbol"):
+    jobs = ((index, line, err_corr, version_num, mask, "") for index, line in enumerate(lines, 1))
+    return run_jobs(jobs, workers, verify, backend, timer=timer, mask_strategy=mask_strategy, output=output, transport=transport, engine=engine)
+
+
+# run_jobs with the tensor engine, windows of jobs are spread over the worker processes if workers > 1
+def run_tensor_jobs(jobs, workers=1, verify=False, mask_strategy=EXHAUSTIVE, output="png"):
+    if mask_strategy.name != "exhaustive" or mask_strategy.report:
+        raise ValueError("The tensor engine always scores all 8 masks, it can't be used with other mask strategies or mask reports")
+    try:
+        from tensor_batch import encode_window, get_windows
+    except ImportError:
+        raise ValueError("The tensor engine needs NumPy, install it with pip install numpy")
+    if workers > 1:
+        with Pool(workers) as pool:
+            for results in pool.imap(partial(encode_window, verify=verify, output=output), get_windows(jobs)):
+                yield from results
+    else:
+        for window in get_windows(jobs):
+            yield from encode_window(window, verify, output)
+
+
+# read the lines of a batch file without their trailing newlines
+def read_batch_lines(batch_file):
+    for line in batch_file:
+        yield line.rstrip("\r\n")
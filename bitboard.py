@@ -0,0 +1,239 @@
+from encoder import ModuleArray
+from masks import QrMask
+from spec import MASK_CONDITIONS
+from threading import Lock
+
+
+# Pure Python matrix backend that doesn't need numpy or a PIL image while encoding.
+# Every row and every column is stored as an int where bit x (or bit y) is the module at (x, y),
+# so masking is an XOR with a precomputed mask int per row and the penalty rules work on whole rows.
+# The matrices it produces are identical to the ones produced by the default ModuleArray/QrMask.
+
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+else: # Python < 3.10
+    def popcount(value):
+        return bin(value).count("1")
+
+
+
+# set of [x, y] coordinates stored as one int bitmask per row
+class ProtectedModules:
+
+    def __init__(self, modules_per_edge):
+        self.modules_per_edge = modules_per_edge
+        self.rows = [0] * modules_per_edge
+
+    def append(self, coords):
+        x, y = coords
+        # the finder pattern separators extend one module past the edge of the symbol
+        if 0 <= x < self.modules_per_edge and 0 <= y < self.modules_per_edge:
+            self.rows[y] |= 1 << x
+
+    def __contains__(self, coords):
+        x, y = coords
+        if 0 <= x < self.modules_per_edge and 0 <= y < self.modules_per_edge:
+            return (self.rows[y] >> x) & 1 == 1
+        return False
+
+
+
+class BitboardModuleArray(ModuleArray):
+
+    def __init__(self, version_num, modules_per_edge):
+        self.rows = [0] * modules_per_edge
+        self.columns = [0] * modules_per_edge
+        ModuleArray.__init__(self, None, version_num, modules_per_edge, 1)
+
+    def new_protected_modules(self):
+        return ProtectedModules(self.modules_per_edge)
+
+    def get_module(self, x, y):
+        return (self.rows[y] >> x) & 1
+
+    def update_module(self, x, y, value, force_update=False):
+        # if we are not allowed to update this module, return error
+        if [x, y] in self.protected_modules and not force_update:
+            return 1
+        if 0 <= x < self.modules_per_edge and 0 <= y < self.modules_per_edge:
+            if value:
+                self.rows[y] |= 1 << x
+                self.columns[x] |= 1 << y
+            else:
+                self.rows[y] &= ~(1 << x)
+                self.columns[x] &= ~(1 << y)
+        return 0
+
+    def get_state(self):
+        return (list(self.rows), list(self.columns))
+
+    def set_state(self, state):
+        self.rows = list(state[0])
+        self.columns = list(state[1])
+
+    # the modules that masks are applied to, as (row ints, column ints)
+    def get_data_region(self):
+        full_row = (1 << self.modules_per_edge) - 1
+        region_rows = [full_row & ~protected_row for protected_row in self.protected_modules.rows]
+        return region_rows, transpose(region_rows, self.modules_per_edge)
+
+
+def transpose(rows, modules_per_edge):
+    columns = [0] * modules_per_edge
+    for y, row in enumerate(rows):
+        x = 0
+        while row:
+            if row & 1:
+                columns[x] |= 1 << y
+            row >>= 1
+            x += 1
+    return columns
+
+
+
+# the finder-like patterns searched for by evaluation condition #3, least significant bit first
+CONDITION_3_PATTERNS = [[0, 0, 0, 0, 1, 0, 1, 1, 1, 0, 1],
+                        [1, 0, 1, 1, 1, 0, 1, 0, 0, 0, 0]]
+
+# masks only depend on the version, so they are built once per version
+# the lock keeps two threads from building the same mask at once, reads of a finished mask don't need it
+_MASK_CACHE = {}
+_MASK_CACHE_LOCK = Lock()
+
+def get_mask_ints(module_arr, mask_num):
+    key = (module_arr.version_num, mask_num)
+    if key in _MASK_CACHE:
+        return _MASK_CACHE[key]
+    with _MASK_CACHE_LOCK:
+        if key in _MASK_CACHE:
+            return _MASK_CACHE[key]
+        modules_per_edge = module_arr.modules_per_edge
+        region_rows, _ = module_arr.get_data_region()
+        mask_rows = []
+        for y in range(modules_per_edge):
+            mask_row = 0
+            for x in range(modules_per_edge):
+                if MASK_CONDITIONS[mask_num](y, x):
+                    mask_row |= 1 << x
+            mask_rows.append(mask_row & region_rows[y])
+        # tuples, since every symbol of this version shares them
+        mask_rows = tuple(mask_rows)
+        _MASK_CACHE[key] = (mask_rows, tuple(transpose(mask_rows, modules_per_edge)))
+        return _MASK_CACHE[key]
+
+
+
+class BitboardQrMask(QrMask):
+
+    def apply_mask_num(self, module_arr, mask_num):
+        mask_rows, mask_columns = get_mask_ints(module_arr, mask_num)
+        module_arr.rows = [row ^ mask_row for row, mask_row in zip(module_arr.rows, mask_rows)]
+        module_arr.columns = [column ^ mask_column for column, mask_column in zip(module_arr.columns, mask_columns)]
+
+    # penalty for runs of 5+ same-colored modules: 3 points for the first 5 and 1 for every extra module
+    # starts & ~(starts << 1) keeps the first window of every run, so each run gets 2 points plus one per window
+    def score_runs(self, lines):
+        full_line = (1 << self.modules_per_edge) - 1
+        penalty = 0
+        for line in lines:
+            for bits in (line, ~line & full_line):
+                starts = bits & (bits >> 1) & (bits >> 2) & (bits >> 3) & (bits >> 4)
+                if starts:
+                    penalty += popcount(starts) + (2 * popcount(starts & ~(starts << 1)))
+        return penalty
+
+    def eval_condition_1(self, module_arr):
+        return self.score_runs(module_arr.rows) + self.score_runs(module_arr.columns)
+
+    def eval_condition_2(self, module_arr, row_nums=None):
+        full_pairs = (1 << (self.modules_per_edge - 1)) - 1
+        penalty = 0
+        rows = module_arr.rows
+        for y in row_nums if row_nums is not None else range(self.modules_per_edge):
+            if y == self.modules_per_edge-1:
+                continue
+            top = rows[y]
+            bottom = rows[y+1]
+            same = ~(top ^ bottom) & ~(top ^ (top >> 1)) & ~(bottom ^ (bottom >> 1)) & full_pairs
+            penalty += 3 * popcount(same)
+        return penalty
+
+    # QrMask only starts the pattern search in the first modules_per_edge-9 rows and columns,
+    # and reads one module past the edge as light, which is kept here so the same masks are chosen
+    def count_pattern_starts(self, line):
+        start_positions = (1 << (self.modules_per_edge - 9)) - 1
+        count = 0
+        for pattern in CONDITION_3_PATTERNS:
+            matches = start_positions
+            for shift, value in enumerate(pattern):
+                matches &= (line >> shift) if value else (~line >> shift)
+                if not matches:
+                    break
+            count += popcount(matches)
+        return count
+
+    def eval_condition_3(self, module_arr, line_nums=None):
+        penalty = 0
+        for i in line_nums if line_nums is not None else range(self.modules_per_edge):
+            if i >= self.modules_per_edge-9:
+                continue
+            penalty += 40 * self.count_pattern_starts(module_arr.columns[i])
+            penalty += 40 * self.count_pattern_starts(module_arr.rows[i])
+        return penalty
+
+    def eval_condition_4(self, module_arr, row_nums=None):
+        # Evaluation Condition #4: ratio of black to white modules
+        if row_nums is None:
+            row_nums = range(self.modules_per_edge)
+        dark_count = sum(popcount(module_arr.rows[y]) for y in row_nums)
+        total_module_count = len(row_nums) * self.modules_per_edge
+
+        dark_percent = (dark_count/total_module_count) * 100
+        distance_from_equal = int(abs(dark_percent - 50))
+
+        return max(0, distance_from_equal-1) * 10
+
+    def calc_sampled_mask_score(self, module_arr):
+        line_nums = range(0, self.modules_per_edge, self.strategy.sample_step)
+        penalty = self.score_runs([module_arr.rows[y] for y in line_nums])
+        penalty += self.score_runs([module_arr.columns[x] for x in line_nums])
+        penalty += self.eval_condition_2(module_arr, line_nums)
+        penalty += self.eval_condition_3(module_arr, line_nums)
+        penalty += self.eval_condition_4(module_arr, line_nums)
+        return penalty
+
+    def get_masked_state(self, module_arr, unmasked_state, mask_num):
+        module_arr.set_state(unmasked_state)
+        self.apply_specific_mask(module_arr, mask_num)
+        return module_arr.get_state()
+
+    def use_masked_state(self, module_arr, masked_state):
+        module_arr.set_state(masked_state)
+
+    def apply_best_mask(self, module_arr):
+        self.select_mask(module_arr, module_arr.get_state())
+        return module_arr
+
+    def apply_specific_mask(self, module_arr, mask_num):
+        self.apply_mask_num(module_arr, mask_num)
+        self.add_format_bits(module_arr, mask_num)
+        return module_arr
+
+
+
+# draw the finished matrix into the same kind of image the default backend produces
+def render_image(module_arr, module_size, image):
+    modules_per_edge = module_arr.modules_per_edge
+    image_size = module_size * (modules_per_edge+2)
+    quiet_row = bytes(image_size)
+    quiet_edge = bytes(module_size)
+    pixel_rows = [quiet_row * module_size]
+    for row in module_arr.rows:
+        pixel_row = bytearray(quiet_edge)
+        for x in range(modules_per_edge):
+            pixel_row += (b"\x01" if (row >> x) & 1 else b"\x00") * module_size
+        pixel_row += quiet_edge
+        pixel_rows.append(bytes(pixel_row) * module_size)
+    pixel_rows.append(quiet_row * module_size)
+    image.frombytes(b"".join(pixel_rows))
+    return image
@@ -0,0 +1,174 @@
+from spec import get_codeword_counts
+from functools import lru_cache
+import math
+
+
+# Picking the symbol for a payload and the size it is drawn at, without building or drawing anything.
+# Nothing here imports PIL, so preflight.py can answer "does this fit and how big is it" without loading the
+# encoder. encoder.py and micro.py import these and encode the symbols they pick.
+
+TRANS_EC_LVL = ["M", "L", "H", "Q"]
+IMAGE_RESOLUTION = 512 # lower bound on image resolution
+MAX_IMAGE_SIZE = 16384 # upper bound on the edge length of an image drawn for a size target
+MODE_BITS = "0100" # byte mode
+
+
+
+def sanitize_string(str):
+    encoded_str = str.encode('latin-1', 'ignore')
+    return encoded_str.decode('latin-1')
+
+
+# length of the byte mode character count indicator: 8 bits in versions 1 - 9 and 16 bits from version 10 on
+# (a count that needs more bits than that is written with all of them, like f'{char_count:08b}' does)
+def get_char_count_length(version_num, char_count=0):
+    return max(16 if version_num >= 10 else 8, char_count.bit_length())
+
+# number of data bits before padding of char_count characters in byte mode, behind header_length header bits
+def get_data_bit_count(char_count, version_num, header_length=0):
+    return header_length + len(MODE_BITS) + get_char_count_length(version_num, char_count) + (8 * char_count)
+
+
+# the smallest version from version_num on (any version if it is 0) that holds char_count characters, at the
+# highest error correction level in err_corr that fits in it, returns (cw_info, version_num, ec_lvl)
+# only depends on the length of the data, so the answer for every length is kept
+@lru_cache(maxsize=4096)
+def find_version(char_count, err_corr="LMQH", version_num=0, header_length=0, max_version=40):
+    for ver_num in range(max(version_num, 1), max_version + 1):
+        data_bit_count = get_data_bit_count(char_count, ver_num, header_length)
+
+        # unpack the cw array
+        h_cw_info, q_cw_info, m_cw_info, l_cw_info = get_codeword_counts(ver_num)
+
+        if h_cw_info.getMaxDataBits() >= data_bit_count and 'H' in err_corr: # H
+            return h_cw_info, ver_num, 2 # Error correction level H == 2
+        elif q_cw_info.getMaxDataBits() >= data_bit_count and 'Q' in err_corr: # Q
+            return q_cw_info, ver_num, 3 # Error correction level Q == 3
+        elif m_cw_info.getMaxDataBits() >= data_bit_count and 'M' in err_corr: # M
+            return m_cw_info, ver_num, 0 # Error correction level M == 0
+        elif l_cw_info.getMaxDataBits() >= data_bit_count and 'L' in err_corr: # L
+            return l_cw_info, ver_num, 1 # Error correction level L == 1
+
+    raise ValueError(f"The data you entered is larger than the largest currently supported QR code version. The current maximum is {int(get_codeword_counts(40)[-1].getMaxDataBits()/8)-2} characters.")
+
+
+# figure out which version and error correction level we should use
+# returns (cw_info, version_num, ec_lvl, data_bits) where data_bits is the unpadded bitstring
+# header_bits are placed in front of the data segment (see structured_append.py)
+def select_version(cleaned_data, err_corr="LMQH", version_num=0, header_bits="", max_version=40):
+    cw_info, version_num, ec_lvl = find_version(len(cleaned_data), err_corr, version_num, len(header_bits), max_version)
+
+    # the characters in ISO 8859-1 encoding
+    char_count = f'{len(cleaned_data):0{get_char_count_length(version_num)}b}'
+    data_bits = header_bits + MODE_BITS + char_count + "".join(f'{ord(char):08b}' for char in cleaned_data)
+    return cw_info, version_num, ec_lvl, data_bits
+
+
+
+def get_module_size(modules_per_edge, resolution=IMAGE_RESOLUTION):
+    rounded_resolution = 0
+    while rounded_resolution < resolution:
+        rounded_resolution += (modules_per_edge+2)
+
+    return int(rounded_resolution/(modules_per_edge+2))
+
+
+# module size in pixels for a target on a symbol with modules_per_edge modules, see resolutions.py
+# raises a ValueError for a target that isn't a positive scale or size, or whose image would be larger than MAX_IMAGE_SIZE
+def get_target_module_size(target, modules_per_edge, quiet_zone=1):
+    target = str(target).strip().lower()
+    try:
+        amount = float(target[:-1]) if target.endswith("x") else int(target)
+    except ValueError:
+        raise ValueError(f"Unknown size {target!r}, expected a scale like 2x or a size in pixels like 512")
+    if not math.isfinite(amount) or amount <= 0:
+        raise ValueError(f"Size {target!r} has to be a positive scale like 2x or a positive number of pixels like 512")
+
+    image_modules = modules_per_edge + 2*quiet_zone
+    if target.endswith("x"):
+        module_size = max(1, int(round(get_module_size(modules_per_edge) * amount)))
+    else:
+        module_size = max(1, amount // image_modules)
+    if module_size * image_modules > MAX_IMAGE_SIZE:
+        raise ValueError(f"Size {target!r} would make a {module_size * image_modules} pixel wide image, the largest is {MAX_IMAGE_SIZE}")
+    return module_size
+
+# the targets in a comma separated list like "1x,2x,512", checked on the smallest QR code so a bad one is
+# found before anything is encoded
+def parse_size_targets(sizes):
+    targets = [target.strip() for target in sizes.split(",") if target.strip()]
+    if not targets:
+        raise ValueError("No sizes given, expected a comma separated list like 1x,2x,512")
+    for target in targets:
+        get_target_module_size(target, 21)
+    return targets
+
+
+
+# Micro QR symbols, see micro.py
+
+MICRO_VERSIONS = ["M1", "M2", "M3", "M4"]
+MICRO_QUIET_ZONE = 2
+ALPHANUMERIC_CHARS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+
+# (micro version, ec_lvl) -> (symbol number in the format information, data bits, error correction codewords)
+# ec_lvl uses the same numbers as TRANS_EC_LVL: M == 0, L == 1, Q == 3
+MICRO_SYMBOLS = {(1, 1): (0, 20, 2),
+                 (2, 1): (1, 40, 5),
+                 (2, 0): (2, 32, 6),
+                 (3, 1): (3, 84, 6),
+                 (3, 0): (4, 68, 8),
+                 (4, 1): (5, 128, 8),
+                 (4, 0): (6, 112, 10),
+                 (4, 3): (7, 80, 14)}
+
+# mode indicator values and the length of the character count indicator in M1 - M4 (None if the version lacks the mode)
+MICRO_MODES = {"numeric": (0, (3, 4, 5, 6)),
+               "alphanumeric": (1, (None, 3, 4, 5)),
+               "byte": (2, (None, None, 4, 5))}
+
+# no character count indicator is longer than this, so longer data never fits a Micro QR symbol
+MICRO_MAX_COUNT_LENGTH = 6
+
+
+def get_micro_modules_per_edge(micro_version):
+    return (micro_version * 2) + 9
+
+
+# the smallest mode that can hold all of cleaned_data
+def get_micro_mode(cleaned_data):
+    if all(char in "0123456789" for char in cleaned_data):
+        return "numeric"
+    if all(char in ALPHANUMERIC_CHARS for char in cleaned_data):
+        return "alphanumeric"
+    return "byte"
+
+# number of bits of a segment of char_count characters in a micro_version symbol, the same length as
+# micro.get_micro_segment_bits, or None if that version can't hold the mode or the number of characters
+def get_micro_segment_length(char_count, mode, micro_version):
+    count_length = MICRO_MODES[mode][1][micro_version-1]
+    if count_length is None or char_count >= 1 << count_length:
+        return None
+    if mode == "numeric":
+        data_length = (10 * (char_count // 3)) + (0, 4, 7)[char_count % 3]
+    elif mode == "alphanumeric":
+        data_length = (11 * (char_count // 2)) + (6 * (char_count % 2))
+    else:
+        data_length = 8 * char_count
+    return (micro_version - 1) + count_length + data_length
+
+
+# the smallest Micro QR symbol that holds cleaned_data, with the highest error correction level in err_corr
+# at that size (like select_version), returns (micro_version, ec_lvl, mode) or None if none fits
+def find_micro_version(cleaned_data, err_corr="LMQH"):
+    if len(cleaned_data) >= 1 << MICRO_MAX_COUNT_LENGTH:
+        return None
+    mode = get_micro_mode(cleaned_data)
+    for micro_version in range(1, 5):
+        segment_length = get_micro_segment_length(len(cleaned_data), mode, micro_version)
+        if segment_length is None:
+            continue
+        for ec_lvl, letter in ((3, "Q"), (0, "M"), (1, "L")):
+            if letter in err_corr and (micro_version, ec_lvl) in MICRO_SYMBOLS and segment_length <= MICRO_SYMBOLS[(micro_version, ec_lvl)][1]:
+                return micro_version, ec_lvl, mode
+    return None
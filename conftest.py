@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+import pytest
+
+
+# The modules live at the top of the repository, this conftest.py puts it on sys.path for the tests in tests/.
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+
+# run qr-code-gen.py (or another script of the repository) with args, returns the CompletedProcess
+@pytest.fixture
+def run_script():
+    def run(args, script="qr-code-gen.py", input=None, cwd=None):
+        return subprocess.run([sys.executable, os.path.join(REPO_DIR, script)] + [str(arg) for arg in args],
+                              input=input, capture_output=True, cwd=cwd, timeout=300)
+    return run
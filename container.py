@@ -0,0 +1,180 @@
+import os
+import struct
+from sys import byteorder
+from array import array
+from mmap import mmap, ACCESS_READ
+
+
+# Append-only container holding the module matrices of many symbols in one file, so a batch of a
+# million codes doesn't turn into a million small files. Readers memory-map the file and use the
+# offset index to jump straight to record N.
+#
+# Layout (all integers little endian):
+#   file header   b"QRMC", format version (1 byte), 3 reserved bytes
+#   records       index (int64), version_num, ec_lvl, mask_num (1 byte each), packed module rows
+#   offset index  uint64 offset of every record, in the order they were written
+#   trailer       record count (uint64), offset of the index (uint64), b"QRMI"
+#
+# Every row of a matrix is packed on its own, most significant bit first and padded to a whole byte,
+# so a record's length only depends on its version. The index is written when the container is closed;
+# if that never happens, readers rebuild it by walking the records.
+
+CONTAINER_MAGIC = b"QRMC"
+CONTAINER_FORMAT_VERSION = 1
+INDEX_MAGIC = b"QRMI"
+FILE_HEADER = struct.Struct("<4sB3x")
+RECORD_HEADER = struct.Struct("<qBBB")
+TRAILER = struct.Struct("<QQ4s")
+
+
+
+def get_row_bytes(modules_per_edge):
+    return (modules_per_edge + 7) // 8
+
+def get_record_size(version_num):
+    modules_per_edge = ((version_num - 1) * 4) + 21
+    return RECORD_HEADER.size + modules_per_edge * get_row_bytes(modules_per_edge)
+
+
+# matrix[y][x] (1 = dark) -> bytes, one padded run of bytes per row
+def pack_matrix(matrix):
+    row_bytes = get_row_bytes(len(matrix))
+    pad_bits = row_bytes * 8 - len(matrix)
+    packed = bytearray()
+    for row in matrix:
+        row_value = 0
+        for module in row:
+            row_value = (row_value << 1) | module
+        packed += (row_value << pad_bits).to_bytes(row_bytes, "big")
+    return bytes(packed)
+
+def unpack_matrix(packed, modules_per_edge):
+    row_bytes = get_row_bytes(modules_per_edge)
+    pad_bits = row_bytes * 8 - modules_per_edge
+    matrix = []
+    for y in range(modules_per_edge):
+        row_value = int.from_bytes(packed[y*row_bytes:(y+1)*row_bytes], "big") >> pad_bits
+        matrix.append([(row_value >> (modules_per_edge-1-x)) & 1 for x in range(modules_per_edge)])
+    return matrix
+
+
+
+# one symbol read from a container, packed holds its packed module rows
+class ContainerRecord:
+
+    def __init__(self, index, version_num, ec_lvl, mask_num, packed):
+        self.index = index
+        self.version_num = version_num
+        self.ec_lvl = ec_lvl
+        self.mask_num = mask_num
+        self.modules_per_edge = ((version_num - 1) * 4) + 21
+        self.packed = packed
+
+    def get_matrix(self):
+        return unpack_matrix(self.packed, self.modules_per_edge)
+
+
+
+class ContainerWriter:
+
+    # append=True continues an existing container, its index is rewritten when this writer is closed
+    def __init__(self, path, append=False):
+        self.offsets = array("Q")
+        if append and os.path.exists(path) and os.path.getsize(path) > 0:
+            with ContainerReader(path) as reader:
+                self.offsets.extend(reader.offsets)
+                records_end = reader.records_end
+            self.file = open(path, "r+b")
+            self.file.truncate(records_end)
+            self.file.seek(records_end)
+        else:
+            self.file = open(path, "wb")
+            self.file.write(FILE_HEADER.pack(CONTAINER_MAGIC, CONTAINER_FORMAT_VERSION))
+
+    def write(self, index, version_num, ec_lvl, mask_num, packed):
+        self.offsets.append(self.file.tell())
+        self.file.write(RECORD_HEADER.pack(index, version_num, ec_lvl, mask_num))
+        self.file.write(packed)
+
+    def close(self):
+        if self.file.closed:
+            return
+        index_offset = self.file.tell()
+        offsets = array("Q", self.offsets)
+        if byteorder != "little":
+            offsets.byteswap()
+        self.file.write(offsets.tobytes())
+        self.file.write(TRAILER.pack(len(self.offsets), index_offset, INDEX_MAGIC))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+
+class ContainerReader:
+
+    # raises a ValueError for anything that doesn't start with the header ContainerWriter writes, e.g. an empty file
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        # checked before mapping the file, since an empty file can't be mapped at all
+        header = self.file.read(FILE_HEADER.size)
+        if len(header) < FILE_HEADER.size or FILE_HEADER.unpack(header) != (CONTAINER_MAGIC, CONTAINER_FORMAT_VERSION):
+            self.file.close()
+            raise ValueError(f"{path} is not a QRMC container (a QR code matrix container written by ContainerWriter)")
+        self.map = mmap(self.file.fileno(), 0, access=ACCESS_READ)
+        if not self.read_index():
+            self.rebuild_index()
+
+    # use the index written by ContainerWriter.close, returns False if there is none
+    def read_index(self):
+        if len(self.map) < FILE_HEADER.size + TRAILER.size:
+            return False
+        count, index_offset, magic = TRAILER.unpack_from(self.map, len(self.map) - TRAILER.size)
+        if magic != INDEX_MAGIC or index_offset + count * 8 + TRAILER.size != len(self.map):
+            return False
+        self.offsets = array("Q")
+        self.offsets.frombytes(self.map[index_offset:index_offset + count * 8])
+        if byteorder != "little":
+            self.offsets.byteswap()
+        self.records_end = index_offset
+        return True
+
+    # walk the records of a container that was never closed, stopping at the first incomplete one
+    def rebuild_index(self):
+        self.offsets = array("Q")
+        offset = FILE_HEADER.size
+        while offset + RECORD_HEADER.size <= len(self.map):
+            version_num = self.map[offset + 8]
+            if not 1 <= version_num <= 40 or offset + get_record_size(version_num) > len(self.map):
+                break
+            self.offsets.append(offset)
+            offset += get_record_size(version_num)
+        self.records_end = offset
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, record_num):
+        offset = self.offsets[record_num]
+        index, version_num, ec_lvl, mask_num = RECORD_HEADER.unpack_from(self.map, offset)
+        packed_start = offset + RECORD_HEADER.size
+        packed = self.map[packed_start:offset + get_record_size(version_num)]
+        return ContainerRecord(index, version_num, ec_lvl, mask_num, packed)
+
+    def __iter__(self):
+        for record_num in range(len(self)):
+            yield self[record_num]
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
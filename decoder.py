@@ -0,0 +1,400 @@
+from encoder import GF, sanitize_string
+from spec import FORMAT_WORDS, VERSION_WORDS, ALIGNMENT_PATTERN_LOCS, MASK_CONDITIONS, MICRO_MASK_CONDITIONS, ECL_TABLE_INDEX, get_codeword_counts
+from micro import MICRO_SYMBOLS, MICRO_FORMAT_WORDS, MICRO_MODES
+from functools import lru_cache
+
+
+# Strict decoder used to verify the symbols we generate. It reads a module matrix back the way
+# a scanner would (format and version info, unmasking, de-interleaving, RS syndromes, payload),
+# but it does not correct errors: any damage at all is reported as a VerificationError.
+#
+# A module matrix is a list of rows, matrix[y][x], where 1 is a dark module.
+
+
+
+class VerificationError(ValueError):
+    pass
+
+
+
+ALPHANUMERIC_CHARS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+
+# format word -> (ec_lvl, mask_num) and version word -> version_num
+VALID_FORMAT_WORDS = {FORMAT_WORDS[ec_lvl][mask_num]: (ec_lvl, mask_num) for ec_lvl in range(4) for mask_num in range(8)}
+VALID_VERSION_WORDS = {version_word: version_num for version_num, version_word in enumerate(VERSION_WORDS, 7)}
+
+
+# the format information of a Micro QR symbol holds a symbol number which stands for the version and error correction level
+MICRO_SYMBOL_NUMBERS = {symbol_number: (micro_version, ec_lvl) for (micro_version, ec_lvl), (symbol_number, _, _) in MICRO_SYMBOLS.items()}
+MICRO_SIZES = (11, 13, 15, 17)
+
+
+
+# centers of the alignment patterns, from the spec table (gen_spec_tables.py checks it against the spec formula)
+def get_alignment_centers(version_num):
+    if version_num == 1:
+        return ()
+    return ALIGNMENT_PATTERN_LOCS[version_num-2]
+
+
+# expected value of every function module, as a dict of (x, y) -> value
+@lru_cache(maxsize=None)
+def get_function_modules(version_num):
+    modules_per_edge = (version_num * 4) + 17
+    function_modules = {}
+
+    # finder patterns with their separators, including the cells reserved for the format bits
+    for corner_x, corner_y in [(0, 0), (modules_per_edge-7, 0), (0, modules_per_edge-7)]:
+        for y_shift in range(-1, 8):
+            for x_shift in range(-1, 8):
+                x = corner_x + x_shift
+                y = corner_y + y_shift
+                if 0 <= x < modules_per_edge and 0 <= y < modules_per_edge:
+                    ring = max(abs(x_shift - 3), abs(y_shift - 3))
+                    function_modules[(x, y)] = 1 if ring != 2 and ring != 4 else 0
+    for i in range(9):
+        function_modules[(8, i)] = None
+        function_modules[(i, 8)] = None
+    for i in range(8):
+        function_modules[(8, modules_per_edge-1-i)] = None
+        function_modules[(modules_per_edge-1-i, 8)] = None
+
+    # timing patterns
+    for i in range(8, modules_per_edge-8):
+        function_modules[(i, 6)] = 1 if i % 2 == 0 else 0
+        function_modules[(6, i)] = 1 if i % 2 == 0 else 0
+
+    # alignment patterns, skipping the three that would overlap the finder patterns
+    centers = get_alignment_centers(version_num)
+    finder_centers = [(6, 6), (6, modules_per_edge-7), (modules_per_edge-7, 6)]
+    for center_x in centers:
+        for center_y in centers:
+            if (center_x, center_y) in finder_centers:
+                continue
+            for y_shift in range(-2, 3):
+                for x_shift in range(-2, 3):
+                    ring = max(abs(x_shift), abs(y_shift))
+                    function_modules[(center_x + x_shift, center_y + y_shift)] = 1 if ring != 1 else 0
+
+    # version information blocks, checked separately
+    if version_num >= 7:
+        for i in range(6):
+            for j in range(3):
+                function_modules[(modules_per_edge-11+j, i)] = None
+                function_modules[(i, modules_per_edge-11+j)] = None
+
+    # the dark module
+    function_modules[(8, modules_per_edge-8)] = 1
+    return function_modules
+
+
+# order in which the data modules are read: two-module wide columns from right to left, zig-zagging up and down
+@lru_cache(maxsize=None)
+def get_placement_path(version_num):
+    modules_per_edge = (version_num * 4) + 17
+    function_modules = get_function_modules(version_num)
+    path = []
+    upward = True
+    right_x = modules_per_edge - 1
+    while right_x > 0:
+        # the vertical timing pattern shifts every column pair to its left by one
+        if right_x == 6:
+            right_x = 5
+        rows = range(modules_per_edge-1, -1, -1) if upward else range(modules_per_edge)
+        for y in rows:
+            for x in (right_x, right_x-1):
+                if (x, y) not in function_modules:
+                    path.append((x, y))
+        upward = not upward
+        right_x -= 2
+    return tuple(path)
+
+
+
+def read_format_words(matrix):
+    modules_per_edge = len(matrix)
+    # string index 0 is the most significant bit
+    first_copy_coords = [(x, 8) for x in range(6)] + [(7, 8), (8, 8), (8, 7)] + [(8, y) for y in range(5, -1, -1)]
+    second_copy_coords = [(8, modules_per_edge-1-y) for y in range(7)] + [(modules_per_edge-8+x, 8) for x in range(8)]
+    words = []
+    for coords in (first_copy_coords, second_copy_coords):
+        word = 0
+        for x, y in coords:
+            word = (word << 1) | matrix[y][x]
+        words.append(word)
+    return words
+
+def read_version_words(matrix):
+    modules_per_edge = len(matrix)
+    top_right_word = 0
+    bottom_left_word = 0
+    # bit 0 (least significant) is at the top left of each block
+    for bit_num in range(17, -1, -1):
+        i = bit_num // 3
+        j = bit_num % 3
+        top_right_word = (top_right_word << 1) | matrix[i][modules_per_edge-11+j]
+        bottom_left_word = (bottom_left_word << 1) | matrix[modules_per_edge-11+j][i]
+    return [top_right_word, bottom_left_word]
+
+
+def syndromes_are_zero(block, ec_count):
+    for i in range(ec_count):
+        alpha = GF.exp[i]
+        syndrome = 0
+        for codeword in block:
+            syndrome = GF.multiply(syndrome, alpha) ^ codeword
+        if syndrome != 0:
+            return False
+    return True
+
+
+
+# reads big-endian bit fields out of a list of codewords
+class BitReader:
+
+    def __init__(self, codewords):
+        self.value = int.from_bytes(bytes(codewords), "big")
+        self.bits_left = len(codewords) * 8
+
+    def read(self, bit_count):
+        if bit_count > self.bits_left:
+            raise VerificationError("payload runs past the end of the data codewords")
+        self.bits_left -= bit_count
+        return (self.value >> self.bits_left) & ((1 << bit_count) - 1)
+
+
+# returns the decoded text and the structured append header (index, total, parity), or None
+def decode_payload(codewords, version_num):
+    reader = BitReader(codewords)
+    segments = []
+    structured_append = None
+    while reader.bits_left >= 4:
+        mode = reader.read(4)
+        if mode == 0b0000: # terminator
+            break
+        elif mode == 0b0011: # structured append
+            structured_append = (reader.read(4), reader.read(4) + 1, reader.read(8))
+        elif mode == 0b0001: # numeric
+            char_count = reader.read(10 if version_num < 10 else 12 if version_num < 27 else 14)
+            digits = ""
+            while char_count >= 3:
+                digits += f'{reader.read(10):03d}'
+                char_count -= 3
+            if char_count == 2:
+                digits += f'{reader.read(7):02d}'
+            elif char_count == 1:
+                digits += f'{reader.read(4):01d}'
+            segments.append(digits)
+        elif mode == 0b0010: # alphanumeric
+            char_count = reader.read(9 if version_num < 10 else 11 if version_num < 27 else 13)
+            chars = ""
+            while char_count >= 2:
+                pair_value = reader.read(11)
+                chars += ALPHANUMERIC_CHARS[pair_value // 45] + ALPHANUMERIC_CHARS[pair_value % 45]
+                char_count -= 2
+            if char_count == 1:
+                chars += ALPHANUMERIC_CHARS[reader.read(6)]
+            segments.append(chars)
+        elif mode == 0b0100: # byte
+            char_count = reader.read(8 if version_num < 10 else 16)
+            segments.append(bytes(reader.read(8) for _ in range(char_count)).decode("latin-1"))
+        else:
+            raise VerificationError(f"unsupported mode indicator {mode:04b}")
+    return "".join(segments), structured_append
+
+
+
+# everything read back out of a symbol
+class DecodedSymbol:
+
+    def __init__(self, data, version_num, ec_lvl, mask_num, structured_append=None):
+        self.data = data
+        self.version_num = version_num
+        self.ec_lvl = ec_lvl
+        self.mask_num = mask_num
+        # (index, total, parity) if the symbol is part of a structured append sequence
+        self.structured_append = structured_append
+
+
+def decode_matrix(matrix):
+    modules_per_edge = len(matrix)
+    if modules_per_edge in MICRO_SIZES:
+        return decode_micro_matrix(matrix)
+    version_num = (modules_per_edge - 17) // 4
+    if modules_per_edge < 21 or (modules_per_edge - 17) % 4 != 0 or version_num > 40:
+        raise VerificationError(f"{modules_per_edge} modules per edge is not a valid QR code size")
+
+    # format information: both copies must be the same valid word
+    format_words = read_format_words(matrix)
+    if format_words[0] not in VALID_FORMAT_WORDS:
+        raise VerificationError(f"invalid format information {format_words[0]:015b}")
+    if format_words[0] != format_words[1]:
+        raise VerificationError(f"format information copies differ: {format_words[0]:015b} and {format_words[1]:015b}")
+    ec_lvl, mask_num = VALID_FORMAT_WORDS[format_words[0]]
+
+    # version information: both copies must encode the version implied by the size
+    if version_num >= 7:
+        for version_word in read_version_words(matrix):
+            if VALID_VERSION_WORDS.get(version_word) != version_num:
+                raise VerificationError(f"invalid version information {version_word:018b} for version {version_num}")
+
+    for (x, y), value in get_function_modules(version_num).items():
+        if value is not None and matrix[y][x] != value:
+            raise VerificationError(f"function pattern module ({x}, {y}) has the wrong color")
+
+    # unmask the data modules and pack them into codewords
+    mask_condition = MASK_CONDITIONS[mask_num]
+    cw_info = get_codeword_counts(version_num)[ECL_TABLE_INDEX[ec_lvl]]
+    block_lengths = []
+    for group_num in range(cw_info.getGroupsCount()):
+        block_lengths += [cw_info.getDataCWCount(group_num)] * cw_info.getBlocksCount(group_num)
+    ec_count = cw_info.getECCWCount()
+    total_codewords = sum(block_lengths) + (ec_count * len(block_lengths))
+
+    codewords = []
+    codeword = 0
+    for bit_num, (x, y) in enumerate(get_placement_path(version_num)[:total_codewords*8]):
+        codeword = (codeword << 1) | (matrix[y][x] ^ mask_condition(y, x))
+        if bit_num % 8 == 7:
+            codewords.append(codeword)
+            codeword = 0
+
+    # de-interleave: data codewords first, then error correction codewords
+    blocks = [[] for _ in block_lengths]
+    codeword_iter = iter(codewords)
+    for cw_num in range(max(block_lengths)):
+        for block_num, block_length in enumerate(block_lengths):
+            if cw_num < block_length:
+                blocks[block_num].append(next(codeword_iter))
+    for cw_num in range(ec_count):
+        for block in blocks:
+            block.append(next(codeword_iter))
+
+    data_codewords = []
+    for block_num, block in enumerate(blocks):
+        if not syndromes_are_zero(block, ec_count):
+            raise VerificationError(f"Reed-Solomon syndromes of block {block_num} are not zero")
+        data_codewords += block[:block_lengths[block_num]]
+
+    data, structured_append = decode_payload(data_codewords, version_num)
+    return DecodedSymbol(data, version_num, ec_lvl, mask_num, structured_append)
+
+
+# a Micro QR symbol (see micro.py): one finder pattern, timing patterns along the top and left edges,
+# a single block of codewords and no interleaving
+def decode_micro_matrix(matrix):
+    modules_per_edge = len(matrix)
+    if modules_per_edge not in MICRO_SIZES:
+        raise VerificationError(f"{modules_per_edge} modules per edge is not a valid Micro QR symbol size")
+
+    format_word = 0
+    for i in range(8):
+        format_word |= matrix[i+1][8] << i
+    for i in range(7):
+        format_word |= matrix[8][i+1] << (14-i)
+    if format_word not in MICRO_FORMAT_WORDS:
+        raise VerificationError(f"invalid format information {format_word:015b}")
+    symbol_number, mask_num = MICRO_FORMAT_WORDS[format_word]
+    micro_version, ec_lvl = MICRO_SYMBOL_NUMBERS[symbol_number]
+    if micro_version != (modules_per_edge - 9) // 2:
+        raise VerificationError(f"format information is for M{micro_version}, but the symbol is {modules_per_edge}x{modules_per_edge}")
+
+    # finder pattern with its separator, and the timing patterns
+    for y in range(8):
+        for x in range(8):
+            # rings 2 and 4 around the center are light, ring 4 being the separator
+            expected = 0 if max(abs(x - 3), abs(y - 3)) in (2, 4) else 1
+            if matrix[y][x] != expected:
+                raise VerificationError(f"function pattern module ({x}, {y}) has the wrong color")
+    for i in range(8, modules_per_edge):
+        if matrix[0][i] != (i + 1) % 2 or matrix[i][0] != (i + 1) % 2:
+            raise VerificationError(f"timing pattern module {i} has the wrong color")
+
+    # read the data modules two columns at a time from the bottom right corner, skipping the function patterns
+    _, data_bits_count, ec_count = MICRO_SYMBOLS[(micro_version, ec_lvl)]
+    mask_condition = MICRO_MASK_CONDITIONS[mask_num]
+    bits = ""
+    upward = True
+    for right_x in range(modules_per_edge-1, 0, -2):
+        for i in range(modules_per_edge):
+            y = modules_per_edge-1-i if upward else i
+            for x in (right_x, right_x-1):
+                if x > 0 and y > 0 and not (x <= 8 and y <= 8):
+                    bits += str(matrix[y][x] ^ mask_condition(y, x))
+        upward = not upward
+
+    data_bits = bits[:data_bits_count]
+    data_codewords = [int(data_bits[i:i+8].ljust(8, "0"), 2) for i in range(0, data_bits_count, 8)]
+    ec_codewords = [int(bits[i:i+8], 2) for i in range(data_bits_count, data_bits_count + ec_count*8, 8)]
+    if not syndromes_are_zero(data_codewords + ec_codewords, ec_count):
+        raise VerificationError("Reed-Solomon syndromes are not zero")
+
+    # the payload, which ends at the end of the data bits or at a terminator (which looks like an empty numeric segment)
+    reader = BitReader(data_codewords)
+    reader.value >>= (-data_bits_count) % 8
+    reader.bits_left = data_bits_count
+    segments = []
+    while True:
+        mode_length = micro_version - 1
+        if reader.bits_left < mode_length:
+            break
+        mode_indicator = reader.read(mode_length)
+        modes = [mode for mode, (indicator, _) in MICRO_MODES.items() if indicator == mode_indicator]
+        if not modes or MICRO_MODES[modes[0]][1][micro_version-1] is None:
+            raise VerificationError(f"unsupported mode indicator {mode_indicator:0{mode_length}b} for M{micro_version}")
+        count_length = MICRO_MODES[modes[0]][1][micro_version-1]
+        if reader.bits_left < count_length:
+            break
+        char_count = reader.read(count_length)
+        if modes[0] == "numeric":
+            if char_count == 0:
+                break
+            digits = ""
+            while char_count >= 3:
+                digits += f'{reader.read(10):03d}'
+                char_count -= 3
+            if char_count == 2:
+                digits += f'{reader.read(7):02d}'
+            elif char_count == 1:
+                digits += f'{reader.read(4):01d}'
+            segments.append(digits)
+        elif modes[0] == "alphanumeric":
+            chars = ""
+            while char_count >= 2:
+                pair_value = reader.read(11)
+                chars += ALPHANUMERIC_CHARS[pair_value // 45] + ALPHANUMERIC_CHARS[pair_value % 45]
+                char_count -= 2
+            if char_count == 1:
+                chars += ALPHANUMERIC_CHARS[reader.read(6)]
+            segments.append(chars)
+        else:
+            segments.append(bytes(reader.read(8) for _ in range(char_count)).decode("latin-1"))
+
+    return DecodedSymbol("".join(segments), micro_version, ec_lvl, mask_num)
+
+
+# read the module matrix out of a rendered image with a quiet zone of border modules
+# samples the center of every module, so it also works on images that were resized by whole factors
+def read_image_matrix(image, module_size, border=1):
+    pixels = image.convert("L").load()
+    modules_per_edge = (image.size[0] // module_size) - (2 * border)
+    offset = (border * module_size) + (module_size // 2)
+    return [[1 if pixels[offset + (x * module_size), offset + (y * module_size)] < 128 else 0
+             for x in range(modules_per_edge)]
+            for y in range(modules_per_edge)]
+
+
+# decode a generated symbol and make sure it holds the expected data
+def verify_matrix(matrix, expected_data):
+    decoded = decode_matrix(matrix)
+    if decoded.data != expected_data:
+        raise VerificationError(f"decoded data {decoded.data!r} does not match the encoded data")
+    return decoded
+
+
+# verify a QrSymbol returned by generate_qr_code against the data it was generated from
+def verify_symbol(qr_symbol, data):
+    decoded = verify_matrix(qr_symbol.get_matrix(), sanitize_string(data))
+    if (decoded.version_num, decoded.ec_lvl, decoded.mask_num) != (qr_symbol.version_num, qr_symbol.ec_lvl, qr_symbol.mask_num):
+        raise VerificationError("decoded version, error correction level or mask does not match the generated symbol")
+    return decoded
@@ -0,0 +1,605 @@
+from PIL import Image
+from masks import QrMask, EXHAUSTIVE
+from profiling import NULL_TIMER
+from container import pack_matrix
+from matrix_export import to_qrm_bytes, to_npy_bytes
+from io import BytesIO
+from functools import lru_cache
+import os
+from spec import FINDER_PATTERN, ALIGNMENT_PATTERN, ALIGNMENT_PATTERN_LOCS, CodewordCounts, get_codeword_counts, get_version_word
+from capacity import sanitize_string, select_version, get_module_size, TRANS_EC_LVL, IMAGE_RESOLUTION, MODE_BITS
+
+
+class GaloisField:
+    def __init__(self):
+        # initialize exp and log tables for GF(256)
+        exp = [0] * 256
+        log = [0] * 256
+        
+        # generate the exp and log tables
+        value = 1
+        for i in range(256):
+            exp[i] = value
+            if i < 255:  # for i = 255, leave log[0] = 0
+                log[value] = i
+            
+            value = value << 1  # multiply by 2
+            if value > 255:
+                value ^= 0b100011101  # reduce using x^8 + x^4 + x^3 + x^2 + 1
+
+        # the tables never change once built, so one field can be shared by every thread
+        self.exp = tuple(exp)
+        self.log = tuple(log)
+    
+    def multiply(self, a, b):
+        if a == 0 or b == 0:
+            return 0
+        return self.exp[(self.log[a] + self.log[b]) % 255]
+    
+    def divide(self, a, b):
+        if b == 0:
+            raise ValueError("Division by zero")
+        if a == 0:
+            return 0
+        return self.exp[(self.log[a] - self.log[b] + 255) % 255]
+
+    # multiply two polynomials in GF(256)
+    # each polynomial is represented as a list of coefficients from highest to lowest degree
+    def multiply_polynomials(self, poly1, poly2):
+        result = [0] * (len(poly1) + len(poly2) - 1)
+        
+        # multiply each term of poly1 with each term of poly2
+        for i, coeff1 in enumerate(poly1):
+            for j, coeff2 in enumerate(poly2):
+                # XOR is addition in GF(256)
+                result[i + j] ^= self.multiply(coeff1, coeff2)
+        
+        return result
+
+
+# the field every encode uses, its tables are read only so it's safe to share between threads
+GF = GaloisField()
+
+
+
+# module_array_class with an update_module that counts the modules written in write_count, for the
+# module_writes counter of an enabled timer, so the plain classes don't pay for it on every module
+@lru_cache(maxsize=None)
+def get_counting_class(module_array_class):
+    def update_module(self, x, y, value, force_update=False):
+        if module_array_class.update_module(self, x, y, value, force_update) != 0:
+            return 1
+        self.write_count += 1
+        return 0
+    return type(f"Counting{module_array_class.__name__}", (module_array_class,), {"update_module": update_module})
+
+
+
+class ModuleArray:
+
+    # only counted by the classes of get_counting_class
+    write_count = 0
+
+    # shared, read-only tables from spec.py
+    FINDER_PATTERN = FINDER_PATTERN
+    ALIGNMENT_PATTERN = ALIGNMENT_PATTERN
+    # Has data for versions 2 - 40
+    ALIGNMENT_PATTERN_LOCS = ALIGNMENT_PATTERN_LOCS
+    
+    def __init__(self, pixel_arr, version_num, modules_per_edge, module_size):
+        self.pixel_arr = pixel_arr
+        self.version_num = version_num
+        self.modules_per_edge = modules_per_edge
+        self.module_size = module_size
+        self.protected_modules = self.new_protected_modules()
+        self.add_finder_patterns()
+        if self.version_num > 1:
+            self.add_alignment_patterns()
+        self.add_timing_patterns()
+        self.protect_format_bits()
+        self.add_dark_module()
+        
+    # container for the [x, y] coordinates of the modules that must not be masked or overwritten
+    def new_protected_modules(self):
+        return []
+
+    def set_pixel_arr(self, pixel_arr):
+        self.pixel_arr = pixel_arr
+        
+    def get_pixel_arr(self):
+        return self.pixel_arr
+
+    def get_module(self, x, y):
+        # convert module x, y coords to real pixel coords
+        module_x = (x+1)*self.module_size
+        module_y = (y+1)*self.module_size
+        return self.pixel_arr[module_x, module_y]
+
+    # list of rows of module values, matrix[y][x], where 1 is a dark module
+    def to_matrix(self):
+        return [[self.get_module(x, y) for x in range(self.modules_per_edge)] for y in range(self.modules_per_edge)]
+
+    def update_module(self, x, y, value, force_update=False):
+        # if we are not allowed to update this module, return error        
+        if [x, y] in self.protected_modules and not force_update:
+            return 1
+        # convert module x, y coords to real pixel coords
+        module_x = (x+1)*self.module_size
+        module_y = (y+1)*self.module_size
+        # for every pixel within that module, change its value
+        for i in range(module_x, module_x+self.module_size):
+            for j in range(module_y, module_y+self.module_size):
+                self.pixel_arr[i,j] = value
+        return 0
+    
+    def add_finder_patterns(self):
+        # Finder patterns
+        for x, row in enumerate(self.FINDER_PATTERN):
+            for y, value in enumerate(row):
+                # Top left finder pattern
+                self.update_module(x-1, y-1, value)
+                self.protected_modules.append([x-1, y-1])
+                # Top right finder pattern
+                self.update_module((self.modules_per_edge-7)+x-1, y-1, value)
+                self.protected_modules.append([(self.modules_per_edge-7)+x-1, y-1])
+                # Bottom left finder pattern
+                self.update_module(x-1, (self.modules_per_edge-7)+y-1, value)
+                self.protected_modules.append([x-1, (self.modules_per_edge-7)+y-1])
+    
+    def protect_format_bits(self):
+        # if version is 7 or higher, we need to add a redundant indication of the version number
+        if self.version_num > 6:
+            version_word = get_version_word(self.version_num)
+            bits_list = MovableHeadArray([(version_word >> i) & 1 for i in range(18)])
+            for i in range(6):
+                for j in range(3):
+                    # format bits to the left of the top right finder pattern
+                    self.update_module(self.modules_per_edge-11+j, i, bits_list.get_head())
+                    self.protected_modules.append([self.modules_per_edge-11+j, i])
+                    # format bits above the bottom left finder pattern
+                    self.update_module(i, self.modules_per_edge-11+j, bits_list.get_head())
+                    self.protected_modules.append([i, self.modules_per_edge-11+j])
+                    bits_list.curr_index += 1
+
+        # format bits to the right of the bottom-left finder pattern
+        for y in range(0, self.modules_per_edge, 1):
+            if y not in range(9, self.modules_per_edge-8):
+                self.protected_modules.append([8, y])
+        
+        # format bits under the top left finder pattern
+        for x in range(0, self.modules_per_edge, 1):
+            if x not in range(9, self.modules_per_edge-8):
+                self.protected_modules.append([x, 8])
+
+    def add_timing_patterns(self):
+        # timing pattern between top left and top right finder patterns
+        for x in range(7, self.modules_per_edge-7):
+            if x % 2 == 0:
+                self.update_module(x, 6, 1, True)
+            self.protected_modules.append([x, 6])
+        # timing pattern between top left and bottom left finder patterns
+        for y in range(7, self.modules_per_edge-7):
+            if y % 2 == 0:
+                self.update_module(6, y, 1, True)
+            self.protected_modules.append([6, y])
+                
+    # Dark module: one module that is ALWAYS dark in ALL QR codes
+    def add_dark_module(self):
+        self.update_module(8, ((4 * self.version_num) + 9), 1, True)
+        self.protected_modules.append([8, ((4 * self.version_num) + 9) ])
+    
+    def add_alignment_patterns(self):
+        locations = self.ALIGNMENT_PATTERN_LOCS[self.version_num-2]
+        for i in range(len(locations)):
+            for j in range(len(locations)):
+                if [locations[i], locations[j]] not in self.protected_modules:
+                    for x_shift, row in enumerate(self.ALIGNMENT_PATTERN):
+                        for y_shift, value in enumerate(row):
+                            align_x = locations[i] + x_shift - 2
+                            align_y = locations[j] + y_shift - 2
+                            self.update_module(align_x, align_y, value)
+                            self.protected_modules.append([align_x, align_y])
+
+
+
+class MovableHeadArray:
+    
+    def __init__(self, data_bits):
+        self.data_bits = data_bits
+        self.curr_index = 0
+        
+    def get_head(self):
+        try:
+            return self.data_bits[self.curr_index]
+        # If we try to get a bit after the end of the data bits, just return 0 
+        except:
+            return 0
+
+    def set_head(self, value):
+        self.data_bits[self.curr_index] = value
+
+
+
+###################################################################################################
+########################################## END CLASSES ############################################
+###################################################################################################
+
+
+
+# create a generator polynomial for the specified number of error correction words
+# returns coefficients from highest to lowest degree
+def create_generator_polynomial(num_codewords, gf):
+    # start with g(x) = (x - α^0)
+    generator = [1, gf.exp[0]]
+    
+    # multiply by (x - α^i) for i from 1 to num_codewords-1
+    for i in range(1, num_codewords):
+        # create the term (x - α^i)
+        term = [1, gf.exp[i]]
+        # multiply the current generator polynomial by this term
+        generator = gf.multiply_polynomials(generator, term)
+    
+    return generator
+
+
+# generator polynomials only depend on the number of error correction words, so each one is built once
+# (as a tuple, so the cached polynomial can't be changed by a caller)
+@lru_cache(maxsize=None)
+def get_generator_polynomial(num_codewords):
+    return tuple(create_generator_polynomial(num_codewords, GF))
+
+
+# calculate error correction codewords using polynomial division in GF(256)
+def calculate_error_correction(message_ints, num_codewords, gf):
+    # generate the appropriate generator polynomial
+    generator_coeffs = get_generator_polynomial(num_codewords)
+    
+    # pad message with zeros according to generator polynomial degree
+    padding = [0] * (len(generator_coeffs) - 1)
+    dividend = message_ints + padding
+    
+    # perform polynomial division
+    for i in range(len(message_ints)):
+        if dividend[i] != 0:
+            factor = dividend[i]
+            for j in range(len(generator_coeffs)):
+                dividend[i + j] ^= gf.multiply(generator_coeffs[j], factor)
+    
+    # return the remainder (error correction codewords)
+    return dividend[-len(padding):]
+
+
+
+BACKENDS = ["pil", "bitboard"]
+OUTPUT_FILE_FORMATS = ["png", "qrm", "npy"]
+
+
+
+# object returned by generate_qr_code that holds the finished symbol and how it was built
+class QrSymbol:
+
+    is_micro = False
+    # modules of light border around the symbol in its images
+    quiet_zone = 1
+
+    def __init__(self, image, module_arr, version_num, ec_lvl, mask_num):
+        self.image = image
+        self.module_arr = module_arr
+        self.version_num = version_num
+        self.ec_lvl = ec_lvl
+        self.mask_num = mask_num
+        self.modules_per_edge = module_arr.modules_per_edge
+        # MaskStrategy quality report, None unless the strategy asked for one
+        self.mask_report = None
+        self.module_bytes = None
+        self.packed_rows = None
+
+    def get_ecl_letter(self):
+        return TRANS_EC_LVL[self.ec_lvl]
+
+    def get_version_name(self):
+        return str(self.version_num)
+
+    def get_default_filename(self):
+        return f"./image-{self.version_num}{self.get_ecl_letter()}.png"
+
+    def get_matrix(self):
+        return self.module_arr.to_matrix()
+
+    # one byte per module (1 = dark), row by row, built the first time it is asked for
+    def get_module_bytes(self):
+        if self.module_bytes is None:
+            self.module_bytes = bytes(module for row in self.get_matrix() for module in row)
+        return self.module_bytes
+
+    # read-only modules_per_edge x modules_per_edge view of get_module_bytes that shares its memory,
+    # e.g. numpy.asarray(qr_symbol.get_module_buffer()) doesn't copy anything
+    def get_module_buffer(self):
+        return memoryview(self.get_module_bytes()).cast("B", (self.modules_per_edge, self.modules_per_edge))
+
+    # the bit-packed rows used by container.py and matrix_export.py
+    def get_packed_rows(self):
+        if self.packed_rows is None:
+            self.packed_rows = pack_matrix(self.get_matrix())
+        return self.packed_rows
+
+    # buffer protocol (Python 3.12+), memoryview(qr_symbol) is the same as get_module_buffer()
+    def __buffer__(self, flags):
+        return self.get_module_buffer()
+
+    # images of the symbol at several sizes from one pass over its modules, see resolutions.py
+    def render_sizes(self, targets):
+        from resolutions import render_resolutions
+        return render_resolutions(self, targets, self.quiet_zone)
+
+    # the symbol as a file in one of OUTPUT_FILE_FORMATS: a PNG image or a raw module matrix (see matrix_export.py)
+    def to_bytes(self, output_format="png"):
+        if output_format == "png":
+            buffer = BytesIO()
+            self.image.save(buffer, format="PNG")
+            return buffer.getvalue()
+        if output_format == "qrm":
+            return to_qrm_bytes(self)
+        if output_format == "npy":
+            return to_npy_bytes(self)
+        raise ValueError(f"Unknown output format {output_format!r}, expected one of {', '.join(OUTPUT_FILE_FORMATS)}")
+
+    # write the symbol to a path, a binary file-like object or a writable buffer like a bytearray
+    # the format comes from the extension of a path unless output_format is given, and defaults to png
+    # returns the number of bytes written
+    def save(self, destination, output_format=None):
+        if output_format is None:
+            output_format = get_output_format(destination) if isinstance(destination, (str, os.PathLike)) else "png"
+        data = self.to_bytes(output_format)
+        if hasattr(destination, "write"):
+            destination.write(data)
+        elif isinstance(destination, (str, os.PathLike)):
+            with open(destination, "wb") as output_file:
+                output_file.write(data)
+        else:
+            buffer = memoryview(destination).cast("B")
+            if len(buffer) < len(data):
+                raise ValueError(f"The buffer holds {len(buffer)} bytes, but the {output_format} output is {len(data)} bytes long")
+            buffer[:len(data)] = data
+        return len(data)
+
+
+
+# output format of a filename, png unless it ends in one of the other OUTPUT_FILE_FORMATS
+def get_output_format(filename):
+    extension = os.path.splitext(str(filename))[1].lower().lstrip(".")
+    return extension if extension in OUTPUT_FILE_FORMATS else "png"
+
+
+
+def pad_data_bits(data_bits, cw_info):
+    # add up to 4 zeroes as a terminator, making sure we don't go over the max length
+    i = 0
+    while i < 4 and len(data_bits) < cw_info.getMaxDataBits():
+        data_bits += "0"
+        i += 1
+
+    # make the length of the bitstring a multiple of 8
+    while len(data_bits) % 8 != 0:
+        data_bits += "0"
+
+    # add padding bytes until we reach the required size
+    while len(data_bits) < cw_info.getMaxDataBits():
+        data_bits += "1110110000010001"
+    # if we went over by one byte, remove the extra byte
+    if len(data_bits) > cw_info.getMaxDataBits():
+        data_bits = data_bits[:-8]
+
+    assert len(data_bits) == cw_info.getMaxDataBits()
+    return data_bits
+
+
+# split the padded data bits into blocks, compute their error correction codewords and interleave everything
+def build_content_bits(data_bits, cw_info, gf):
+    # construct the message_ints and eccw_ints arrays
+    # message_ints/eccw_ints = [group1, group2]
+    # groupX = [block1, block2, ...]
+    # blockX = [datacw1, datacw1, ...]
+    i = 0
+    message_ints = []
+    eccw_ints = []
+    for group_num in range(cw_info.getGroupsCount()):
+        group = []
+        ec_group = []
+        for block_num in range(cw_info.getBlocksCount(group_num)):
+            block = []
+            for cw in range(cw_info.getDataCWCount(group_num)):
+                block.append(int(data_bits[i:i+8], 2))
+                i += 8
+            group.append(block)
+            ec_group.append(calculate_error_correction(block, cw_info.getECCWCount(), gf))
+        message_ints.append(group)
+        eccw_ints.append(ec_group)
+
+    # data from messages and error correction codes must be interleaved as following:
+    # first message int from first block in first group, first message int from second block in first group, first message int from first block in second group, first message int from second block in second group, second message int from first block in first group, etc.
+    # immediately following the message ints, the error correction codes are interleaved:
+    # first ec int from first block in first group, first ec int from second block in first group, first ec int from first block in second group, first ec from second block in second group, second ec int from first block in first group, etc.
+
+    content_ints = []
+
+    # if there are 2 groups, handle their more complicated interleaving
+    if cw_info.getGroupsCount() > 1:
+        i = 0
+        j = 0
+
+        while i < cw_info.getDataCWCount(0) or j < cw_info.getDataCWCount(1):
+            if i < cw_info.getDataCWCount(0):
+                for block_num in range(cw_info.getBlocksCount(0)):
+                    content_ints.append(message_ints[0][block_num][i])
+                i += 1
+
+            if j < cw_info.getDataCWCount(1):
+                for block_num in range(cw_info.getBlocksCount(1)):
+                    content_ints.append(message_ints[1][block_num][j])
+                j += 1
+
+    else:
+        for cw_num in range(cw_info.getDataCWCount(0)):
+            for group_num in range(cw_info.getGroupsCount()):
+                for block_num in range(cw_info.getBlocksCount(group_num)):
+                    content_ints.append(message_ints[group_num][block_num][cw_num])
+
+    # interleave the error correction codes, adding them immediately after the message data
+    for cw_num in range(cw_info.getECCWCount()):
+        for group_num in range(cw_info.getGroupsCount()):
+            for block_num in range(cw_info.getBlocksCount(group_num)):
+                content_ints.append(eccw_ints[group_num][block_num][cw_num])
+
+    # convert the list of ints to a bitstring
+    content_bits = ""
+    for cont_int in content_ints:
+        content_bits += f'{cont_int:08b}'
+
+    return content_bits
+
+
+def place_data_bits(module_arr, content_bits):
+    data_list = MovableHeadArray([int(x) for x in list(content_bits)])
+    modules_per_edge = module_arr.modules_per_edge
+
+    # Add the data bits to the right of the left finder pattern
+    for x in range(modules_per_edge-1, 8, -4):
+        for y in range(modules_per_edge-1, -1, -1):
+            data_list.curr_index += 1 if module_arr.update_module(x, y, data_list.get_head()) == 0 else 0
+            data_list.curr_index += 1 if module_arr.update_module(x-1, y, data_list.get_head()) == 0 else 0
+        for y in range(0, modules_per_edge, 1):
+            data_list.curr_index += 1 if module_arr.update_module(x-2, y, data_list.get_head()) == 0 else 0
+            data_list.curr_index += 1 if module_arr.update_module(x-3, y, data_list.get_head()) == 0 else 0
+
+    # Data bits between the top left and bottom left finder paterns
+    for y in range(modules_per_edge-9, 8, -1):
+        data_list.curr_index += 1 if module_arr.update_module(8, y, data_list.get_head()) == 0 else 0
+        data_list.curr_index += 1 if module_arr.update_module(7, y, data_list.get_head()) == 0 else 0
+    for y in range(9, modules_per_edge-8, 1):
+        data_list.curr_index += 1 if module_arr.update_module(5, y, data_list.get_head()) == 0 else 0
+        data_list.curr_index += 1 if module_arr.update_module(4, y, data_list.get_head()) == 0 else 0
+    for y in range(modules_per_edge-9, 8, -1):
+        data_list.curr_index += 1 if module_arr.update_module(3, y, data_list.get_head()) == 0 else 0
+        data_list.curr_index += 1 if module_arr.update_module(2, y, data_list.get_head()) == 0 else 0
+    for y in range(9, modules_per_edge-8, 1):
+        data_list.curr_index += 1 if module_arr.update_module(1, y, data_list.get_head()) == 0 else 0
+        data_list.curr_index += 1 if module_arr.update_module(0, y, data_list.get_head()) == 0 else 0
+
+
+# run the whole pipeline for one string of data and return a QrSymbol
+# timer is an optional PhaseTimer (see profiling.py) that records how long each stage took
+# backend is one of BACKENDS: "pil" draws straight into the image, "bitboard" (see bitboard.py)
+# keeps the matrix as row ints and only draws the image once the mask has been chosen
+# mask_strategy is a masks.MaskStrategy deciding how the mask is picked when mask is -1 (exhaustive search by default)
+# micro allows a Micro QR symbol (see micro.py), which is used whenever the data fits one, unless a version,
+# a mask above 3 or a structured append header is asked for
+def generate_qr_code(data, err_corr="LMQH", version_num=0, mask=-1, timer=NULL_TIMER, header_bits="", backend="pil", mask_strategy=EXHAUSTIVE, micro=False):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+
+    if micro and version_num == 0 and mask < 4 and not header_bits:
+        from micro import select_micro_version, encode_micro_symbol
+        with timer.phase("select_version"):
+            micro_selection = select_micro_version(sanitize_string(data), err_corr)
+        if micro_selection is not None:
+            return encode_micro_symbol(micro_selection, mask, timer)
+
+    with timer.phase("select_version"):
+        cleaned_data = sanitize_string(data)
+        cw_info, version_num, ec_lvl, data_bits = select_version(cleaned_data, err_corr, version_num, header_bits)
+        data_bits = pad_data_bits(data_bits, cw_info)
+
+    with timer.phase("error_correction"):
+        content_bits = build_content_bits(data_bits, cw_info, GF)
+
+    with timer.phase("function_patterns"):
+        modules_per_edge = (((version_num - 1) * 4) + 21)
+        module_size = get_module_size(modules_per_edge)
+        image_size = module_size * (modules_per_edge+2)
+
+        qr_image = Image.new(mode="P",size=[image_size, image_size], color="white")
+        if backend == "bitboard":
+            from bitboard import BitboardModuleArray, BitboardQrMask
+            module_array_class = get_counting_class(BitboardModuleArray) if timer.enabled else BitboardModuleArray
+            module_arr = module_array_class(version_num, modules_per_edge)
+        else:
+            module_array_class = get_counting_class(ModuleArray) if timer.enabled else ModuleArray
+            module_arr = module_array_class(qr_image.load(), version_num, modules_per_edge, module_size)
+
+    with timer.phase("place_data"):
+        place_data_bits(module_arr, content_bits)
+
+    with timer.phase("mask"):
+        qr_masks = BitboardQrMask(modules_per_edge, ec_lvl, mask_strategy) if backend == "bitboard" else QrMask(modules_per_edge, ec_lvl, mask_strategy)
+        if mask >= 0:
+            module_arr = qr_masks.apply_specific_mask(module_arr, mask)
+            mask_num = mask
+        elif backend == "bitboard":
+            module_arr = qr_masks.apply_best_mask(module_arr)
+            mask_num = qr_masks.best_mask
+        else:
+            qr_image = qr_masks.apply_best_mask(qr_image, module_arr)
+            module_arr.set_pixel_arr(qr_image.load())
+            mask_num = qr_masks.best_mask
+
+    if backend == "bitboard":
+        with timer.phase("render"):
+            from bitboard import render_image
+            render_image(module_arr, module_size, qr_image)
+
+    timer.count("module_writes", module_arr.write_count)
+    timer.set("version_num", version_num)
+    timer.set("ec_lvl", TRANS_EC_LVL[ec_lvl])
+    timer.set("mask", mask_num)
+    timer.set("mask_scores", qr_masks.mask_scores)
+    if qr_masks.quality_report is not None:
+        timer.set("mask_report", qr_masks.quality_report)
+
+    qr_symbol = QrSymbol(qr_image, module_arr, version_num, ec_lvl, mask_num)
+    qr_symbol.mask_report = qr_masks.quality_report
+    return qr_symbol
+
+
+# generate_qr_code straight to a file in memory, e.g. to send it to a client without touching the disk
+# options are the keyword arguments of generate_qr_code
+def generate_qr_code_bytes(data, output_format="png", **options):
+    return generate_qr_code(data, **options).to_bytes(output_format)
+
+# generate_qr_code straight into a path, file-like object or writable buffer (see QrSymbol.save)
+# returns the QrSymbol
+def write_qr_code(data, destination, output_format=None, **options):
+    qr_symbol = generate_qr_code(data, **options)
+    qr_symbol.save(destination, output_format)
+    return qr_symbol
+
+
+
+# generate_qr_code with its settings fixed up front, e.g. one encoder per endpoint of a server
+# an encoder is never changed after it is created and every encode() builds its own module array and masks,
+# the only state shared between calls is the read only tables (GF, spec tables and the bitboard mask cache),
+# so one encoder can be used by any number of threads at once
+class QrEncoder:
+
+    def __init__(self, err_corr="LMQH", version_num=0, mask=-1, backend="pil", mask_strategy=EXHAUSTIVE, header_bits="", micro=False):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+        self.err_corr = err_corr
+        self.version_num = version_num
+        self.mask = mask
+        self.backend = backend
+        self.mask_strategy = mask_strategy
+        self.header_bits = header_bits
+        self.micro = micro
+
+    # timer is per call since a PhaseTimer must not be shared between threads
+    def encode(self, data, timer=NULL_TIMER):
+        return generate_qr_code(data, self.err_corr, self.version_num, self.mask, timer, self.header_bits, self.backend, self.mask_strategy, self.micro)
+
+    def encode_bytes(self, data, output_format="png"):
+        return self.encode(data).to_bytes(output_format)
+
+
+###################################################################################################
+######################################### END FUNCTIONS ###########################################
+###################################################################################################
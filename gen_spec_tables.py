@@ -0,0 +1,240 @@
+import os
+from argparse import ArgumentParser
+from io import StringIO
+from sys import argv, exit
+
+
+# Generates spec_tables.py: the codeword block table, alignment pattern locations and the
+# BCH-coded format and version words, as immutable tuples.
+# Every table is checked against the rules in ISO/IEC 18004 before anything is written.
+#
+# python gen_spec_tables.py [output_file]
+# python gen_spec_tables.py --check
+#
+# The output file defaults to the spec_tables.py next to this script. --check writes nothing and exits
+# with status 1 if that file differs from what would be generated.
+
+
+
+# ISO/IEC 18004 Table 9, for versions 1 - 40
+# each version holds H, Q, M, L as (((block count, data codewords per block), ...), ec codewords per block)
+CODEWORD_TABLE = [
+    ((((1, 9),), 17), (((1, 13),), 13), (((1, 16),), 10), (((1, 19),), 7)), # 1
+    ((((1, 16),), 28), (((1, 22),), 22), (((1, 28),), 16), (((1, 34),), 10)), # 2
+    ((((2, 13),), 22), (((2, 17),), 18), (((1, 44),), 26), (((1, 55),), 15)), # 3
+    ((((4, 9),), 16), (((2, 24),), 26), (((2, 32),), 18), (((1, 80),), 20)), # 4
+    ((((2, 11), (2, 12)), 22), (((2, 15), (2, 16)), 18), (((2, 43),), 24), (((1, 108),), 26)), # 5
+    ((((4, 15),), 28), (((4, 19),), 24), (((4, 27),), 16), (((2, 68),), 18)), # 6
+    ((((4, 13), (1, 14)), 26), (((2, 14), (4, 15)), 18), (((4, 31),), 18), (((2, 78),), 20)), # 7
+    ((((4, 14), (2, 15)), 26), (((4, 18), (2, 19)), 22), (((2, 38), (2, 39)), 22), (((2, 97),), 24)), # 8
+    ((((4, 12), (4, 13)), 24), (((4, 16), (4, 17)), 20), (((3, 36), (2, 37)), 22), (((2, 116),), 30)), # 9
+    ((((6, 15), (2, 16)), 28), (((6, 19), (2, 20)), 24), (((4, 43), (1, 44)), 26), (((2, 68), (2, 69)), 18)), # 10
+    ((((3, 12), (8, 13)), 24), (((4, 22), (4, 23)), 28), (((1, 50), (4, 51)), 30), (((4, 81),), 20)), # 11
+    ((((7, 14), (4, 15)), 28), (((4, 20), (6, 21)), 26), (((6, 36), (2, 37)), 22), (((2, 92), (2, 93)), 24)), # 12
+    ((((12, 11), (4, 12)), 22), (((8, 20), (4, 21)), 24), (((8, 37), (1, 38)), 22), (((4, 107),), 26)), # 13
+    ((((11, 12), (5, 13)), 24), (((11, 16), (5, 17)), 20), (((4, 40), (5, 41)), 24), (((3, 115), (1, 116)), 30)), # 14
+    ((((11, 12), (7, 13)), 24), (((5, 24), (7, 25)), 30), (((5, 41), (5, 42)), 24), (((5, 87), (1, 88)), 22)), # 15
+    ((((3, 15), (13, 16)), 30), (((15, 19), (2, 20)), 24), (((7, 45), (3, 46)), 28), (((5, 98), (1, 99)), 24)), # 16
+    ((((2, 14), (17, 15)), 28), (((1, 22), (15, 23)), 28), (((10, 46), (1, 47)), 28), (((1, 107), (5, 108)), 28)), # 17
+    ((((2, 14), (19, 15)), 28), (((17, 22), (1, 23)), 28), (((9, 43), (4, 44)), 26), (((5, 120), (1, 121)), 30)), # 18
+    ((((9, 13), (16, 14)), 26), (((17, 21), (4, 22)), 26), (((3, 44), (11, 45)), 26), (((3, 113), (4, 114)), 28)), # 19
+    ((((15, 15), (10, 16)), 28), (((15, 24), (5, 25)), 30), (((3, 41), (13, 42)), 26), (((3, 107), (5, 108)), 28)), # 20
+    ((((19, 16), (6, 17)), 30), (((17, 22), (6, 23)), 28), (((17, 42),), 26), (((4, 116), (4, 117)), 28)), # 21
+    ((((34, 13),), 24), (((7, 24), (16, 25)), 30), (((17, 46),), 28), (((2, 111), (7, 112)), 28)), # 22
+    ((((16, 15), (14, 16)), 30), (((11, 24), (14, 25)), 30), (((4, 47), (14, 48)), 28), (((4, 121), (5, 122)), 30)), # 23
+    ((((30, 16), (2, 17)), 30), (((11, 24), (16, 25)), 30), (((6, 45), (14, 46)), 28), (((6, 117), (4, 118)), 30)), # 24
+    ((((22, 15), (13, 16)), 30), (((7, 24), (22, 25)), 30), (((8, 47), (13, 48)), 28), (((8, 106), (4, 107)), 26)), # 25
+    ((((33, 16), (4, 17)), 30), (((28, 22), (6, 23)), 28), (((19, 46), (4, 47)), 28), (((10, 114), (2, 115)), 28)), # 26
+    ((((12, 15), (28, 16)), 30), (((8, 23), (26, 24)), 30), (((22, 45), (3, 46)), 28), (((8, 122), (4, 123)), 30)), # 27
+    ((((11, 15), (31, 16)), 30), (((4, 24), (31, 25)), 30), (((3, 45), (23, 46)), 28), (((3, 117), (10, 118)), 30)), # 28
+    ((((19, 15), (26, 16)), 30), (((1, 23), (37, 24)), 30), (((21, 45), (7, 46)), 28), (((7, 116), (7, 117)), 30)), # 29
+    ((((23, 15), (25, 16)), 30), (((15, 24), (25, 25)), 30), (((19, 47), (10, 48)), 28), (((5, 115), (10, 116)), 30)), # 30
+    ((((23, 15), (28, 16)), 30), (((42, 24), (1, 25)), 30), (((2, 46), (29, 47)), 28), (((13, 115), (3, 116)), 30)), # 31
+    ((((19, 15), (35, 16)), 30), (((10, 24), (35, 25)), 30), (((10, 46), (23, 47)), 28), (((17, 115),), 30)), # 32
+    ((((11, 15), (46, 16)), 30), (((29, 24), (19, 25)), 30), (((14, 46), (21, 47)), 28), (((17, 115), (1, 116)), 30)), # 33
+    ((((59, 16), (1, 17)), 30), (((44, 24), (7, 25)), 30), (((14, 46), (23, 47)), 28), (((13, 115), (6, 116)), 30)), # 34
+    ((((22, 15), (41, 16)), 30), (((39, 24), (14, 25)), 30), (((12, 47), (26, 48)), 28), (((12, 121), (7, 122)), 30)), # 35
+    ((((2, 15), (64, 16)), 30), (((46, 24), (10, 25)), 30), (((6, 47), (34, 48)), 28), (((6, 121), (14, 122)), 30)), # 36
+    ((((24, 15), (46, 16)), 30), (((49, 24), (10, 25)), 30), (((29, 46), (14, 47)), 28), (((17, 122), (4, 123)), 30)), # 37
+    ((((42, 15), (32, 16)), 30), (((48, 24), (14, 25)), 30), (((13, 46), (32, 47)), 28), (((4, 122), (18, 123)), 30)), # 38
+    ((((10, 15), (67, 16)), 30), (((43, 24), (22, 25)), 30), (((40, 47), (7, 48)), 28), (((20, 117), (4, 118)), 30)), # 39
+    ((((20, 15), (61, 16)), 30), (((34, 24), (34, 25)), 30), (((18, 47), (31, 48)), 28), (((19, 118), (6, 119)), 30)), # 40
+]
+
+# ISO/IEC 18004 Annex E, for versions 2 - 40
+ALIGNMENT_PATTERN_LOCS = [
+    (6, 18),                             # 2
+    (6, 22),                             # 3
+    (6, 26),                             # 4
+    (6, 30),                             # 5
+    (6, 34),                             # 6
+    (6, 22, 38),                         # 7
+    (6, 24, 42),                         # 8
+    (6, 26, 46),                         # 9
+    (6, 28, 50),                         # 10
+    (6, 30, 54),                         # 11
+    (6, 32, 58),                         # 12
+    (6, 34, 62),                         # 13
+    (6, 26, 46, 66),                     # 14
+    (6, 26, 48, 70),                     # 15
+    (6, 26, 50, 74),                     # 16
+    (6, 30, 54, 78),                     # 17
+    (6, 30, 56, 82),                     # 18
+    (6, 30, 58, 86),                     # 19
+    (6, 34, 62, 90),                     # 20
+    (6, 28, 50, 72, 94),                 # 21
+    (6, 26, 50, 74, 98),                 # 22
+    (6, 30, 54, 78, 102),                # 23
+    (6, 28, 54, 80, 106),                # 24
+    (6, 32, 58, 84, 110),                # 25
+    (6, 30, 58, 86, 114),                # 26
+    (6, 34, 62, 90, 118),                # 27
+    (6, 26, 50, 74, 98, 122),            # 28
+    (6, 30, 54, 78, 102, 126),           # 29
+    (6, 26, 52, 78, 104, 130),           # 30
+    (6, 30, 56, 82, 108, 134),           # 31
+    (6, 34, 60, 86, 112, 138),           # 32
+    (6, 30, 58, 86, 114, 142),           # 33
+    (6, 34, 62, 90, 118, 146),           # 34
+    (6, 30, 54, 78, 102, 126, 150),      # 35
+    (6, 24, 50, 76, 102, 128, 154),      # 36
+    (6, 28, 54, 80, 106, 132, 158),      # 37
+    (6, 32, 58, 84, 110, 136, 162),      # 38
+    (6, 26, 54, 82, 110, 138, 166),      # 39
+    (6, 30, 58, 86, 114, 142, 170),      # 40
+]
+
+FORMAT_GEN_POLY = 0b10100110111 # x^10 + x^8 + x^5 + x^4 + x^2 + x + 1
+VERSION_GEN_POLY = 0b1111100100101 # x^12 + x^11 + x^10 + x^9 + x^8 + x^5 + x^2 + 1
+FORMAT_XOR_MASK = 0b101010000010010
+
+
+
+# remainder of data_int * x^(degree of gen_poly) divided by gen_poly over GF(2)
+def bch_remainder(data_int, gen_poly_int):
+    gen_poly_len = gen_poly_int.bit_length()
+    remainder = data_int << (gen_poly_len - 1)
+    while remainder.bit_length() >= gen_poly_len:
+        remainder ^= gen_poly_int << (remainder.bit_length() - gen_poly_len)
+    return remainder
+
+# ec_lvl uses the format bit values: M == 0, L == 1, H == 2, Q == 3
+def calc_format_word(ec_lvl, mask_num):
+    format_data = (ec_lvl << 3) | mask_num
+    return ((format_data << 10) | bch_remainder(format_data, FORMAT_GEN_POLY)) ^ FORMAT_XOR_MASK
+
+def calc_version_word(version_num):
+    return (version_num << 12) | bch_remainder(version_num, VERSION_GEN_POLY)
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+def min_distance(words):
+    return min(hamming_distance(a, b) for i, a in enumerate(words) for b in words[i+1:])
+
+
+# number of codewords that fit in a symbol of the given version (ISO/IEC 18004 Table 1)
+def calc_raw_codewords(version_num):
+    raw_modules = ((16 * version_num) + 128) * version_num + 64
+    if version_num >= 2:
+        alignment_count = (version_num // 7) + 2
+        raw_modules -= ((25 * alignment_count) - 10) * alignment_count - 55
+        if version_num >= 7:
+            raw_modules -= 36
+    return raw_modules // 8
+
+def calc_alignment_locs(version_num):
+    modules_per_edge = (version_num * 4) + 17
+    count = (version_num // 7) + 2
+    if version_num == 32:
+        step = 26
+    else:
+        step = ((version_num * 4) + (count * 2) + 1) // ((count * 2) - 2) * 2
+    return tuple([6] + [modules_per_edge - 7 - (i * step) for i in range(count-2, -1, -1)])
+
+
+
+def check_tables(format_words, version_words):
+    assert len(CODEWORD_TABLE) == 40
+    for version_num, ecl_entries in enumerate(CODEWORD_TABLE, 1):
+        for groups, eccw_count in ecl_entries:
+            total_codewords = sum(block_count * (data_cw_count + eccw_count) for block_count, data_cw_count in groups)
+            assert total_codewords == calc_raw_codewords(version_num), f"codeword count of version {version_num}"
+            # the second group always has one more data codeword per block than the first
+            if len(groups) == 2:
+                assert groups[1][1] == groups[0][1] + 1, f"group sizes of version {version_num}"
+
+    assert len(ALIGNMENT_PATTERN_LOCS) == 39
+    for version_num, locations in enumerate(ALIGNMENT_PATTERN_LOCS, 2):
+        assert locations == calc_alignment_locs(version_num), f"alignment pattern locations of version {version_num}"
+
+    flat_format_words = [word for ecl_words in format_words for word in ecl_words]
+    assert len(set(flat_format_words)) == 32 and min_distance(flat_format_words) == 7
+    assert len(set(version_words)) == 34 and min_distance(list(version_words)) == 8
+    # worked examples from ISO/IEC 18004 Annex C and Annex D
+    assert format_words[0][5] == 0b100000011001110
+    assert version_words[0] == 0b000111110010010100
+
+
+
+def format_tuple(values):
+    return "(" + ", ".join(values) + ("," if len(values) == 1 else "") + ")"
+
+def write_tables(output_file, format_words, version_words):
+    output_file.write("# Generated by gen_spec_tables.py, do not edit by hand.\n\n")
+
+    output_file.write("# versions 1 - 40, each holding H, Q, M, L as (((block count, data codewords per block), ...), ec codewords per block)\n")
+    output_file.write("CODEWORD_TABLE = (\n")
+    for version_num, ecl_entries in enumerate(CODEWORD_TABLE, 1):
+        entries = [format_tuple([format_tuple([format_tuple([str(count) for count in group]) for group in groups]), str(eccw_count)])
+                   for groups, eccw_count in ecl_entries]
+        output_file.write(f"    {format_tuple(entries)}, # {version_num}\n")
+    output_file.write(")\n\n")
+
+    output_file.write("# versions 2 - 40\n")
+    output_file.write("ALIGNMENT_PATTERN_LOCS = (\n")
+    for version_num, locations in enumerate(ALIGNMENT_PATTERN_LOCS, 2):
+        output_file.write(f"    {format_tuple([str(location) for location in locations])}, # {version_num}\n")
+    output_file.write(")\n\n")
+
+    output_file.write("# 15 bit format words, FORMAT_WORDS[ec_lvl][mask_num] with M == 0, L == 1, H == 2, Q == 3\n")
+    output_file.write("FORMAT_WORDS = (\n")
+    for ecl_words in format_words:
+        output_file.write(f"    {format_tuple([f'0b{word:015b}' for word in ecl_words])},\n")
+    output_file.write(")\n\n")
+
+    output_file.write("# 18 bit version words for versions 7 - 40\n")
+    output_file.write("VERSION_WORDS = (\n")
+    for version_num, word in enumerate(version_words, 7):
+        output_file.write(f"    0b{word:018b}, # {version_num}\n")
+    output_file.write(")\n")
+
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser("gen_spec_tables.py")
+    parser.add_argument("output_file", nargs="?", help="where to write the tables", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "spec_tables.py"))
+    parser.add_argument("--check", action="store_true", help="compare output_file with the generated tables instead of writing it")
+    parsed_args = parser.parse_args(argv[1:])
+
+    format_words = tuple(tuple(calc_format_word(ec_lvl, mask_num) for mask_num in range(8)) for ec_lvl in range(4))
+    version_words = tuple(calc_version_word(version_num) for version_num in range(7, 41))
+    check_tables(format_words, version_words)
+
+    if parsed_args.check:
+        generated = StringIO()
+        write_tables(generated, format_words, version_words)
+        try:
+            with open(parsed_args.output_file) as checked_in:
+                up_to_date = checked_in.read() == generated.getvalue()
+        except FileNotFoundError:
+            up_to_date = False
+        if not up_to_date:
+            print(f"{parsed_args.output_file} is out of date, run python gen_spec_tables.py to regenerate it")
+            exit(1)
+        print(f"{parsed_args.output_file} is up to date")
+    else:
+        with open(parsed_args.output_file, "w") as output_file:
+            write_tables(output_file, format_words, version_words)
+        print(f"Tables written to {parsed_args.output_file}")
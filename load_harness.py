@@ -0,0 +1,307 @@
+from encoder import generate_qr_code, QrEncoder, BACKENDS
+from batch import run_jobs
+from profiling import get_current_rss_kb, get_peak_memory_kb
+from argparse import ArgumentParser
+from sys import argv, exit
+from time import perf_counter
+from threading import Thread, Event, Barrier
+from concurrent.futures import ThreadPoolExecutor
+import random
+import json
+
+
+# Load-generation harness: drives the encoder with seeded synthetic payloads and reports
+# sustained throughput, latency percentiles and RSS over time as JSON.
+#
+# python load_harness.py --workload mix --count 200 --mode all -o report.json
+# python load_harness.py --workload short_url --compare old_report.json
+# python load_harness.py --stress 16 --count 50 --backend bitboard
+#
+# --stress runs the thread safety check instead of the throughput modes: many threads share the same
+# QrEncoder objects and encode every payload at once, each result has to match a sequential encode of it.
+
+
+
+URL_CHARS = "abcdefghijklmnopqrstuvwxyz0123456789"
+TEXT_CHARS = "".join(chr(i) for i in range(32, 127))
+ECLS = ["L", "M", "Q", "H"]
+
+
+# every generator takes a seeded random.Random and returns (data, err_corr, version_num)
+def gen_short_url(rng):
+    path = "".join(rng.choice(URL_CHARS) for _ in range(rng.randint(6, 20)))
+    return f"https://example.com/{path}", "LMQH", 0
+
+def gen_payload_2k(rng):
+    data = "".join(rng.choice(TEXT_CHARS) for _ in range(rng.randint(1900, 2100)))
+    return data, "L", 0
+
+def gen_high_version(rng):
+    data = "".join(rng.choice(URL_CHARS) for _ in range(rng.randint(10, 60)))
+    return data, rng.choice(ECLS), rng.randint(30, 40)
+
+def gen_every_ecl(rng):
+    data, _, _ = gen_short_url(rng)
+    return data, rng.choice(ECLS), 0
+
+# realistic mix, mostly short URLs with the occasional large or forced high version code
+def gen_mix(rng):
+    roll = rng.random()
+    if roll < 0.7:
+        return gen_short_url(rng)
+    elif roll < 0.85:
+        return gen_every_ecl(rng)
+    elif roll < 0.95:
+        return gen_payload_2k(rng)
+    return gen_high_version(rng)
+
+
+WORKLOADS = {"short_url": gen_short_url,
+             "payload_2k": gen_payload_2k,
+             "high_version": gen_high_version,
+             "every_ecl": gen_every_ecl,
+             "mix": gen_mix}
+MODES = ["inprocess", "batch", "pool", "threads"]
+
+
+def make_jobs(workload, count, seed):
+    rng = random.Random(seed)
+    generator = WORKLOADS[workload]
+    jobs = []
+    for index in range(1, count+1):
+        data, err_corr, version_num = generator(rng)
+        jobs.append((index, data, err_corr, version_num, -1, ""))
+    return jobs
+
+
+
+# samples the RSS of this process in a background thread
+class RssSampler:
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.samples = []
+        self.stop_event = Event()
+        self.thread = Thread(target=self.run, daemon=True)
+
+    def run(self):
+        start_time = perf_counter()
+        while not self.stop_event.is_set():
+            self.samples.append([round(perf_counter() - start_time, 3), get_current_rss_kb()])
+            self.stop_event.wait(self.interval)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop_event.set()
+        self.thread.join()
+        return False
+
+
+
+# inprocess only encodes, batch and pool also serialize every code to PNG
+# each runner returns a list of per-code latencies in seconds and the number of failed codes
+def run_inprocess(jobs, workers, backend):
+    latencies = []
+    failures = 0
+    for index, data, err_corr, version_num, mask, header_bits in jobs:
+        start_time = perf_counter()
+        try:
+            generate_qr_code(data, err_corr, version_num, mask, backend=backend)
+        except ValueError:
+            failures += 1
+        latencies.append(perf_counter() - start_time)
+    return latencies, failures
+
+def run_batch_mode(jobs, workers, backend):
+    return collect_latencies(run_jobs(jobs, 1, backend=backend))
+
+def run_pool(jobs, workers, backend):
+    return collect_latencies(run_jobs(jobs, workers, backend=backend))
+
+# the latency of a batch code is the time its worker spent encoding and serializing it
+def collect_latencies(results):
+    latencies = []
+    failures = 0
+    for result in results:
+        latencies.append(result.encode_time)
+        if result.error is not None:
+            failures += 1
+    return latencies, failures
+
+# threads only encodes like inprocess, but from workers threads sharing one QrEncoder per setting
+def run_threads(jobs, workers, backend):
+    encoders = get_encoders(jobs, backend)
+
+    def encode(job):
+        start_time = perf_counter()
+        try:
+            encode_with(encoders, job)
+        except ValueError:
+            return perf_counter() - start_time, 1
+        return perf_counter() - start_time, 0
+
+    with ThreadPoolExecutor(workers) as executor:
+        outcomes = list(executor.map(encode, jobs))
+    return [latency for latency, _ in outcomes], sum(failed for _, failed in outcomes)
+
+RUNNERS = {"inprocess": run_inprocess, "batch": run_batch_mode, "pool": run_pool, "threads": run_threads}
+
+
+
+# one encoder for every combination of settings in jobs
+def get_encoders(jobs, backend):
+    encoders = {}
+    for index, data, err_corr, version_num, mask, header_bits in jobs:
+        key = (err_corr, version_num, mask, header_bits)
+        if key not in encoders:
+            encoders[key] = QrEncoder(err_corr, version_num, mask, backend, header_bits=header_bits)
+    return encoders
+
+def encode_with(encoders, job):
+    index, data, err_corr, version_num, mask, header_bits = job
+    return encoders[(err_corr, version_num, mask, header_bits)].encode(data)
+
+# everything that has to be identical between two encodes of the same job, or the error message if it failed
+def get_fingerprint(encoders, job):
+    try:
+        qr_symbol = encode_with(encoders, job)
+    except ValueError as e:
+        return str(e)
+    return (qr_symbol.version_num, qr_symbol.ec_lvl, qr_symbol.mask_num, qr_symbol.get_packed_rows(), qr_symbol.image.tobytes())
+
+
+# encode every job from thread_count threads at once, each thread in its own order, and compare
+# every result with the one encoded beforehand in this thread
+def run_stress(jobs, thread_count, backend, seed):
+    encoders = get_encoders(jobs, backend)
+    references = {job[0]: get_fingerprint(encoders, job) for job in jobs}
+    barrier = Barrier(thread_count)
+    mismatches = []
+    errors = []
+
+    def stress_thread(thread_num):
+        order = list(jobs)
+        random.Random(seed + thread_num).shuffle(order)
+        # start every thread at the same moment so the encodes really overlap
+        barrier.wait()
+        for job in order:
+            try:
+                if get_fingerprint(encoders, job) != references[job[0]]:
+                    mismatches.append([thread_num, job[0]])
+            except Exception as e:
+                errors.append([thread_num, job[0], repr(e)])
+
+    threads = [Thread(target=stress_thread, args=(thread_num,)) for thread_num in range(thread_count)]
+    start_time = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = perf_counter() - start_time
+
+    return {"backend": backend,
+            "threads": thread_count,
+            "encodes": thread_count * len(jobs),
+            "elapsed": elapsed,
+            "throughput_per_s": thread_count * len(jobs) / elapsed if elapsed > 0 else None,
+            "mismatches": len(mismatches),
+            "mismatched_jobs": sorted({index for _, index in mismatches}),
+            "errors": errors}
+
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values)-1, int(round(percent / 100 * (len(sorted_values)-1))))
+    return sorted_values[index]
+
+
+# latency percentiles in milliseconds, None if there are no latencies (e.g. a run without jobs)
+def get_latency_report(sorted_latencies):
+    if not sorted_latencies:
+        return None
+    return {"p50": percentile(sorted_latencies, 50) * 1000,
+            "p90": percentile(sorted_latencies, 90) * 1000,
+            "p99": percentile(sorted_latencies, 99) * 1000,
+            "max": sorted_latencies[-1] * 1000,
+            "mean": sum(sorted_latencies) / len(sorted_latencies) * 1000}
+
+
+def run_mode(mode, jobs, workers, backend, rss_interval):
+    with RssSampler(rss_interval) as sampler:
+        start_time = perf_counter()
+        latencies, failures = RUNNERS[mode](jobs, workers, backend)
+        elapsed = perf_counter() - start_time
+
+    latencies.sort()
+    return {"mode": mode,
+            "backend": backend,
+            "workers": workers if mode in ("pool", "threads") else 1,
+            "count": len(jobs),
+            "failures": failures,
+            "elapsed": elapsed,
+            "throughput_per_s": len(jobs) / elapsed if elapsed > 0 else None,
+            "latency_ms": get_latency_report(latencies),
+            "rss_kb": sampler.samples,
+            "peak_rss_kb": get_peak_memory_kb()}
+
+
+# print how each mode changed compared to an older report
+def print_comparison(report, old_report):
+    old_runs = {run["mode"]: run for run in old_report["runs"]}
+    for run in report["runs"]:
+        old_run = old_runs.get(run["mode"])
+        # runs without jobs have nothing to compare
+        if old_run is None or not run["throughput_per_s"] or not old_run["throughput_per_s"] or run["latency_ms"] is None or old_run["latency_ms"] is None:
+            continue
+        throughput_ratio = run["throughput_per_s"] / old_run["throughput_per_s"]
+        p99_ratio = run["latency_ms"]["p99"] / old_run["latency_ms"]["p99"]
+        print(f"{run['mode']}: throughput x{throughput_ratio:.2f}, p99 latency x{p99_ratio:.2f}")
+
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser("load_harness.py")
+    parser.add_argument("-w", "--workload", choices=sorted(WORKLOADS), help="synthetic payload mix", default="mix")
+    parser.add_argument("-n", "--count", type=int, help="number of codes to generate per mode", default=100)
+    parser.add_argument("-s", "--seed", type=int, help="seed for the payload generators", default=0)
+    parser.add_argument("--mode", choices=MODES + ["all"], help="how the encoder is driven", default="all")
+    parser.add_argument("-j", "--workers", type=int, help="number of processes in pool mode or threads in threads mode", default=4)
+    parser.add_argument("--backend", choices=BACKENDS, help="matrix backend used by the encoder", default="pil")
+    parser.add_argument("--rss-interval", type=float, help="seconds between RSS samples", default=0.1)
+    parser.add_argument("-o", "--output", metavar="file", help="write the JSON report to file instead of stdout", default=None)
+    parser.add_argument("--compare", metavar="file", help="compare against a report from an earlier release", default=None)
+    parser.add_argument("--stress", metavar="threads", type=int, help="check that encoding from this many threads at once gives the same codes as encoding one at a time", default=None)
+    parsed_args = parser.parse_args(argv[1:])
+
+    if parsed_args.count < 1:
+        parser.error("--count must be at least 1")
+
+    jobs = make_jobs(parsed_args.workload, parsed_args.count, parsed_args.seed)
+    modes = MODES if parsed_args.mode == "all" else [parsed_args.mode]
+
+    report = {"workload": parsed_args.workload,
+              "seed": parsed_args.seed}
+    if parsed_args.stress is not None:
+        if parsed_args.stress < 1:
+            parser.error("--stress needs at least one thread")
+        report["stress"] = run_stress(jobs, parsed_args.stress, parsed_args.backend, parsed_args.seed)
+    else:
+        report["runs"] = [run_mode(mode, jobs, parsed_args.workers, parsed_args.backend, parsed_args.rss_interval) for mode in modes]
+
+    if parsed_args.output is not None:
+        with open(parsed_args.output, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if parsed_args.compare is not None and "runs" in report:
+        with open(parsed_args.compare) as old_report_file:
+            print_comparison(report, json.load(old_report_file))
+
+    if "stress" in report and (report["stress"]["mismatches"] or report["stress"]["errors"]):
+        exit(1)
@@ -1,90 +1,79 @@
-import numpy
+from spec import get_format_word, MASK_CONDITIONS
 
-class QrMask:
-    
-    def __init__(self, modules_per_edge, err_corr_lvl):
-        self.modules_per_edge = modules_per_edge
-        self.err_corr_lvl = err_corr_lvl
 
+MASK_STRATEGIES = ["exhaustive", "sampled", "fixed"]
+DEFAULT_FIXED_MASK = 0
+DEFAULT_PENALTY_THRESHOLD = 0.75 # penalty points per module, good masks usually score around 0.5 - 0.6
+DEFAULT_SAMPLE_STEP = 4
 
-    def mask_num_0(self, module_arr, column, row):
-        module_val = module_arr.get_module(column, row)
-        if (row + column) % 2 == 0:
-            return not module_val
-        else:
-            return module_val
 
-    def mask_num_1(self, module_arr, column, row):
-        module_val = module_arr.get_module(column, row)
-        if row % 2 == 0:
-            return not module_val
-        else:
-            return module_val
 
-    def mask_num_2(self, module_arr, column, row):
-        module_val = module_arr.get_module(column, row)
-        if column % 3 == 0:
-            return not module_val
-        else:
-            return module_val
+# how apply_best_mask picks a mask:
+# exhaustive - score all 8 masks with every penalty rule and keep the best one
+# sampled    - score all 8 masks, but only on every sample_step-th row and column
+# fixed      - use fixed_mask unless its penalty is above penalty_threshold points per module,
+#              in which case fall back to the exhaustive search
+# if report is set, every mask is also scored exhaustively so the chosen mask can be compared to the optimum
+class MaskStrategy:
 
-    def mask_num_3(self, module_arr, column, row):
-        module_val = module_arr.get_module(column, row)
-        if (row + column) % 3 == 0:
-            return not module_val
-        else:
-            return module_val
+    def __init__(self, name="exhaustive", fixed_mask=DEFAULT_FIXED_MASK, penalty_threshold=DEFAULT_PENALTY_THRESHOLD, sample_step=DEFAULT_SAMPLE_STEP, report=False):
+        if name not in MASK_STRATEGIES:
+            raise ValueError(f"Unknown mask strategy {name!r}, expected one of {', '.join(MASK_STRATEGIES)}")
+        self.name = name
+        self.fixed_mask = fixed_mask
+        self.penalty_threshold = penalty_threshold
+        self.sample_step = sample_step
+        self.report = report
 
-    def mask_num_4(self, module_arr, column, row):
-        module_val = module_arr.get_module(column, row)
-        if (numpy.floor(row/2) + numpy.floor(column/3)) % 2 == 0:
-            return not module_val
-        else:
-            return module_val
+EXHAUSTIVE = MaskStrategy()
 
-    def mask_num_5(self, module_arr, column, row):
-        module_val = module_arr.get_module(column, row)
-        if ((row * column) % 2) + ((row * column) % 3) == 0:
-            return not module_val
-        else:
-            return module_val
 
-    def mask_num_6(self, module_arr, column, row):
-        module_val = module_arr.get_module(column, row)
-        if (((row * column) % 2) + ((row * column) % 3)) % 2 == 0:
-            return not module_val
-        else:
-            return module_val
 
-    def mask_num_7(self, module_arr, column, row):
+class QrMask:
+    
+    def __init__(self, modules_per_edge, err_corr_lvl, strategy=EXHAUSTIVE):
+        self.modules_per_edge = modules_per_edge
+        self.err_corr_lvl = err_corr_lvl
+        self.strategy = strategy
+        # score of every mask tried by apply_best_mask (sampled scores for the sampled strategy), and the mask it picked
+        self.mask_scores = {}
+        self.best_mask = -1
+        # filled in by apply_best_mask when strategy.report is set
+        self.quality_report = None
+        # set when the fixed strategy rejected its mask and searched all of them
+        self.fell_back = False
+
+
+    # value of the module at column, row once mask_num is applied
+    def get_masked_module(self, module_arr, column, row, mask_num):
         module_val = module_arr.get_module(column, row)
-        if (((row + column) % 2) + ((row * column) % 3)) % 2 == 0:
+        if MASK_CONDITIONS[mask_num](row, column):
             return not module_val
         else:
             return module_val
 
 
 
-    def apply_mask(self, module_arr, mask_func):
+    def apply_mask(self, module_arr, mask_num):
         # Data bits under the top right finder pattern
         for x in range(self.modules_per_edge-8, self.modules_per_edge, 1):
             for y in range(9, self.modules_per_edge, 1):
-                module_arr.update_module(x, y, mask_func(module_arr, x, y))
+                module_arr.update_module(x, y, self.get_masked_module(module_arr, x, y, mask_num))
                 
         # Data bits between the left and right finder paterns
         for x in range(9, self.modules_per_edge-8, 1):
             for y in range(0, self.modules_per_edge, 1):
                 if y == 6:
                     continue
-                module_arr.update_module(x, y, mask_func(module_arr, x, y))
+                module_arr.update_module(x, y, self.get_masked_module(module_arr, x, y, mask_num))
                 
         # Data bits between the top left and bottom left finder paterns
         for y in range(9, self.modules_per_edge-8, 1):
-            module_arr.update_module(8, y, mask_func(module_arr, 8, y))
-            module_arr.update_module(7, y, mask_func(module_arr, 7, y))
+            module_arr.update_module(8, y, self.get_masked_module(module_arr, 8, y, mask_num))
+            module_arr.update_module(7, y, self.get_masked_module(module_arr, 7, y, mask_num))
         for x in range(0, 6, 1):
             for y in range(9, self.modules_per_edge-8, 1):
-                module_arr.update_module(x, y, mask_func(module_arr, x, y))
+                module_arr.update_module(x, y, self.get_masked_module(module_arr, x, y, mask_num))
 
 
 
@@ -192,37 +181,8 @@ class QrMask:
 
 
     def add_format_bits(self, module_arr, mask_ver):
-        ec_lvl_bits = f'{self.err_corr_lvl:02b}'
-        mask_ver_bits = f'{mask_ver:03b}'
-        format_bits = ec_lvl_bits + mask_ver_bits
-        parity_bits = format_bits
-        gen_poly_int = 0b10100110111
-        mask = 0b100000000000000
-        ten_mask_max = 0b111110000000000
-        
-        # make the string 15 bits long
-        while len(parity_bits) < 15:
-            parity_bits += "0"
-        
-        parity_int = int(parity_bits, 2)
-        
-        # while the bitstring of parity_int is longer than 10 bits, XOR it with generator polynomial
-        while parity_int & ten_mask_max != 0:
-            gen_poly_int_temp = gen_poly_int
-            # get the position of the most significant bit in parity_int
-            while mask & parity_int == 0:
-                mask = mask >> 1
-            # resize gen_poly_int_temp to match the size of parity_int
-            while mask & gen_poly_int_temp == 0:
-                gen_poly_int_temp = gen_poly_int_temp << 1
-            # XOR the parity int with the generator polynomial
-            parity_int = parity_int ^ gen_poly_int_temp
-        
-        format_bits += f'{parity_int:010b}'
-        
-        # QR code specification says to XOR the format bits with 101010000010010
-        format_bits = f'{(0b101010000010010 ^ int(format_bits, 2)):015b}'
-        assert len(format_bits) == 15
+        # the 15 bit BCH coded format words are precomputed in spec_tables.py
+        format_bits = f'{get_format_word(self.err_corr_lvl, mask_ver):015b}'
         
         # add the format bits to the QR code
         format_list = [int(i) for i in list(format_bits)]
@@ -249,123 +209,116 @@ class QrMask:
 
 
 
-    def apply_best_mask(self, qr_image, module_arr):
-        # make copies of the original unmasked QR code
-        qr_image_mask_0 = qr_image.copy()
-        qr_image_mask_1 = qr_image.copy()
-        qr_image_mask_2 = qr_image.copy()
-        qr_image_mask_3 = qr_image.copy()
-        qr_image_mask_4 = qr_image.copy()
-        qr_image_mask_5 = qr_image.copy()
-        qr_image_mask_6 = qr_image.copy()
-        qr_image_mask_7 = qr_image.copy()
-
-        # mask 0
-        module_arr.set_pixel_arr(qr_image_mask_0.load())
-        self.apply_mask(module_arr, self.mask_num_0)
-        self.add_format_bits(module_arr, 0)
-        min_mask_score = self.calc_mask_score(module_arr)
-        qr_image = qr_image_mask_0
-
-        # mask 1
-        module_arr.set_pixel_arr(qr_image_mask_1.load())
-        self.apply_mask(module_arr, self.mask_num_1)
-        self.add_format_bits(module_arr, 1)
-        mask_score = self.calc_mask_score(module_arr)
-        if mask_score < min_mask_score:
-            min_mask_score = mask_score
-            qr_image = qr_image_mask_1
-
-        # mask 2
-        module_arr.set_pixel_arr(qr_image_mask_2.load())
-        self.apply_mask(module_arr, self.mask_num_2)
-        self.add_format_bits(module_arr, 2)
-        mask_score = self.calc_mask_score(module_arr)
-        if mask_score < min_mask_score:
-            min_mask_score = mask_score
-            qr_image = qr_image_mask_2
-
-        # mask 3
-        module_arr.set_pixel_arr(qr_image_mask_3.load())
-        self.apply_mask(module_arr, self.mask_num_3)
-        self.add_format_bits(module_arr, 3)
-        mask_score = self.calc_mask_score(module_arr)
-        if mask_score < min_mask_score:
-            min_mask_score = mask_score
-            qr_image = qr_image_mask_3
-
-        # mask 4
-        module_arr.set_pixel_arr(qr_image_mask_4.load())
-        self.apply_mask(module_arr, self.mask_num_4)
-        self.add_format_bits(module_arr, 4)
-        mask_score = self.calc_mask_score(module_arr)
-        if mask_score < min_mask_score:
-            min_mask_score = mask_score
-            qr_image = qr_image_mask_4
-
-        # mask 5
-        module_arr.set_pixel_arr(qr_image_mask_5.load())
-        self.apply_mask(module_arr, self.mask_num_5)
-        self.add_format_bits(module_arr, 5)
-        mask_score = self.calc_mask_score(module_arr)
-        if mask_score < min_mask_score:
-            min_mask_score = mask_score
-            qr_image = qr_image_mask_5
-
-        # mask 6
-        module_arr.set_pixel_arr(qr_image_mask_6.load())
-        self.apply_mask(module_arr, self.mask_num_6)
-        self.add_format_bits(module_arr, 6)
-        mask_score = self.calc_mask_score(module_arr)
-        if mask_score < min_mask_score:
-            min_mask_score = mask_score
-            qr_image = qr_image_mask_6
-
-        # mask 7
-        module_arr.set_pixel_arr(qr_image_mask_7.load())
-        self.apply_mask(module_arr, self.mask_num_7)
-        self.add_format_bits(module_arr, 7)
-        mask_score = self.calc_mask_score(module_arr)
-        if mask_score < min_mask_score:
-            min_mask_score = mask_score
-            qr_image = qr_image_mask_7
-        
-        return qr_image
+    # penalty score computed only on every sample_step-th row and column
+    def calc_sampled_mask_score(self, module_arr):
+        lines = range(0, self.modules_per_edge, self.strategy.sample_step)
+        rows = [[module_arr.get_module(x, y) for x in range(self.modules_per_edge)] for y in lines]
+        columns = [[module_arr.get_module(x, y) for y in range(self.modules_per_edge)] for x in lines]
+        penalty = 0
 
+        # Evaluation Condition #1: 5+ same-colored modules in the sampled rows and columns
+        for line in rows + columns:
+            consecutive_count = 1
+            for i in range(1, len(line)):
+                if line[i] == line[i-1]:
+                    consecutive_count += 1
+                    penalty += 3 if consecutive_count == 5 else 1 if consecutive_count > 5 else 0
+                else:
+                    consecutive_count = 1
 
+        # Evaluation Condition #2: 2x2 squares whose top row is a sampled row
+        for y in lines:
+            if y == self.modules_per_edge-1:
+                continue
+            for x in range(0, self.modules_per_edge-1):
+                if module_arr.get_module(x, y) == module_arr.get_module(x+1, y) == module_arr.get_module(x, y+1) == module_arr.get_module(x+1, y+1):
+                    penalty += 3
 
-    def apply_specific_mask(self, module_arr, mask_num):
+        # Evaluation Condition #3: finder-like patterns in the sampled rows and columns
+        patterns = [[0, 0, 0, 0, 1, 0, 1, 1, 1, 0, 1], [1, 0, 1, 1, 1, 0, 1, 0, 0, 0, 0]]
+        for line_num, line in zip(list(lines) * 2, rows + columns):
+            if line_num >= self.modules_per_edge-9:
+                continue
+            padded_line = line + [0]
+            for start in range(0, self.modules_per_edge-9):
+                if padded_line[start:start+11] in patterns:
+                    penalty += 40
 
-        if mask_num == 0:
-            self.apply_mask(module_arr, self.mask_num_0)
-            self.add_format_bits(module_arr, 0)
+        # Evaluation Condition #4: ratio of black to white modules in the sampled rows
+        dark_percent = (sum(sum(row) for row in rows) / (len(rows) * self.modules_per_edge)) * 100
+        penalty += max(0, int(abs(dark_percent - 50)) - 1) * 10
+        return penalty
 
-        elif mask_num == 1:
-            self.apply_mask(module_arr, self.mask_num_1)
-            self.add_format_bits(module_arr, 1)
 
-        elif mask_num == 2:
-            self.apply_mask(module_arr, self.mask_num_2)
-            self.add_format_bits(module_arr, 2)
 
-        elif mask_num == 3:
-            self.apply_mask(module_arr, self.mask_num_3)
-            self.add_format_bits(module_arr, 3)
+    # apply mask_num to a fresh copy of the unmasked symbol and point module_arr at it
+    # returns the masked copy so it can be selected again with use_masked_state
+    def get_masked_state(self, module_arr, unmasked_image, mask_num):
+        masked_image = unmasked_image.copy()
+        module_arr.set_pixel_arr(masked_image.load())
+        self.apply_specific_mask(module_arr, mask_num)
+        return masked_image
+
+    def use_masked_state(self, module_arr, masked_image):
+        module_arr.set_pixel_arr(masked_image.load())
+
+    def select_mask(self, module_arr, unmasked_state):
+        fixed_state = None
+        if self.strategy.name == "fixed":
+            fixed_mask = self.strategy.fixed_mask
+            fixed_state = self.get_masked_state(module_arr, unmasked_state, fixed_mask)
+            self.mask_scores[fixed_mask] = self.calc_mask_score(module_arr)
+            if self.mask_scores[fixed_mask] <= self.strategy.penalty_threshold * self.modules_per_edge * self.modules_per_edge:
+                self.best_mask = fixed_mask
+                return self.finish_selection(module_arr, unmasked_state, fixed_state)
+            self.fell_back = True
+
+        sampled = self.strategy.name == "sampled"
+        best_state = None
+        min_mask_score = 0
+        for mask_num in range(8):
+            # the fixed mask that was just rejected has already been scored
+            if fixed_state is not None and mask_num == self.strategy.fixed_mask:
+                masked_state = fixed_state
+            else:
+                masked_state = self.get_masked_state(module_arr, unmasked_state, mask_num)
+                self.mask_scores[mask_num] = self.calc_sampled_mask_score(module_arr) if sampled else self.calc_mask_score(module_arr)
+            if best_state is None or self.mask_scores[mask_num] < min_mask_score:
+                min_mask_score = self.mask_scores[mask_num]
+                self.best_mask = mask_num
+                best_state = masked_state
+        return self.finish_selection(module_arr, unmasked_state, best_state)
+
+    def finish_selection(self, module_arr, unmasked_state, best_state):
+        if self.strategy.report:
+            if self.strategy.name == "exhaustive":
+                full_scores = dict(self.mask_scores)
+            else:
+                full_scores = {}
+                for mask_num in range(8):
+                    self.get_masked_state(module_arr, unmasked_state, mask_num)
+                    full_scores[mask_num] = self.calc_mask_score(module_arr)
+            optimal_mask = min(range(8), key=lambda mask_num: full_scores[mask_num])
+            self.quality_report = {"strategy": self.strategy.name,
+                                   "mask": self.best_mask,
+                                   "penalty": full_scores[self.best_mask],
+                                   "optimal_mask": optimal_mask,
+                                   "optimal_penalty": full_scores[optimal_mask],
+                                   "penalty_over_optimal": full_scores[self.best_mask] - full_scores[optimal_mask],
+                                   "penalties": full_scores}
+            if self.strategy.name == "fixed":
+                self.quality_report["fell_back"] = self.fell_back
+        self.use_masked_state(module_arr, best_state)
+        return best_state
 
-        elif mask_num == 4:
-            self.apply_mask(module_arr, self.mask_num_4)
-            self.add_format_bits(module_arr, 4)
+    def apply_best_mask(self, qr_image, module_arr):
+        # qr_image is left unmasked, a masked copy of it is returned
+        return self.select_mask(module_arr, qr_image)
 
-        elif mask_num == 5:
-            self.apply_mask(module_arr, self.mask_num_5)
-            self.add_format_bits(module_arr, 5)
 
-        elif mask_num == 6:
-            self.apply_mask(module_arr, self.mask_num_6)
-            self.add_format_bits(module_arr, 6)
 
-        elif mask_num == 7:
-            self.apply_mask(module_arr, self.mask_num_7)
-            self.add_format_bits(module_arr, 7)
+    def apply_specific_mask(self, module_arr, mask_num):
+        self.apply_mask(module_arr, mask_num)
+        self.add_format_bits(module_arr, mask_num)
         
         return module_arr
\ No newline at end of file
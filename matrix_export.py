@@ -0,0 +1,73 @@
+import ast
+import struct
+from container import get_row_bytes, unpack_matrix, ContainerRecord
+
+
+# Raw module matrix export for consumers that only need the grid of modules (engravers, other renderers),
+# so they don't have to decode a PNG and guess the module size.
+#
+# .qrm: b"QRMX", version_num, ec_lvl, mask_num, modules_per_edge (1 byte each), then the rows packed
+#       most significant bit first, each padded to a whole byte (the same rows container.py stores)
+# .npy: a NumPy array file, written without needing NumPy, holding one uint8 per module (1 = dark)
+#       with shape (modules_per_edge, modules_per_edge), or with packed=True the packed rows with shape
+#       (modules_per_edge, row_bytes), which numpy.unpackbits(array, axis=1)[:, :modules_per_edge] unpacks
+
+MATRIX_MAGIC = b"QRMX"
+MATRIX_HEADER = struct.Struct("<4sBBBB")
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+MATRIX_FORMATS = ["qrm", "npy"]
+
+
+
+def to_qrm_bytes(qr_symbol):
+    header = MATRIX_HEADER.pack(MATRIX_MAGIC, qr_symbol.version_num, qr_symbol.ec_lvl, qr_symbol.mask_num, qr_symbol.modules_per_edge)
+    return header + qr_symbol.get_packed_rows()
+
+# returns a ContainerRecord (with index -1) holding the header fields and the packed rows
+def read_qrm_bytes(data):
+    magic, version_num, ec_lvl, mask_num, modules_per_edge = MATRIX_HEADER.unpack_from(data, 0)
+    if magic != MATRIX_MAGIC:
+        raise ValueError("Not a packed QR code module matrix")
+    packed = data[MATRIX_HEADER.size:MATRIX_HEADER.size + modules_per_edge * get_row_bytes(modules_per_edge)]
+    return ContainerRecord(-1, version_num, ec_lvl, mask_num, packed)
+
+
+def get_npy_header(shape):
+    header = f"{{'descr': '|u1', 'fortran_order': False, 'shape': {shape!r}, }}"
+    # the header is padded with spaces and a newline so the data starts at a multiple of 64 bytes
+    header_length = len(header) + 1
+    header += " " * (-(len(NPY_MAGIC) + 2 + header_length) % 64) + "\n"
+    return NPY_MAGIC + struct.pack("<H", len(header)) + header.encode("latin-1")
+
+def to_npy_bytes(qr_symbol, packed=False):
+    modules_per_edge = qr_symbol.modules_per_edge
+    if packed:
+        return get_npy_header((modules_per_edge, get_row_bytes(modules_per_edge))) + qr_symbol.get_packed_rows()
+    return get_npy_header((modules_per_edge, modules_per_edge)) + qr_symbol.get_module_bytes()
+
+# matrix[y][x] from a .npy file written by to_npy_bytes, packed or not
+def read_npy_bytes(data):
+    if data[:len(NPY_MAGIC)] != NPY_MAGIC:
+        raise ValueError("Not a .npy file written by this exporter")
+    header_length = struct.unpack_from("<H", data, len(NPY_MAGIC))[0]
+    data_start = len(NPY_MAGIC) + 2 + header_length
+    header = ast.literal_eval(data[len(NPY_MAGIC) + 2:data_start].decode("latin-1"))
+    height, width = header["shape"]
+    if width == height:
+        return [list(data[data_start + y*width:data_start + (y+1)*width]) for y in range(height)]
+    return unpack_matrix(data[data_start:], height)
+
+
+# write qr_symbol to a path or a binary file object
+def save_matrix(qr_symbol, destination, matrix_format="qrm", packed=False):
+    if matrix_format == "qrm":
+        data = to_qrm_bytes(qr_symbol)
+    elif matrix_format == "npy":
+        data = to_npy_bytes(qr_symbol, packed)
+    else:
+        raise ValueError(f"Unknown matrix format {matrix_format!r}, expected one of {', '.join(MATRIX_FORMATS)}")
+    if hasattr(destination, "write"):
+        destination.write(data)
+    else:
+        with open(destination, "wb") as matrix_file:
+            matrix_file.write(data)
@@ -0,0 +1,280 @@
+from encoder import QrSymbol, GF, calculate_error_correction, sanitize_string, get_counting_class, TRANS_EC_LVL
+from capacity import MICRO_VERSIONS, MICRO_QUIET_ZONE, ALPHANUMERIC_CHARS, MICRO_SYMBOLS, MICRO_MODES, get_micro_modules_per_edge, find_micro_version
+from profiling import NULL_TIMER
+from resolutions import render_module_bytes
+from spec import FINDER_PATTERN, MICRO_MASK_CONDITIONS
+
+
+# Micro QR symbols (ISO/IEC 18004 M1 - M4) for short payloads: 11x11 to 17x17 modules with a single finder
+# pattern, one Reed-Solomon block, 4 masks and a quiet zone of 2 modules.
+# generate_qr_code(data, micro=True) uses one of these whenever the data fits, see select_micro_version.
+#
+# M1 and M2 can't hold byte mode data, so the data is encoded as a single numeric, alphanumeric or byte segment,
+# whichever is the smallest that can hold it. M1 only detects errors, it is reported as error correction level L.
+
+FORMAT_GEN_POLY = 0b10100110111
+MICRO_FORMAT_XOR_MASK = 0b100010001000101
+
+
+
+def get_micro_format_word(symbol_number, mask_num):
+    format_data = (symbol_number << 2) | mask_num
+    remainder = format_data << 10
+    while remainder.bit_length() >= FORMAT_GEN_POLY.bit_length():
+        remainder ^= FORMAT_GEN_POLY << (remainder.bit_length() - FORMAT_GEN_POLY.bit_length())
+    return ((format_data << 10) | remainder) ^ MICRO_FORMAT_XOR_MASK
+
+# format word -> (symbol number, mask_num), used to read symbols back
+MICRO_FORMAT_WORDS = {get_micro_format_word(symbol_number, mask_num): (symbol_number, mask_num) for symbol_number in range(8) for mask_num in range(4)}
+
+
+# mode indicator, character count and data of cleaned_data in a micro_version symbol,
+# or None if that version can't hold the mode or the number of characters
+def get_micro_segment_bits(cleaned_data, mode, micro_version):
+    mode_indicator, count_lengths = MICRO_MODES[mode]
+    count_length = count_lengths[micro_version-1]
+    if count_length is None or len(cleaned_data) >= 1 << count_length:
+        return None
+
+    bits = f'{mode_indicator:0{micro_version-1}b}' if micro_version > 1 else ""
+    bits += f'{len(cleaned_data):0{count_length}b}'
+    if mode == "numeric":
+        for i in range(0, len(cleaned_data), 3):
+            group = cleaned_data[i:i+3]
+            bits += f'{int(group):0{len(group)*3+1}b}'
+    elif mode == "alphanumeric":
+        for i in range(0, len(cleaned_data), 2):
+            pair = cleaned_data[i:i+2]
+            if len(pair) == 2:
+                bits += f'{ALPHANUMERIC_CHARS.index(pair[0])*45 + ALPHANUMERIC_CHARS.index(pair[1]):011b}'
+            else:
+                bits += f'{ALPHANUMERIC_CHARS.index(pair):06b}'
+    else:
+        for char in cleaned_data:
+            bits += f'{ord(char):08b}'
+    return bits
+
+
+# the smallest Micro QR symbol that holds cleaned_data, with the highest error correction level in err_corr
+# at that size (see capacity.find_micro_version), returns (micro_version, ec_lvl, data_bits) or None if none fits
+def select_micro_version(cleaned_data, err_corr="LMQH"):
+    selection = find_micro_version(cleaned_data, err_corr)
+    if selection is None:
+        return None
+    micro_version, ec_lvl, mode = selection
+    return micro_version, ec_lvl, get_micro_segment_bits(cleaned_data, mode, micro_version)
+
+
+# terminator and padding up to the data capacity of the symbol
+# in M1 and M3 the last data codeword only has 4 bits, which are never filled with a pad codeword
+def pad_micro_bits(data_bits, micro_version, data_bits_count):
+    data_bits += "0" * min((micro_version * 2) + 1, data_bits_count - len(data_bits))
+    full_codeword_bits = data_bits_count - (data_bits_count % 8)
+    if len(data_bits) < full_codeword_bits:
+        data_bits += "0" * (-len(data_bits) % 8)
+        pad_codewords = ["11101100", "00010001"]
+        while len(data_bits) < full_codeword_bits:
+            data_bits += pad_codewords[0]
+            pad_codewords.reverse()
+    return data_bits + "0" * (data_bits_count - len(data_bits))
+
+# data bits followed by the error correction codewords, ready to be placed
+def build_micro_content_bits(data_bits, eccw_count):
+    # a 4 bit codeword counts as the high half of a byte for the Reed-Solomon code
+    data_ints = [int(data_bits[i:i+8].ljust(8, "0"), 2) for i in range(0, len(data_bits), 8)]
+    ecc_ints = calculate_error_correction(data_ints, eccw_count, GF)
+    return data_bits + "".join(f'{ecc_int:08b}' for ecc_int in ecc_ints)
+
+
+
+# the module matrix of a Micro QR symbol, modules[y][x] with 1 for a dark module
+# function patterns and the format information area are protected from data and masks
+class MicroModuleArray:
+
+    # only counted by the classes of encoder.get_counting_class
+    write_count = 0
+
+    def __init__(self, micro_version):
+        self.version_num = micro_version
+        self.modules_per_edge = get_micro_modules_per_edge(micro_version)
+        self.modules = [[0] * self.modules_per_edge for _ in range(self.modules_per_edge)]
+        self.protected = [[False] * self.modules_per_edge for _ in range(self.modules_per_edge)]
+        self.add_finder_pattern()
+        self.add_timing_patterns()
+        self.protect_format_bits()
+
+    def copy(self):
+        module_arr = type(self).__new__(type(self))
+        module_arr.version_num = self.version_num
+        module_arr.modules_per_edge = self.modules_per_edge
+        module_arr.modules = [row[:] for row in self.modules]
+        module_arr.protected = self.protected
+        module_arr.write_count = self.write_count
+        return module_arr
+
+    def get_module(self, x, y):
+        return self.modules[y][x]
+
+    def to_matrix(self):
+        return [row[:] for row in self.modules]
+
+    def update_module(self, x, y, value, force_update=False):
+        if self.protected[y][x] and not force_update:
+            return 1
+        self.modules[y][x] = value
+        return 0
+
+    def protect_module(self, x, y, value=0):
+        self.update_module(x, y, value)
+        self.protected[y][x] = True
+
+    # finder pattern in the top left corner, with the separator on its right and bottom sides
+    def add_finder_pattern(self):
+        for y in range(8):
+            for x in range(8):
+                self.protect_module(x, y, FINDER_PATTERN[y+1][x+1])
+
+    # along the top and left edges instead of row and column 6
+    def add_timing_patterns(self):
+        for i in range(8, self.modules_per_edge):
+            self.protect_module(i, 0, 1 if i % 2 == 0 else 0)
+            self.protect_module(0, i, 1 if i % 2 == 0 else 0)
+
+    def protect_format_bits(self):
+        for i in range(1, 9):
+            self.protect_module(8, i)
+            self.protect_module(i, 8)
+
+    # bits 0 - 7 go down column 8 and bits 14 - 7 along row 8, both next to the finder pattern
+    def add_format_bits(self, format_word):
+        for i in range(8):
+            self.update_module(8, i+1, (format_word >> i) & 1, True)
+            self.update_module(i+1, 8, (format_word >> (14-i)) & 1, True)
+
+    # two columns at a time from the bottom right corner, zigzagging up and down like a QR code
+    # (there is no vertical timing pattern in the middle to skip, and every module gets a bit)
+    def place_data_bits(self, content_bits):
+        bit_num = 0
+        upward = True
+        for right_x in range(self.modules_per_edge-1, 0, -2):
+            for i in range(self.modules_per_edge):
+                y = self.modules_per_edge-1-i if upward else i
+                for x in (right_x, right_x-1):
+                    if not self.protected[y][x] and bit_num < len(content_bits):
+                        self.update_module(x, y, int(content_bits[bit_num]))
+                        bit_num += 1
+            upward = not upward
+
+
+
+# picks the mask of a Micro QR symbol
+# the penalty rule is different from QR codes: a mask is scored on the dark modules along the right and bottom edges,
+# where SUM1 and SUM2 are the counts on each edge (without the timing pattern modules), and the score is
+# the smaller sum * 16 + the larger sum. Unlike QR code penalties, the highest score wins.
+class MicroQrMask:
+
+    def __init__(self, modules_per_edge, symbol_number):
+        self.modules_per_edge = modules_per_edge
+        self.symbol_number = symbol_number
+        self.mask_scores = [0] * len(MICRO_MASK_CONDITIONS)
+        self.best_mask = 0
+        self.quality_report = None
+
+    def apply_specific_mask(self, module_arr, mask_num):
+        masked_arr = module_arr.copy()
+        mask_condition = MICRO_MASK_CONDITIONS[mask_num]
+        for y in range(self.modules_per_edge):
+            for x in range(self.modules_per_edge):
+                if not masked_arr.protected[y][x] and mask_condition(y, x):
+                    masked_arr.modules[y][x] ^= 1
+        masked_arr.add_format_bits(get_micro_format_word(self.symbol_number, mask_num))
+        return masked_arr
+
+    def calc_mask_score(self, module_arr):
+        last = self.modules_per_edge-1
+        right_sum = sum(module_arr.modules[y][last] for y in range(1, self.modules_per_edge))
+        bottom_sum = sum(module_arr.modules[last][x] for x in range(1, self.modules_per_edge))
+        return (min(right_sum, bottom_sum) * 16) + max(right_sum, bottom_sum)
+
+    def apply_best_mask(self, module_arr):
+        best_arr = None
+        for mask_num in range(len(MICRO_MASK_CONDITIONS)):
+            masked_arr = self.apply_specific_mask(module_arr, mask_num)
+            self.mask_scores[mask_num] = self.calc_mask_score(masked_arr)
+            if best_arr is None or self.mask_scores[mask_num] > self.mask_scores[self.best_mask]:
+                best_arr = masked_arr
+                self.best_mask = mask_num
+        return best_arr
+
+
+
+# QrSymbol of a Micro QR code, version_num is the number of the micro version (1 for M1, ...)
+class MicroQrSymbol(QrSymbol):
+
+    is_micro = True
+    quiet_zone = MICRO_QUIET_ZONE
+
+    def get_version_name(self):
+        return MICRO_VERSIONS[self.version_num-1]
+
+    def get_default_filename(self):
+        return f"./image-{self.get_version_name()}{self.get_ecl_letter()}.png"
+
+    def to_bytes(self, output_format="png"):
+        if output_format == "qrm":
+            raise ValueError("Micro QR symbols can't be saved as .qrm, its header only holds QR code versions, use png or npy")
+        return super().to_bytes(output_format)
+
+
+
+# encode a selection made by select_micro_version into a MicroQrSymbol
+# mask is 0 - 3, or -1 to pick the mask with the best score
+def encode_micro_symbol(selection, mask=-1, timer=NULL_TIMER):
+    micro_version, ec_lvl, segment_bits = selection
+    symbol_number, data_bits_count, eccw_count = MICRO_SYMBOLS[(micro_version, ec_lvl)]
+
+    with timer.phase("error_correction"):
+        data_bits = pad_micro_bits(segment_bits, micro_version, data_bits_count)
+        content_bits = build_micro_content_bits(data_bits, eccw_count)
+
+    with timer.phase("function_patterns"):
+        module_array_class = get_counting_class(MicroModuleArray) if timer.enabled else MicroModuleArray
+        module_arr = module_array_class(micro_version)
+
+    with timer.phase("place_data"):
+        module_arr.place_data_bits(content_bits)
+
+    with timer.phase("mask"):
+        qr_masks = MicroQrMask(module_arr.modules_per_edge, symbol_number)
+        if mask >= 0:
+            module_arr = qr_masks.apply_specific_mask(module_arr, mask)
+            mask_num = mask
+        else:
+            module_arr = qr_masks.apply_best_mask(module_arr)
+            mask_num = qr_masks.best_mask
+
+    with timer.phase("render"):
+        modules_per_edge = module_arr.modules_per_edge
+        module_bytes = bytes(module for row in module_arr.modules for module in row)
+        image = render_module_bytes(module_bytes, modules_per_edge, ["1x"], MICRO_QUIET_ZONE)[0]
+
+    timer.count("module_writes", module_arr.write_count)
+    timer.set("version_num", MICRO_VERSIONS[micro_version-1])
+    timer.set("ec_lvl", TRANS_EC_LVL[ec_lvl])
+    timer.set("mask", mask_num)
+    timer.set("mask_scores", qr_masks.mask_scores)
+
+    qr_symbol = MicroQrSymbol(image, module_arr, micro_version, ec_lvl, mask_num)
+    qr_symbol.module_bytes = module_bytes
+    return qr_symbol
+
+
+# always a Micro QR symbol, raises a ValueError if the data is too large for M4 at the levels in err_corr
+def generate_micro_qr_code(data, err_corr="LMQH", mask=-1, timer=NULL_TIMER):
+    if not -1 <= mask < len(MICRO_MASK_CONDITIONS):
+        raise ValueError(f"Micro QR symbols only have masks 0 - {len(MICRO_MASK_CONDITIONS)-1}")
+    with timer.phase("select_version"):
+        selection = select_micro_version(sanitize_string(data), err_corr)
+    if selection is None:
+        raise ValueError("The data you entered is too large for a Micro QR symbol at this error correction level")
+    return encode_micro_symbol(selection, mask, timer)
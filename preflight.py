@@ -0,0 +1,193 @@
+import csv
+import json
+from argparse import ArgumentParser
+from sys import argv, exit, stdin, stderr
+from capacity import sanitize_string, find_version, get_data_bit_count, get_module_size, get_target_module_size, parse_size_targets, TRANS_EC_LVL
+from capacity import MICRO_VERSIONS, MICRO_QUIET_ZONE, MICRO_SYMBOLS, get_micro_modules_per_edge, get_micro_segment_length, find_micro_version
+
+
+# Dry run of generate_qr_code: which version, error correction level and segments a payload would get and how
+# large the symbol and its image would be, without encoding anything. Only capacity.py and the spec tables are
+# loaded (no PIL, no encoder), so checking a payload takes microseconds instead of a whole encode, and a payload
+# that is too large gets the same error message generate_qr_code would raise.
+#
+# python preflight.py "https://example.com" -e M --sizes 2x,256
+# python preflight.py --csv users.csv --column url > report.jsonl
+#
+# The exit status is 1 if a payload doesn't fit. With --csv every row is a line of JSON and a summary
+# of the whole file is printed to stderr.
+
+
+
+# what generate_qr_code would build for one payload
+# error holds the message and the other fields keep their defaults if the payload doesn't fit
+class PreflightResult:
+
+    def __init__(self, index=None, error=None):
+        self.index = index
+        self.error = error
+        self.version_num = -1
+        self.ec_lvl = -1
+        self.is_micro = False
+        # (mode, number of characters, number of bits with the mode indicator and character count)
+        self.segments = []
+        self.data_bit_count = 0
+        self.capacity_bits = 0
+        self.modules_per_edge = 0
+        self.quiet_zone = 1
+        self.module_size = 0
+        self.image_size = 0
+        # target -> edge length in pixels of the image resolutions.py renders for it
+        self.sizes = {}
+
+    def fits(self):
+        return self.error is None
+
+    def get_version_name(self):
+        return MICRO_VERSIONS[self.version_num-1] if self.is_micro else str(self.version_num)
+
+    def get_ecl_letter(self):
+        return TRANS_EC_LVL[self.ec_lvl]
+
+    def set_symbol(self, version_num, ec_lvl, modules_per_edge, sizes):
+        self.version_num = version_num
+        self.ec_lvl = ec_lvl
+        self.modules_per_edge = modules_per_edge
+        self.module_size = get_module_size(modules_per_edge)
+        self.image_size = self.module_size * (modules_per_edge + 2*self.quiet_zone)
+        for target in sizes:
+            self.sizes[str(target)] = get_target_module_size(target, modules_per_edge, self.quiet_zone) * (modules_per_edge + 2*self.quiet_zone)
+
+    def to_dict(self):
+        result = {} if self.index is None else {"index": self.index}
+        result["fits"] = self.fits()
+        if not self.fits():
+            result["error"] = self.error
+            return result
+        result.update({"version": self.get_version_name(),
+                       "ecl": self.get_ecl_letter(),
+                       "micro": self.is_micro,
+                       "segments": [{"mode": mode, "chars": char_count, "bits": bit_count} for mode, char_count, bit_count in self.segments],
+                       "data_bits": self.data_bit_count,
+                       "capacity_bits": self.capacity_bits,
+                       "modules_per_edge": self.modules_per_edge,
+                       "modules": self.modules_per_edge * self.modules_per_edge,
+                       "module_size": self.module_size,
+                       "image_size": self.image_size})
+        if self.sizes:
+            result["sizes"] = self.sizes
+        return result
+
+
+
+# the PreflightResult of generate_qr_code(data, err_corr, version_num, micro=micro)
+# sizes are resolutions.py targets ("2x", 512, ...) to get the image size of as well
+def preflight(data, err_corr="LMQH", version_num=0, micro=False, sizes=(), index=None):
+    cleaned_data = sanitize_string(data)
+    result = PreflightResult(index)
+    try:
+        if micro and version_num == 0:
+            selection = find_micro_version(cleaned_data, err_corr)
+            if selection is not None:
+                micro_version, ec_lvl, mode = selection
+                result.is_micro = True
+                result.quiet_zone = MICRO_QUIET_ZONE
+                result.data_bit_count = get_micro_segment_length(len(cleaned_data), mode, micro_version)
+                result.segments = [(mode, len(cleaned_data), result.data_bit_count)]
+                result.capacity_bits = MICRO_SYMBOLS[(micro_version, ec_lvl)][1]
+                result.set_symbol(micro_version, ec_lvl, get_micro_modules_per_edge(micro_version), sizes)
+                return result
+
+        cw_info, version_num, ec_lvl = find_version(len(cleaned_data), err_corr, version_num)
+        result.data_bit_count = get_data_bit_count(len(cleaned_data), version_num)
+        result.segments = [("byte", len(cleaned_data), result.data_bit_count)]
+        result.capacity_bits = cw_info.getMaxDataBits()
+        result.set_symbol(version_num, ec_lvl, ((version_num - 1) * 4) + 21, sizes)
+    except ValueError as e:
+        result = PreflightResult(index, error=str(e))
+    return result
+
+
+# position of column in the header row, column is a name from the header or a number counting from 0
+def get_column_number(header, column):
+    if column in header:
+        return header.index(column)
+    if str(column).isdigit() and int(column) < len(header):
+        return int(column)
+    raise ValueError(f"Unknown column {column!r}, the header has {', '.join(header)}")
+
+# preflight the data in one column of every row of a CSV file (any iterable of lines), in one pass over it
+# without a header, column has to be the number of the column counting from 0
+# results are yielded in row order and numbered from 1 (the header doesn't count), options are the
+# keyword arguments of preflight
+def preflight_column(csv_lines, column, has_header=True, delimiter=",", **options):
+    reader = csv.reader(csv_lines, delimiter=delimiter)
+    if has_header:
+        column_num = get_column_number(next(reader, []), column)
+    else:
+        column_num = int(column)
+    for index, row in enumerate(reader, 1):
+        if column_num >= len(row):
+            yield PreflightResult(index, error=f"Row {index} has no column {column}")
+        else:
+            yield preflight(row[column_num], index=index, **options)
+
+
+# totals of PreflightResults: how many fit and how many symbols of every version they need
+# results can be any iterable, e.g. straight from preflight_column, nothing is kept of a result once it is counted
+def summarize_results(results):
+    summary = {"rows": 0, "fit": 0, "failed": 0, "versions": {}}
+    for result in results:
+        summary["rows"] += 1
+        if result.fits():
+            summary["fit"] += 1
+            name = result.get_version_name()
+            summary["versions"][name] = summary["versions"].get(name, 0) + 1
+        else:
+            summary["failed"] += 1
+    return summary
+
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser("preflight.py")
+    parser.add_argument("data", nargs="?", help="data to check")
+    parser.add_argument("-e", "--err-corr", metavar="error_correction", choices=["L", "M", "Q", "H"], help="level of error correction", default="LMQH")
+    parser.add_argument("-v", "--version-num", metavar="version_number", choices=range(1,41), type=int, help="override version number", default=0)
+    parser.add_argument("--micro", action="store_true", help="use a Micro QR symbol (M1 - M4) when the data fits one, like qr-code-gen.py --micro")
+    parser.add_argument("--sizes", metavar="targets", help="comma separated image sizes to report as well, like qr-code-gen.py --sizes", default=None)
+    parser.add_argument("--csv", metavar="file", help="check the data in one column of every row of a CSV file (- for stdin) instead", default=None)
+    parser.add_argument("--column", metavar="column", help="name (or number from 0) of the column checked with --csv", default="0")
+    parser.add_argument("--no-header", action="store_true", help="the CSV file has no header row, --column is a number")
+    parser.add_argument("--delimiter", metavar="char", help="field delimiter of the CSV file", default=",")
+    parsed_args = parser.parse_args(argv[1:])
+
+    if (parsed_args.data is None) == (parsed_args.csv is None):
+        parser.error("give either data or --csv")
+    if parsed_args.no_header and not parsed_args.column.isdigit():
+        parser.error("--no-header needs --column to be a number")
+    try:
+        sizes = parse_size_targets(parsed_args.sizes) if parsed_args.sizes is not None else []
+    except ValueError as e:
+        parser.error(str(e))
+    options = {"err_corr": parsed_args.err_corr, "version_num": parsed_args.version_num, "micro": parsed_args.micro, "sizes": sizes}
+
+    if parsed_args.csv is None:
+        result = preflight(parsed_args.data, **options)
+        print(json.dumps(result.to_dict()))
+        exit(0 if result.fits() else 1)
+
+    # print every row as it is checked and only keep the totals
+    def print_results(results):
+        for result in results:
+            print(json.dumps(result.to_dict()))
+            yield result
+
+    csv_file = stdin if parsed_args.csv == "-" else open(parsed_args.csv, newline="")
+    try:
+        summary = summarize_results(print_results(preflight_column(csv_file, parsed_args.column, not parsed_args.no_header, parsed_args.delimiter, **options)))
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(json.dumps(summary), file=stderr)
+    exit(0 if summary["failed"] == 0 else 1)
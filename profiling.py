@@ -0,0 +1,124 @@
+import json
+import os
+from sys import platform
+from time import perf_counter
+
+try:
+    import resource
+except ImportError: # resource is not available on Windows
+    resource = None
+
+try:
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (ValueError, OSError, AttributeError):
+    PAGE_SIZE = 4096
+
+
+
+# records the wall time of each pipeline stage along with a few counters,
+# and reports everything as a dict / JSON string for metrics pipelines
+class PhaseTimer:
+
+    # counters that cost work on every module (e.g. module_writes) are only kept for enabled timers
+    enabled = True
+
+    def __init__(self, on_stage=None):
+        # on_stage(name, seconds) is called every time a stage finishes
+        self.on_stage = on_stage
+        self.stages = {}
+        self.counters = {}
+        self.values = {}
+        self.start_time = perf_counter()
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def add_stage_time(self, name, seconds):
+        # stages that run more than once (e.g. in batch mode) accumulate their time
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        if self.on_stage is not None:
+            self.on_stage(name, seconds)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set(self, name, value):
+        self.values[name] = value
+
+    def report(self):
+        report = dict(self.values)
+        report["stages"] = dict(self.stages)
+        report["total_time"] = perf_counter() - self.start_time
+        report.update(self.counters)
+        report["peak_memory_kb"] = get_peak_memory_kb()
+        return report
+
+    def to_json(self):
+        return json.dumps(self.report())
+
+
+class _Phase:
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start_time = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.timer.add_stage_time(self.name, perf_counter() - self.start_time)
+        return False
+
+
+
+# stand-in used when profiling is disabled so the pipeline doesn't need to check for None
+class NullTimer:
+
+    enabled = False
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+    def count(self, name, amount=1):
+        pass
+
+    def set(self, name, value):
+        pass
+
+
+class _NullPhase:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+NULL_TIMER = NullTimer()
+
+
+
+# peak resident set size of this process in kilobytes, or None if it can't be measured
+def get_peak_memory_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports ru_maxrss in bytes, Linux reports it in kilobytes
+    if platform == "darwin":
+        return peak // 1024
+    return peak
+
+
+# current resident set size of this process in kilobytes
+# falls back to the peak RSS on platforms without /proc
+def get_current_rss_kb():
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return get_peak_memory_kb()
+    return resident_pages * PAGE_SIZE // 1024
@@ -1,766 +1,237 @@
-from PIL import Image
-from masks import QrMask
+from encoder import generate_qr_code, sanitize_string, get_output_format, BACKENDS
+from batch import run_batch, read_batch_lines, TRANSPORTS, ENGINES
+from decoder import verify_symbol
+from structured_append import generate_structured_append, fits_in_symbol, get_part_filename, DEFAULT_MAX_VERSION
+from profiling import PhaseTimer, NULL_TIMER
+from serial_range import generate_serial_range
+from sinks import open_sink, is_name_template, uses_template_field, format_output_name, ARCHIVE_EXTENSIONS, NAME_TEMPLATE_FIELDS
+from matrix_export import MATRIX_FORMATS
+from resolutions import get_size_filename
+from capacity import parse_size_targets
+from sheets import SheetSink, SheetLayout, PAGE_SIZES, SHEET_EXTENSIONS
+from masks import MaskStrategy, MASK_STRATEGIES, DEFAULT_FIXED_MASK, DEFAULT_PENALTY_THRESHOLD, DEFAULT_SAMPLE_STEP
+from json import dumps
 from argparse import ArgumentParser
-from sys import argv
+from sys import argv, stderr, stdin, stdout
+import os
 
 
-class GaloisField:
-    def __init__(self):
-        # initialize exp and log tables for GF(256)
-        self.exp = [0] * 256
-        self.log = [0] * 256
-        
-        # generate the exp and log tables
-        value = 1
-        for i in range(256):
-            self.exp[i] = value
-            if i < 255:  # for i = 255, leave log[0] = 0
-                self.log[value] = i
-            
-            value = value << 1  # multiply by 2
-            if value > 255:
-                value ^= 0b100011101  # reduce using x^8 + x^4 + x^3 + x^2 + 1
-    
-    def multiply(self, a, b):
-        if a == 0 or b == 0:
-            return 0
-        return self.exp[(self.log[a] + self.log[b]) % 255]
-    
-    def divide(self, a, b):
-        if b == 0:
-            raise ValueError("Division by zero")
-        if a == 0:
-            return 0
-        return self.exp[(self.log[a] - self.log[b] + 255) % 255]
-
-    # multiply two polynomials in GF(256)
-    # each polynomial is represented as a list of coefficients from highest to lowest degree
-    def multiply_polynomials(self, poly1, poly2):
-        result = [0] * (len(poly1) + len(poly2) - 1)
-        
-        # multiply each term of poly1 with each term of poly2
-        for i, coeff1 in enumerate(poly1):
-            for j, coeff2 in enumerate(poly2):
-                # XOR is addition in GF(256)
-                result[i + j] ^= self.multiply(coeff1, coeff2)
-        
-        return result
-
-
-
-class ModuleArray:
-    
-    def __init__(self, pixel_arr, version_num, modules_per_edge, module_size):
-        self.pixel_arr = pixel_arr
-        self.version_num = version_num
-        self.modules_per_edge = modules_per_edge
-        self.module_size = module_size
-        self.protected_modules = []
-        self.FINDER_PATTERN = [[0,0,0,0,0,0,0,0,0],
-                               [0,1,1,1,1,1,1,1,0],
-                               [0,1,0,0,0,0,0,1,0],
-                               [0,1,0,1,1,1,0,1,0],
-                               [0,1,0,1,1,1,0,1,0],
-                               [0,1,0,1,1,1,0,1,0],
-                               [0,1,0,0,0,0,0,1,0],
-                               [0,1,1,1,1,1,1,1,0],
-                               [0,0,0,0,0,0,0,0,0]]
-        self.ALIGNMENT_PATTERN = [[1,1,1,1,1],
-                                  [1,0,0,0,1],
-                                  [1,0,1,0,1],
-                                  [1,0,0,0,1],
-                                  [1,1,1,1,1]]
-        
-        # Has data for versions 2 - 40
-        self.ALIGNMENT_PATTERN_LOCS = [[6, 18],
-                                       [6, 22],
-                                       [6, 26],
-                                       [6, 30],
-                                       [6, 34],
-                                       [6, 22, 38],
-                                       [6, 24, 42],
-                                       [6, 26, 46],
-                                       [6, 28, 50],
-                                       [6, 30, 54],
-                                       [6, 32, 58],
-                                       [6, 34, 62],
-                                       [6, 26, 46, 66],
-                                       [6, 26, 48, 70],
-                                       [6, 26, 50, 74],
-                                       [6, 30, 54, 78],
-                                       [6, 30, 56, 82],
-                                       [6, 30, 58, 86],
-                                       [6, 34, 62, 90],
-                                       [6, 28, 50, 72, 94],
-                                       [6, 26, 50, 74, 98],
-                                       [6, 30, 54, 78, 102],
-                                       [6, 28, 54, 80, 106],
-                                       [6, 32, 58, 84, 110],
-                                       [6, 30, 58, 86, 114],
-                                       [6, 34, 62, 90, 118],
-                                       [6, 26, 50, 74, 98, 122],
-                                       [6, 30, 54, 78, 102, 126],
-                                       [6, 26, 52, 78, 104, 130],
-                                       [6, 30, 56, 82, 108, 134],
-                                       [6, 34, 60, 86, 112, 138],
-                                       [6, 30, 58, 86, 114, 142],
-                                       [6, 34, 62, 90, 118, 146],
-                                       [6, 30, 54, 78, 102, 126, 150],
-                                       [6, 24, 50, 76, 102, 128, 154],
-                                       [6, 28, 54, 80, 106, 132, 158],
-                                       [6, 32, 58, 84, 110, 136, 162],
-                                       [6, 26, 54, 82, 110, 138, 166],
-                                       [6, 30, 58, 86, 114, 142, 170]]
-        
-        self.FORMAT_STRINGS = ["000111110010010100",
-                               "001000010110111100",
-                               "001001101010011001",
-                               "001010010011010011",
-                               "001011101111110110",
-                               "001100011101100010",
-                               "001101100001000111",
-                               "001110011000001101",
-                               "001111100100101000",
-                               "010000101101111000",
-                               "010001010001011101",
-                               "010010101000010111",
-                               "010011010100110010",
-                               "010100100110100110",
-                               "010101011010000011",
-                               "010110100011001001",
-                               "010111011111101100",
-                               "011000111011000100",
-                               "011001000111100001",
-                               "011010111110101011",
-                               "011011000010001110",
-                               "011100110000011010",
-                               "011101001100111111",
-                               "011110110101110101",
-                               "011111001001010000",
-                               "100000100111010101",
-                               "100001011011110000",
-                               "100010100010111010",
-                               "100011011110011111",
-                               "100100101100001011",
-                               "100101010000101110",
-                               "100110101001100100",
-                               "100111010101000001",
-                               "101000110001101001"]
-        
-        self.add_finder_patterns()
-        if self.version_num > 1:
-            self.add_alignment_patterns()
-        self.add_timing_patterns()
-        self.protect_format_bits()
-        self.add_dark_module()
-        
-    def set_pixel_arr(self, pixel_arr):
-        self.pixel_arr = pixel_arr
-        
-    def get_pixel_arr(self):
-        return self.pixel_arr
-
-    def get_module(self, x, y):
-        # convert module x, y coords to real pixel coords
-        module_x = (x+1)*self.module_size
-        module_y = (y+1)*self.module_size
-        return self.pixel_arr[module_x, module_y]
-
-    def update_module(self, x, y, value, force_update=False):
-        # if we are not allowed to update this module, return error        
-        if [x, y] in self.protected_modules and not force_update:
-            return 1
-        # convert module x, y coords to real pixel coords
-        module_x = (x+1)*self.module_size
-        module_y = (y+1)*self.module_size
-        # for every pixel within that module, change its value
-        for i in range(module_x, module_x+self.module_size):
-            for j in range(module_y, module_y+self.module_size):
-                self.pixel_arr[i,j] = value
-        return 0
-    
-    def add_finder_patterns(self):
-        # Finder patterns
-        for x, row in enumerate(self.FINDER_PATTERN):
-            for y, value in enumerate(row):
-                # Top left finder pattern
-                self.update_module(x-1, y-1, value)
-                self.protected_modules.append([x-1, y-1])
-                # Top right finder pattern
-                self.update_module((self.modules_per_edge-7)+x-1, y-1, value)
-                self.protected_modules.append([(self.modules_per_edge-7)+x-1, y-1])
-                # Bottom left finder pattern
-                self.update_module(x-1, (self.modules_per_edge-7)+y-1, value)
-                self.protected_modules.append([x-1, (self.modules_per_edge-7)+y-1])
-    
-    def protect_format_bits(self):
-        # if version is 7 or higher, we need to add a redundant indication of the version number
-        if self.version_num > 6:
-            bits_list = MovableHeadArray([int(x) for x in reversed(list(self.FORMAT_STRINGS[self.version_num-7]))])
-            for i in range(6):
-                for j in range(3):
-                    # format bits to the left of the top right finder pattern
-                    self.update_module(self.modules_per_edge-11+j, i, bits_list.get_head())
-                    self.protected_modules.append([self.modules_per_edge-11+j, i])
-                    # format bits above the bottom left finder pattern
-                    self.update_module(i, self.modules_per_edge-11+j, bits_list.get_head())
-                    self.protected_modules.append([i, self.modules_per_edge-11+j])
-                    bits_list.curr_index += 1
-
-        # format bits to the right of the bottom-left finder pattern
-        for y in range(0, self.modules_per_edge, 1):
-            if y not in range(9, self.modules_per_edge-8):
-                self.protected_modules.append([8, y])
-        
-        # format bits under the top left finder pattern
-        for x in range(0, self.modules_per_edge, 1):
-            if x not in range(9, self.modules_per_edge-8):
-                self.protected_modules.append([x, 8])
-
-    def add_timing_patterns(self):
-        # timing pattern between top left and top right finder patterns
-        for x in range(7, self.modules_per_edge-7):
-            if x % 2 == 0:
-                self.update_module(x, 6, 1, True)
-            self.protected_modules.append([x, 6])
-        # timing pattern between top left and bottom left finder patterns
-        for y in range(7, self.modules_per_edge-7):
-            if y % 2 == 0:
-                self.update_module(6, y, 1, True)
-            self.protected_modules.append([6, y])
-                
-    # Dark module: one module that is ALWAYS dark in ALL QR codes
-    def add_dark_module(self):
-        self.update_module(8, ((4 * self.version_num) + 9), 1, True)
-        self.protected_modules.append([8, ((4 * self.version_num) + 9) ])
-    
-    def add_alignment_patterns(self):
-        locations = self.ALIGNMENT_PATTERN_LOCS[self.version_num-2]
-        for i in range(len(locations)):
-            for j in range(len(locations)):
-                if [locations[i], locations[j]] not in self.protected_modules:
-                    for x_shift, row in enumerate(self.ALIGNMENT_PATTERN):
-                        for y_shift, value in enumerate(row):
-                            align_x = locations[i] + x_shift - 2
-                            align_y = locations[j] + y_shift - 2
-                            self.update_module(align_x, align_y, value)
-                            self.protected_modules.append([align_x, align_y])
-
-
-
-class MovableHeadArray:
-    
-    def __init__(self, data_bits):
-        self.data_bits = data_bits
-        self.curr_index = 0
-        
-    def get_head(self):
-        try:
-            return self.data_bits[self.curr_index]
-        # If we try to get a bit after the end of the data bits, just return 0 
-        except:
-            return 0
-
-    def set_head(self, value):
-        self.data_bits[self.curr_index] = value
-
-
-
-# object that holds all the information about any specific version and error correction level QR code
-class CodewordCounts:
-    
-    def __init__(self, groups, eccw_count):
-        self.block_counts = []
-        self.data_cw_counts = []
-        self.max_data_bits = 0
-        for group in groups:
-            self.block_counts.append(group[0])
-            self.data_cw_counts.append(group[1])
-            self.max_data_bits += (group[0] * group[1])
-        self.max_data_bits *= 8
-        self.groups_count = len(groups)
-        self.eccw_count = eccw_count
-        
-    def getECCWCount(self):
-        return self.eccw_count
-    def getGroupsCount(self):
-        return self.groups_count
-    def getBlocksCount(self, group_num):
-        return self.block_counts[group_num]
-    def getDataCWCount(self, group_num):
-        return self.data_cw_counts[group_num]
-    def getMaxDataBits(self):
-        return self.max_data_bits
-        
-
-
-###################################################################################################
-########################################## END CLASSES ############################################
-###################################################################################################
-
-
-
-# create a generator polynomial for the specified number of error correction words
-# returns coefficients from highest to lowest degree
-def create_generator_polynomial(num_codewords, gf):
-    # start with g(x) = (x - α^0)
-    generator = [1, gf.exp[0]]
-    
-    # multiply by (x - α^i) for i from 1 to num_codewords-1
-    for i in range(1, num_codewords):
-        # create the term (x - α^i)
-        term = [1, gf.exp[i]]
-        # multiply the current generator polynomial by this term
-        generator = gf.multiply_polynomials(generator, term)
-    
-    return generator
-
-
-# calculate error correction codewords using polynomial division in GF(256)
-def calculate_error_correction(message_ints, num_codewords, gf):
-    # generate the appropriate generator polynomial
-    generator_coeffs = create_generator_polynomial(num_codewords, gf)
-    
-    # pad message with zeros according to generator polynomial degree
-    padding = [0] * (len(generator_coeffs) - 1)
-    dividend = message_ints + padding
-    
-    # perform polynomial division
-    for i in range(len(message_ints)):
-        if dividend[i] != 0:
-            factor = dividend[i]
-            for j in range(len(generator_coeffs)):
-                dividend[i + j] ^= gf.multiply(generator_coeffs[j], factor)
-    
-    # return the remainder (error correction codewords)
-    return dividend[-len(padding):]
-
-def sanitize_string(str):
-    encoded_str = str.encode('latin-1', 'ignore')
-    return encoded_str.decode('latin-1')
-
-
-
-###################################################################################################
-######################################### END FUNCTIONS ###########################################
-###################################################################################################
-
-
-
-# TODO CLI Options:
-# -e, --err-corr [level]: Level of error correction (L, M, Q, H)
-# -d, --data [string]: data that should be encoded within the QR code
-# -v, --version [version number]: override version number
-# -m, --mask [mask number]: override mask number
-
 parser = ArgumentParser("qr-code-gen.py")
 
-parser.add_argument("data", help="data to be encoded within the QR code")
+parser.add_argument("data", nargs="?", help="data to be encoded within the QR code")
 parser.add_argument("-e", "--err-corr", metavar="error_correction", choices=["L", "M", "Q", "H"], help="level of error correction", default="LMQH")
 parser.add_argument("-v", "--version-num", metavar="version_number", choices=range(1,41), type=int, help="override version number", default=0)
-parser.add_argument("-m", "--mask",  metavar="mask", choices=range(1,8), type=int, help="override mask number", default=0)
+parser.add_argument("-m", "--mask",  metavar="mask", choices=range(0,8), type=int, help="override mask number", default=-1)
+parser.add_argument("-o", "--output", metavar="path", help=f"where to save the code: a path, - for stdout, or a naming template using {', '.join('{' + field + '}' for field in NAME_TEMPLATE_FIELDS)} (in batch and serial mode also a directory or an archive, see --archive)", default=None)
+parser.add_argument("-b", "--batch", metavar="file", help="encode every line of file (- for stdin) as its own QR code", default=None)
+parser.add_argument("-j", "--workers", metavar="workers", type=int, help="number of worker processes used in batch and serial mode", default=1)
+parser.add_argument("--transport", choices=TRANSPORTS, help="how batch worker processes hand codes back: pickled results, or packed matrices in a shared memory ring buffer", default="pickle")
+parser.add_argument("--engine", choices=ENGINES, help="in batch mode, encode every line on its own (symbol) or same-size lines together as NumPy arrays (tensor, needs NumPy and always searches all masks)", default="symbol")
+parser.add_argument("--serial", metavar="format", help="encode a run of serial numbers instead of data, e.g. SKU-{:06d}, every code uses the same version and error correction level", default=None)
+parser.add_argument("--start", metavar="number", type=int, help="first serial number", default=1)
+parser.add_argument("--stop", metavar="number", type=int, help="serial numbers stop before this number, like range()", default=None)
+parser.add_argument("--step", metavar="number", type=int, help="step between serial numbers", default=1)
+parser.add_argument("--archive", metavar="path", help=f"in batch and serial mode, write the codes into one archive instead of one PNG each ({', '.join(ARCHIVE_EXTENSIONS)}, .qrc holds packed module matrices instead of images) or into a directory", default=None)
+parser.add_argument("--append", action="store_true", help="add to an existing .qrc archive instead of replacing it")
+parser.add_argument("--sheets", metavar="path", help=f"in batch and serial mode, lay the codes out in a grid on print sheets ({', '.join(SHEET_EXTENSIONS)}, every page of a .png gets its own numbered file)", default=None)
+parser.add_argument("--page-size", choices=PAGE_SIZES, help="page size of --sheets", default="a4")
+parser.add_argument("--dpi", metavar="dpi", type=int, help="resolution of --sheets", default=300)
+parser.add_argument("--code-size", metavar="mm", type=float, help="width of every code on --sheets", default=30)
+parser.add_argument("--margin", metavar="mm", type=float, help="page margin of --sheets", default=10)
+parser.add_argument("--gap", metavar="mm", type=float, help="space between the codes on --sheets", default=5)
+parser.add_argument("--caption", action="store_true", help="print the encoded data below every code on --sheets")
+parser.add_argument("--sizes", metavar="sizes", help="comma separated sizes to render the code at, as scales of the default size or edge lengths in pixels (e.g. 1x,2x,3x,64), saved as name@2x.png, name@64px.png, ...", default=None)
+parser.add_argument("--matrix", metavar="format", choices=MATRIX_FORMATS, help="save the raw module matrix (qrm: header and bit-packed rows, npy: NumPy array of 0/1 bytes) instead of a PNG", default=None)
+parser.add_argument("-s", "--split-version", metavar="version_number", choices=range(1,41), type=int, help=f"split the data across up to 16 structured append QR codes no larger than this version (data too large for one code is split at version {DEFAULT_MAX_VERSION} or above automatically)", default=0)
+parser.add_argument("--micro", action="store_true", help="use a Micro QR symbol (M1-M4, 11x11 to 17x17 modules) when the data fits one, only for a single code without -v or a mask above 3")
+parser.add_argument("--backend", choices=BACKENDS, help="matrix backend used while encoding (bitboard is pure Python and much faster, the output is identical)", default="pil")
+parser.add_argument("--verify", action="store_true", help="decode every generated code again and fail if it does not read back correctly")
+parser.add_argument("--mask-strategy", choices=MASK_STRATEGIES, help="how the mask is picked when -m is not given: score all 8 masks (exhaustive), score them on a subset of rows and columns (sampled), or use --fixed-mask unless its penalty is too high (fixed)", default="exhaustive")
+parser.add_argument("--fixed-mask", metavar="mask", choices=range(0,8), type=int, help="mask used by --mask-strategy fixed", default=DEFAULT_FIXED_MASK)
+parser.add_argument("--penalty-threshold", metavar="points", type=float, help="highest penalty per module accepted by --mask-strategy fixed before all masks are searched", default=DEFAULT_PENALTY_THRESHOLD)
+parser.add_argument("--sample-step", metavar="step", type=int, help="score every step-th row and column with --mask-strategy sampled", default=DEFAULT_SAMPLE_STEP)
+parser.add_argument("--mask-report", action="store_true", help="print how the chosen mask's penalty compares to the best possible mask as JSON (also added to --profile)")
+parser.add_argument("--profile", "--timings", action="store_true", help="report per-stage timings, module writes, mask scores and peak memory as JSON on stderr")
+parser.add_argument("--profile-file", metavar="file", help="write the --profile JSON report to file instead of stderr", default=None)
 
 parsed_args = parser.parse_args(argv[1:])
 
+if parsed_args.sample_step < 1:
+    parser.error("--sample-step must be at least 1")
+if parsed_args.serial is not None and parsed_args.stop is None:
+    parser.error("--serial needs --stop")
+if parsed_args.step == 0:
+    parser.error("--step must not be 0")
+if sum(option is not None for option in (parsed_args.sheets, parsed_args.archive, parsed_args.output)) > 1:
+    parser.error("only one of --sheets, --archive and --output can be used")
+if parsed_args.sizes is not None and (parsed_args.matrix is not None or parsed_args.output == "-"):
+    parser.error("--sizes can't be used with --matrix or --output -")
+# the size variants are always PNG images, so they can't keep a matrix extension like .qrm
+if parsed_args.sizes is not None and parsed_args.output is not None and get_output_format(parsed_args.output) != "png":
+    parser.error(f"--sizes only writes PNG images, not {os.path.splitext(parsed_args.output)[1]} files")
+if parsed_args.sizes is not None:
+    try:
+        size_targets = parse_size_targets(parsed_args.sizes)
+    except ValueError as e:
+        parser.error(str(e))
+if parsed_args.output is not None and is_name_template(parsed_args.output):
+    try:
+        format_output_name(parsed_args.output, 1, 0)
+    except ValueError as e:
+        parser.error(str(e))
+if parsed_args.batch == "-" and parsed_args.output is not None and uses_template_field(parsed_args.output, "count"):
+    parser.error("{count} can't be used with --batch -, the number of lines on stdin isn't known before the first code is written")
+if parsed_args.micro and (parsed_args.batch is not None or parsed_args.serial is not None or parsed_args.split_version > 0):
+    parser.error("--micro only works for a single code")
+if parsed_args.output == "-" and (parsed_args.batch is not None or parsed_args.serial is not None or parsed_args.split_version > 0):
+    parser.error("--output - only works for a single code")
+mask_strategy = MaskStrategy(parsed_args.mask_strategy, parsed_args.fixed_mask, parsed_args.penalty_threshold, parsed_args.sample_step, parsed_args.mask_report)
+if parsed_args.engine == "tensor" and (mask_strategy.name != "exhaustive" or mask_strategy.report):
+    parser.error("--engine tensor only works with --mask-strategy exhaustive and without --mask-report")
+
+timer = PhaseTimer() if parsed_args.profile or parsed_args.profile_file else NULL_TIMER
+
+# write every successful result to the sink and report the ones that failed
+def save_results(results, sink, label):
+    saved_count = 0
+    failed_count = 0
+    for result in results:
+        if result.error is not None:
+            print(f"{label} {result.index}:", result.error)
+            failed_count += 1
+            continue
+        with timer.phase("write"):
+            sink.write(result)
+        saved_count += 1
+    print(f"Saved {saved_count} codes ({failed_count} failed)")
+
+if parsed_args.serial is not None or parsed_args.batch is not None:
+    try:
+        if parsed_args.sheets is not None:
+            caption = (lambda result: result.data) if parsed_args.caption else None
+            layout = SheetLayout(PAGE_SIZES[parsed_args.page_size], parsed_args.dpi, parsed_args.margin, parsed_args.gap, parsed_args.code_size, caption)
+            sink = SheetSink(parsed_args.sheets, layout)
+        else:
+            # {count} in a naming template needs the number of codes before the first one is written
+            count = None
+            if parsed_args.serial is not None:
+                count = len(range(parsed_args.start, parsed_args.stop, parsed_args.step))
+            elif parsed_args.output is not None and uses_template_field(parsed_args.output, "count"):
+                with open(parsed_args.batch) as batch_file:
+                    count = sum(1 for _ in batch_file)
+            sink = open_sink(parsed_args.output or parsed_args.archive, parsed_args.append, count)
+    except (ValueError, OSError) as e:
+        print(e)
+        exit(1)
+
+if parsed_args.serial is not None:
+    try:
+        with sink:
+            results = generate_serial_range(parsed_args.serial, parsed_args.start, parsed_args.stop, parsed_args.step, parsed_args.err_corr, parsed_args.version_num, parsed_args.mask, parsed_args.workers, parsed_args.verify, timer, mask_strategy, output=sink.output)
+            save_results(results, sink, "Number")
+    except ValueError as e:
+        print(e)
+        exit(1)
+
+elif parsed_args.batch is not None:
+    batch_file = stdin if parsed_args.batch == "-" else open(parsed_args.batch)
+    with batch_file, sink:
+        results = run_batch(read_batch_lines(batch_file), parsed_args.err_corr, parsed_args.version_num, parsed_args.mask, parsed_args.workers, parsed_args.verify, parsed_args.backend, timer, mask_strategy, sink.output, parsed_args.transport, parsed_args.engine)
+        save_results(results, sink, "Line")
+
+elif parsed_args.data is None:
+    parser.error("either data, --batch or --serial is required")
+
+elif parsed_args.split_version > 0 or not fits_in_symbol(sanitize_string(parsed_args.data), parsed_args.err_corr):
+    if parsed_args.output == "-":
+        print("The data needs more than one code, which can't be written to stdout", file=stderr)
+        exit(1)
+    try:
+        results = generate_structured_append(parsed_args.data, parsed_args.err_corr, parsed_args.split_version or DEFAULT_MAX_VERSION, parsed_args.mask, parsed_args.workers, parsed_args.verify, parsed_args.backend, mask_strategy)
+    except ValueError as e:
+        print(e)
+        exit(1)
+
+    for result in results:
+        if result.error is not None:
+            print(f"Part {result.index}:", result.error)
+            exit(1)
+    for result in results:
+        if parsed_args.output is None:
+            filename = get_part_filename(result, len(results))
+        elif is_name_template(parsed_args.output):
+            filename = format_output_name(parsed_args.output, result.version_num, result.ec_lvl, result.mask_num, result.index, len(results), result.data)
+        else:
+            base_path, extension = os.path.splitext(parsed_args.output)
+            filename = f"{base_path}-{result.index}of{len(results)}{extension}"
+        try:
+            with timer.phase("write"):
+                if os.path.dirname(filename):
+                    os.makedirs(os.path.dirname(filename), exist_ok=True)
+                with open(filename, "wb") as image_file:
+                    image_file.write(result.png_bytes)
+        except OSError as e:
+            print("Error saving file:", e)
+            break
+        print(f"Output saved as {filename}")
 
-
-# Has data for versions 1 - 40
-CODEWORD_BLOCKS = [[CodewordCounts([[1, 9]], 17),               # 1H
-                    CodewordCounts([[1, 13]], 13),              # 1Q
-                    CodewordCounts([[1, 16]], 10),              # 1M
-                    CodewordCounts([[1, 19]], 7)],              # 1L
-
-                   [CodewordCounts([[1, 16]], 28),              # 2H
-                    CodewordCounts([[1, 22]], 22),              # 2Q
-                    CodewordCounts([[1, 28]], 16),              # 2M
-                    CodewordCounts([[1, 34]], 10)],             # 2L
-
-                   [CodewordCounts([[2, 13]], 22),              # 3H
-                    CodewordCounts([[2, 17]], 18),              # 3Q
-                    CodewordCounts([[1, 44]], 26),              # 3M
-                    CodewordCounts([[1, 55]], 15)],             # 3L
-
-                   [CodewordCounts([[4, 9]], 16),               # 4H
-                    CodewordCounts([[2, 24]], 26),              # 4Q
-                    CodewordCounts([[2, 32]], 18),              # 4M
-                    CodewordCounts([[1, 80]], 20)],             # 4L
-
-                   [CodewordCounts([[2, 11], [2, 12]], 22),     # 5H
-                    CodewordCounts([[2, 15], [2, 16]], 18),     # 5Q
-                    CodewordCounts([[2, 43]], 24),              # 5M
-                    CodewordCounts([[1, 108]], 26)],            # 5L
-
-                   [CodewordCounts([[4, 15]], 28),              # 6H
-                    CodewordCounts([[4, 19]], 24),              # 6Q
-                    CodewordCounts([[4, 27]], 16),              # 6M
-                    CodewordCounts([[2, 68]], 18)],             # 6L
-
-                   [CodewordCounts([[4, 13], [1, 14]], 26),     # 7H
-                    CodewordCounts([[2, 14], [4, 15]], 18),     # 7Q
-                    CodewordCounts([[4, 31]], 18),              # 7M
-                    CodewordCounts([[2, 78]], 20)],             # 7L
-
-                   [CodewordCounts([[4, 14], [2, 15]], 26),     # 8H
-                    CodewordCounts([[4, 18], [2, 19]], 22),     # 8Q
-                    CodewordCounts([[2, 38], [2, 39]], 22),     # 8M
-                    CodewordCounts([[2, 97]], 24)],             # 8L
-
-                   [CodewordCounts([[4, 12], [4, 13]], 24),     # 9H
-                    CodewordCounts([[4, 16], [4, 17]], 20),     # 9Q
-                    CodewordCounts([[3, 36], [2, 37]], 22),     # 9M
-                    CodewordCounts([[2, 116]], 30)],            # 9L
-
-                   [CodewordCounts([[6, 15], [2, 16]], 28),     # 10H
-                    CodewordCounts([[6, 19], [2, 20]], 24),     # 10Q
-                    CodewordCounts([[4, 43], [1, 44]], 26),     # 10M
-                    CodewordCounts([[2, 68], [2, 69]], 18)],    # 10L
-
-                   [CodewordCounts([[3, 12], [8, 13]], 24),     # 11H
-                    CodewordCounts([[4, 22], [4, 23]], 28),     # 11Q
-                    CodewordCounts([[1, 50], [4, 51]], 30),     # 11M
-                    CodewordCounts([[4, 81]], 20)],             # 11L
-
-                   [CodewordCounts([[7, 14], [4, 15]], 28),     # 12H
-                    CodewordCounts([[4, 20], [6, 21]], 26),     # 12Q
-                    CodewordCounts([[6, 36], [2, 37]], 22),     # 12M
-                    CodewordCounts([[2, 92], [2, 93]], 24)],    # 12L
-
-                   [CodewordCounts([[12, 11], [4, 12]], 22),    # 13H
-                    CodewordCounts([[8, 20], [4, 21]], 24),     # 13Q
-                    CodewordCounts([[8, 37], [1, 38]], 22),     # 13M
-                    CodewordCounts([[4, 107]], 26)],            # 13L
-
-                   [CodewordCounts([[11, 12], [5, 13]], 24),    # 14H
-                    CodewordCounts([[11, 16], [5, 17]], 20),    # 14Q
-                    CodewordCounts([[4, 40], [5, 41]], 24),     # 14M
-                    CodewordCounts([[3, 115], [1, 116]], 30)],  # 14L
-
-                   [CodewordCounts([[11, 12], [7, 13]], 24),    # 15H
-                    CodewordCounts([[5, 24], [7, 25]], 30),     # 15Q
-                    CodewordCounts([[5, 41], [5, 42]], 24),     # 15M
-                    CodewordCounts([[5, 87], [1, 88]], 22)],    # 15L
-
-                   [CodewordCounts([[3, 15], [13, 16]], 30),    # 16H
-                    CodewordCounts([[15, 19], [2, 20]], 24),    # 16Q
-                    CodewordCounts([[7, 45], [3, 46]], 28),     # 16M
-                    CodewordCounts([[5, 98], [1, 99]], 24)],    # 16L
-
-                   [CodewordCounts([[2, 14], [17, 15]], 28),    # 17H
-                    CodewordCounts([[1, 22], [15, 23]], 28),    # 17Q
-                    CodewordCounts([[10, 46], [1, 47]], 28),    # 17M
-                    CodewordCounts([[1, 107], [5, 108]], 28)],  # 17L
-
-                   [CodewordCounts([[2, 14], [19, 15]], 28),    # 18H
-                    CodewordCounts([[17, 22], [1, 23]], 28),    # 18Q
-                    CodewordCounts([[9, 43], [4, 44]], 26),     # 18M
-                    CodewordCounts([[5, 120], [1, 121]], 30)],  # 18L
-
-                   [CodewordCounts([[9, 13], [16, 14]], 26),    # 19H
-                    CodewordCounts([[17, 21], [4, 22]], 26),    # 19Q
-                    CodewordCounts([[3, 44], [11, 45]], 26),    # 19M
-                    CodewordCounts([[3, 113], [4, 114]], 28)],  # 19L
-
-                   [CodewordCounts([[15, 15], [10, 16]], 28),   # 20H
-                    CodewordCounts([[15, 24], [5, 25]], 30),    # 20Q
-                    CodewordCounts([[3, 41], [13, 42]], 26),    # 20M
-                    CodewordCounts([[3, 107], [5, 108]], 28)],  # 20L
-
-                   [CodewordCounts([[19, 16], [6, 17]], 30),    # 21H
-                    CodewordCounts([[17, 22], [6, 23]], 28),    # 21Q
-                    CodewordCounts([[17, 42]], 26),             # 21M
-                    CodewordCounts([[4, 116], [4, 117]], 28)],  # 21L
-
-                   [CodewordCounts([[34, 13]], 24),             # 22H
-                    CodewordCounts([[7, 24], [16, 25]], 30),    # 22Q
-                    CodewordCounts([[17, 46]], 28),             # 22M
-                    CodewordCounts([[2, 111], [7, 112]], 28)],  # 22L
-
-                   [CodewordCounts([[16, 15], [14, 16]], 30),   # 23H
-                    CodewordCounts([[11, 24], [14, 25]], 30),   # 23Q
-                    CodewordCounts([[4, 47], [14, 48]], 28),    # 23M
-                    CodewordCounts([[4, 121], [5, 122]], 30)],  # 23L
-
-                   [CodewordCounts([[30, 16], [2, 17]], 30),    # 24H
-                    CodewordCounts([[11, 24], [16, 25]], 30),   # 24Q
-                    CodewordCounts([[6, 45], [14, 46]], 28),    # 24M
-                    CodewordCounts([[6, 117], [4, 118]], 30)],  # 24L
-
-                   [CodewordCounts([[22, 15], [13, 16]], 30),   # 25H
-                    CodewordCounts([[7, 24], [22, 25]], 30),    # 25Q
-                    CodewordCounts([[8, 47], [13, 48]], 28),    # 25M
-                    CodewordCounts([[8, 106], [4, 107]], 26)],  # 25L
-
-                   [CodewordCounts([[33, 16], [4, 17]], 30),    # 26H
-                    CodewordCounts([[28, 22], [6, 23]], 28),    # 26Q
-                    CodewordCounts([[19, 46], [4, 47]], 28),    # 26M
-                    CodewordCounts([[10, 114], [2, 115]], 28)], # 26L
-
-                   [CodewordCounts([[12, 15], [28, 16]], 30),   # 27H
-                    CodewordCounts([[8, 23], [26, 24]], 30),    # 27Q
-                    CodewordCounts([[22, 45], [3, 46]], 28),    # 27M
-                    CodewordCounts([[8, 122], [4, 123]], 30)],  # 27L
-
-                   [CodewordCounts([[11, 15], [31, 16]], 30),   # 28H
-                    CodewordCounts([[4, 24], [31, 25]], 30),    # 28Q
-                    CodewordCounts([[3, 45], [23, 46]], 28),    # 28M
-                    CodewordCounts([[3, 117], [10, 118]], 30)], # 28L
-
-                   [CodewordCounts([[19, 15], [26, 16]], 30),   # 29H
-                    CodewordCounts([[1, 23], [37, 24]], 30),    # 29Q
-                    CodewordCounts([[21, 45], [7, 46]], 28),    # 29M
-                    CodewordCounts([[7, 116], [7, 117]], 30)],  # 29L
-
-                   [CodewordCounts([[23, 15], [25, 16]], 30),   # 30H
-                    CodewordCounts([[15, 24], [25, 25]], 30),   # 30Q
-                    CodewordCounts([[19, 47], [10, 48]], 28),   # 30M
-                    CodewordCounts([[5, 115], [10, 116]], 30)], # 30L
-
-                   [CodewordCounts([[23, 15], [28, 16]], 30),   # 31H
-                    CodewordCounts([[42, 24], [1, 25]], 30),    # 31Q
-                    CodewordCounts([[2, 46], [29, 47]], 28),    # 31M
-                    CodewordCounts([[13, 115], [3, 116]], 30)], # 31L
-
-                   [CodewordCounts([[19, 15], [35, 16]], 30),   # 32H
-                    CodewordCounts([[10, 24], [35, 25]], 30),   # 32Q
-                    CodewordCounts([[10, 46], [23, 47]], 28),   # 32M
-                    CodewordCounts([[17, 115]], 30)],           # 32L
-
-                   [CodewordCounts([[11, 15], [46, 16]], 30),   # 33H
-                    CodewordCounts([[29, 24], [19, 25]], 30),   # 33Q
-                    CodewordCounts([[14, 46], [21, 47]], 28),   # 33M
-                    CodewordCounts([[17, 115], [1, 116]], 30)], # 33L
-
-                   [CodewordCounts([[59, 16], [1, 17]], 30),    # 34H
-                    CodewordCounts([[44, 24], [7, 25]], 30),    # 34Q
-                    CodewordCounts([[14, 46], [23, 47]], 28),   # 34M
-                    CodewordCounts([[13, 115], [6, 116]], 30)], # 34L
-
-                   [CodewordCounts([[22, 15], [41, 16]], 30),   # 35H
-                    CodewordCounts([[39, 24], [14, 25]], 30),   # 35Q
-                    CodewordCounts([[12, 47], [26, 48]], 28),   # 35M
-                    CodewordCounts([[12, 121], [7, 122]], 30)], # 35L
-
-                   [CodewordCounts([[2, 15], [64, 16]], 30),    # 36H
-                    CodewordCounts([[46, 24], [10, 25]], 30),   # 36Q
-                    CodewordCounts([[6, 47], [34, 48]], 28),    # 36M
-                    CodewordCounts([[6, 121], [14, 122]], 30)], # 36L
-
-                   [CodewordCounts([[24, 15], [46, 16]], 30),   # 37H
-                    CodewordCounts([[49, 24], [10, 25]], 30),   # 37Q
-                    CodewordCounts([[29, 46], [14, 47]], 28),   # 37M
-                    CodewordCounts([[17, 122], [4, 123]], 30)], # 37L
-
-                   [CodewordCounts([[42, 15], [32, 16]], 30),   # 38H
-                    CodewordCounts([[48, 24], [14, 25]], 30),   # 38Q
-                    CodewordCounts([[13, 46], [32, 47]], 28),   # 38M
-                    CodewordCounts([[4, 122], [18, 123]], 30)], # 38L
-
-                   [CodewordCounts([[10, 15], [67, 16]], 30),   # 39H
-                    CodewordCounts([[43, 24], [22, 25]], 30),   # 39Q
-                    CodewordCounts([[40, 47], [7, 48]], 28),    # 39M
-                    CodewordCounts([[20, 117], [4, 118]], 30)], # 39L
-
-                   [CodewordCounts([[20, 15], [61, 16]], 30),   # 40H
-                    CodewordCounts([[34, 24], [34, 25]], 30),   # 40Q
-                    CodewordCounts([[18, 47], [31, 48]], 28),   # 40M
-                    CodewordCounts([[19, 118], [6, 119]], 30)]] # 40L
-
-
-cleaned_data = sanitize_string(parsed_args.data)
-
-MODE_BITS = "0100" # byte mode
-
-char_count = f'{len(cleaned_data):08b}' # for byte mode, char_count needs to be 8 bits long (versions 1-9)
-
-# convert the characters to ISO 8859-1 encoding
-combined_enc_str = ""
-for char in cleaned_data:
-    combined_enc_str += f'{ord(char):08b}'
-
-data_bits = MODE_BITS + char_count + combined_enc_str
-
-CW_INFO = -1
-VERSION_NUM = -1
-EC_LVL = -1
-
-# figure out which version and error correction level we should use
-# cw_info[0] == info for ECL H
-# cw_info[1] == info for ECL Q
-# cw_info[2] == info for ECL M
-# cw_info[3] == info for ECL L
-for ver_num, cw in enumerate(CODEWORD_BLOCKS):
-    
-    if parsed_args.version_num > 0 and ver_num < parsed_args.version_num-1:
-        continue
-    
-    # if the version number is above 9, reassign data_bits with a 16 bit long char_count
-    if ver_num + 1 == 10 :
-        data_bits = MODE_BITS + f'{len(cleaned_data):016b}' + combined_enc_str
-
-    # unpack the cw array
-    h_cw_info, q_cw_info, m_cw_info, l_cw_info = cw
-    
-    if h_cw_info.getMaxDataBits() >= len(data_bits) and 'H' in parsed_args.error_correction: # H
-        CW_INFO = h_cw_info
-        VERSION_NUM = ver_num + 1
-        EC_LVL = 2 # Error correction level H == 2
-        break
-    elif q_cw_info.getMaxDataBits() >= len(data_bits) and 'Q' in parsed_args.error_correction: # Q
-        CW_INFO = q_cw_info
-        VERSION_NUM = ver_num + 1
-        EC_LVL = 3 # Error correction level Q == 3
-        break
-    elif m_cw_info.getMaxDataBits() >= len(data_bits) and 'M' in parsed_args.error_correction: # M
-        CW_INFO = m_cw_info
-        VERSION_NUM = ver_num + 1
-        EC_LVL = 0 # Error correction level M == 0
-        break
-    elif l_cw_info.getMaxDataBits() >= len(data_bits) and 'L' in parsed_args.error_correction: # L
-        CW_INFO = l_cw_info
-        VERSION_NUM = ver_num + 1
-        EC_LVL = 1 # Error correction level L == 1
-        break
-
-if VERSION_NUM == -1:
-    print("The data you entered is larger than the largest currently supported QR code version. The current maximum is", int(CODEWORD_BLOCKS[-1][-1].getMaxDataBits()/8)-2, "characters.")
-    exit(1)
-
-# add up to 4 zeroes as a terminator, making sure we don't go over the max length
-i = 0
-while i < 4 and len(data_bits) < CW_INFO.getMaxDataBits():
-    data_bits += "0"
-    i += 1
-
-# make the length of the bitstring a multiple of 8
-while len(data_bits) % 8 != 0:
-    data_bits += "0"
-
-# add padding bytes until we reach the required size
-while len(data_bits) < CW_INFO.getMaxDataBits():
-    data_bits += "1110110000010001"
-# if we went over by one byte, remove the extra byte
-if len(data_bits) > CW_INFO.getMaxDataBits():
-    data_bits = data_bits[:-8]
-    
-assert len(data_bits) == CW_INFO.getMaxDataBits()
-
-# initialize Galois Field
-gf = GaloisField()
-
-# construct the message_ints and eccw_ints arrays
-# message_ints/eccw_ints = [group1, group2]
-# groupX = [block1, block2, ...]
-# blockX = [datacw1, datacw1, ...]
-i = 0
-message_ints = []
-eccw_ints = []
-for group_num in range(CW_INFO.getGroupsCount()):
-    group = []
-    ec_group = []
-    for block_num in range(CW_INFO.getBlocksCount(group_num)):
-        block = []
-        for cw in range(CW_INFO.getDataCWCount(group_num)):
-            block.append(int(data_bits[i:i+8], 2))
-            i += 8
-        group.append(block)
-        ec_group.append(calculate_error_correction(block, CW_INFO.getECCWCount(), gf))
-    message_ints.append(group)
-    eccw_ints.append(ec_group)
-
-
-
-# data from messages and error correction codes must be interleaved as following:
-# first message int from first block in first group, first message int from second block in first group, first message int from first block in second group, first message int from second block in second group, second message int from first block in first group, etc.
-# immediately following the message ints, the error correction codes are interleaved:
-# first ec int from first block in first group, first ec int from second block in first group, first ec int from first block in second group, first ec from second block in second group, second ec int from first block in first group, etc.
-
-content_ints = []
-
-# if there are 2 groups, handle their more complicated interleaving 
-if CW_INFO.getGroupsCount() > 1:
-    i = 0
-    j = 0
-    
-    while i < CW_INFO.getDataCWCount(0) or j < CW_INFO.getDataCWCount(1):
-        if i < CW_INFO.getDataCWCount(0):
-            for block_num in range(CW_INFO.getBlocksCount(0)):
-                content_ints.append(message_ints[0][block_num][i])
-            i += 1
-            
-        if j < CW_INFO.getDataCWCount(1):
-            for block_num in range(CW_INFO.getBlocksCount(1)):
-                content_ints.append(message_ints[1][block_num][j])
-            j += 1
-
-else:
-    for cw_num in range(CW_INFO.getDataCWCount(0)): 
-        for group_num in range(CW_INFO.getGroupsCount()):
-            for block_num in range(CW_INFO.getBlocksCount(group_num)):
-                content_ints.append(message_ints[group_num][block_num][cw_num])
-                
-# interleave the error correction codes, adding them immediately after the message data
-for cw_num in range(CW_INFO.getECCWCount()):
-    for group_num in range(CW_INFO.getGroupsCount()):
-        for block_num in range(CW_INFO.getBlocksCount(group_num)):
-            content_ints.append(eccw_ints[group_num][block_num][cw_num])
-
-# convert the list of ints to a bitstring
-content_bits = ""
-for cont_int in content_ints:
-    content_bits += f'{cont_int:08b}'
-
-MODULES_PER_EDGE = (((VERSION_NUM - 1) * 4) + 21)
-IMAGE_RESOLUTION = 512 # lower bound on image resolution
-
-rounded_resolution = 0
-while rounded_resolution < IMAGE_RESOLUTION:
-    rounded_resolution += (MODULES_PER_EDGE+2)
-
-module_size = int(rounded_resolution/(MODULES_PER_EDGE+2))
-
-qr_image = Image.new(mode="P",size=[rounded_resolution, rounded_resolution], color="white")
-pixel_arr = qr_image.load()
-
-data_list = MovableHeadArray([int(x) for x in list(content_bits)])
-
-module_arr = ModuleArray(pixel_arr, VERSION_NUM, MODULES_PER_EDGE, module_size)
-
-# Add the data bits to the right of the left finder pattern
-for x in range(MODULES_PER_EDGE-1, 8, -4):
-    for y in range(MODULES_PER_EDGE-1, -1, -1):
-        data_list.curr_index += 1 if module_arr.update_module(x, y, data_list.get_head()) == 0 else 0
-        data_list.curr_index += 1 if module_arr.update_module(x-1, y, data_list.get_head()) == 0 else 0
-    for y in range(0, MODULES_PER_EDGE, 1):
-        data_list.curr_index += 1 if module_arr.update_module(x-2, y, data_list.get_head()) == 0 else 0
-        data_list.curr_index += 1 if module_arr.update_module(x-3, y, data_list.get_head()) == 0 else 0
-        
-# Data bits between the top left and bottom left finder paterns
-for y in range(MODULES_PER_EDGE-9, 8, -1):
-    data_list.curr_index += 1 if module_arr.update_module(8, y, data_list.get_head()) == 0 else 0
-    data_list.curr_index += 1 if module_arr.update_module(7, y, data_list.get_head()) == 0 else 0
-for y in range(9, MODULES_PER_EDGE-8, 1):
-    data_list.curr_index += 1 if module_arr.update_module(5, y, data_list.get_head()) == 0 else 0
-    data_list.curr_index += 1 if module_arr.update_module(4, y, data_list.get_head()) == 0 else 0
-for y in range(MODULES_PER_EDGE-9, 8, -1):
-    data_list.curr_index += 1 if module_arr.update_module(3, y, data_list.get_head()) == 0 else 0
-    data_list.curr_index += 1 if module_arr.update_module(2, y, data_list.get_head()) == 0 else 0
-for y in range(9, MODULES_PER_EDGE-8, 1):
-    data_list.curr_index += 1 if module_arr.update_module(1, y, data_list.get_head()) == 0 else 0
-    data_list.curr_index += 1 if module_arr.update_module(0, y, data_list.get_head()) == 0 else 0
-
-# apply mask
-qr_masks = QrMask(MODULES_PER_EDGE, EC_LVL)
-if parsed_args.mask > 0:
-    module_arr = qr_masks.apply_specific_mask(module_arr, parsed_args.mask)
-else:
-    qr_image = qr_masks.apply_best_mask(qr_image, module_arr)
-
-trans_ec_lvl = ["M", "L", "H", "Q"]
-filename = f"./image-{VERSION_NUM}{trans_ec_lvl[EC_LVL]}.png"
-
-try:
-    qr_image.save(filename) #, bits=1) # for some reason if bits is left as default (8), the image cannot be loaded on mobile devices
-except Exception as e:
-    print("Error saving file:", e)
 else:
-    print(f"Output saved as {filename}")
\ No newline at end of file
+    try:
+        qr_symbol = generate_qr_code(parsed_args.data, parsed_args.err_corr, parsed_args.version_num, parsed_args.mask, timer, backend=parsed_args.backend, mask_strategy=mask_strategy, micro=parsed_args.micro)
+        if parsed_args.verify:
+            with timer.phase("verify"):
+                verify_symbol(qr_symbol, parsed_args.data)
+    except ValueError as e:
+        print(e)
+        exit(1)
+
+    # when the code itself goes to stdout, everything else goes to stderr
+    info_file = stderr if parsed_args.output == "-" else stdout
+
+    if qr_symbol.mask_report is not None:
+        print(dumps(qr_symbol.mask_report), file=info_file)
+
+    if parsed_args.output is None:
+        filename = qr_symbol.get_default_filename()
+        if parsed_args.matrix is not None:
+            filename = filename[:-len(".png")] + "." + parsed_args.matrix
+    elif is_name_template(parsed_args.output):
+        filename = format_output_name(parsed_args.output, qr_symbol.get_version_name(), qr_symbol.ec_lvl, qr_symbol.mask_num, data=sanitize_string(parsed_args.data))
+    else:
+        filename = parsed_args.output
+    output_format = parsed_args.matrix or ("png" if filename == "-" else get_output_format(filename))
+
+    if parsed_args.sizes is not None:
+        try:
+            with timer.phase("render_sizes"):
+                images = qr_symbol.render_sizes(size_targets)
+        except ValueError as e:
+            print(e)
+            exit(1)
+
+    try:
+        with timer.phase("save"):
+            if filename == "-":
+                qr_symbol.save(stdout.buffer, output_format)
+                stdout.buffer.flush()
+            else:
+                if os.path.dirname(filename):
+                    os.makedirs(os.path.dirname(filename), exist_ok=True)
+                if parsed_args.sizes is not None:
+                    filenames = [get_size_filename(filename, target) for target in size_targets]
+                    for size_filename, image in zip(filenames, images):
+                        image.save(size_filename, format="PNG")
+                else:
+                    qr_symbol.save(filename, output_format)
+                    filenames = [filename]
+    except Exception as e:
+        print("Error saving file:", e, file=info_file)
+    else:
+        for saved_filename in filenames if filename != "-" else []:
+            print(f"Output saved as {saved_filename}")
+
+if parsed_args.profile_file is not None:
+    with open(parsed_args.profile_file, "w") as profile_file:
+        profile_file.write(timer.to_json() + "\n")
+elif parsed_args.profile:
+    print(timer.to_json(), file=stderr)
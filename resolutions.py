@@ -0,0 +1,54 @@
+import os
+from PIL import Image
+from capacity import get_target_module_size
+
+
+# Several image sizes of one symbol (1x, 2x, 3x, a thumbnail, ...) drawn straight from its module matrix,
+# instead of encoding the data again for every size or resampling one large image.
+# A target is either a scale of the default size ("2x", "0.5x") or an edge length in pixels (512 or "512").
+# Modules are always a whole number of pixels, so a pixel target gives the largest image that fits in it
+# (but never less than one pixel per module). "1x" is exactly the image generate_qr_code renders.
+
+
+
+# render qr_symbol at every target in one pass over its rows, returns the images in the same order as targets
+def render_resolutions(qr_symbol, targets, quiet_zone=1):
+    return render_module_bytes(qr_symbol.get_module_bytes(), qr_symbol.modules_per_edge, targets, quiet_zone)
+
+# the same from one byte per module (see QrSymbol.get_module_bytes), for symbols that only exist as a matrix
+def render_module_bytes(module_bytes, modules_per_edge, targets, quiet_zone=1):
+    module_sizes = [get_target_module_size(target, modules_per_edge, quiet_zone) for target in targets]
+
+    # rows of pixels for every distinct module size, sizes asked for more than once are only drawn once
+    outputs = {}
+    for module_size in module_sizes:
+        if module_size not in outputs:
+            image_size = module_size * (modules_per_edge + 2*quiet_zone)
+            light, dark = bytes(module_size), b"\x01" * module_size
+            quiet_edge = bytes(module_size * quiet_zone)
+            quiet_rows = bytes(image_size) * (module_size * quiet_zone)
+            outputs[module_size] = (light, dark, quiet_edge, [quiet_rows])
+
+    for y in range(modules_per_edge):
+        row = module_bytes[y*modules_per_edge:(y+1)*modules_per_edge]
+        for module_size, (light, dark, quiet_edge, pixel_rows) in outputs.items():
+            pixel_row = quiet_edge + b"".join(dark if module else light for module in row) + quiet_edge
+            pixel_rows.append(pixel_row * module_size)
+
+    images = {}
+    for module_size, (_, _, _, pixel_rows) in outputs.items():
+        pixel_rows.append(pixel_rows[0])
+        image_size = module_size * (modules_per_edge + 2*quiet_zone)
+        # same palette image as generate_qr_code: index 0 is white and index 1 black
+        image = Image.new(mode="P", size=[image_size, image_size], color="white")
+        image.frombytes(b"".join(pixel_rows))
+        images[module_size] = image
+    return [images[module_size] for module_size in module_sizes]
+
+
+# filename for one of the sizes, image-3M.png becomes image-3M@2x.png or image-3M@512px.png
+def get_size_filename(filename, target):
+    base_path, extension = os.path.splitext(filename)
+    target = str(target).strip().lower()
+    suffix = target if target.endswith("x") else f"{target}px"
+    return f"{base_path}@{suffix}{extension or '.png'}"
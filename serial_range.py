@@ -0,0 +1,81 @@
+from template import QrTemplate
+from batch import encode_to_result
+from masks import EXHAUSTIVE
+from encoder import TRANS_EC_LVL, sanitize_string
+from profiling import NULL_TIMER
+from multiprocessing import Pool
+from string import Formatter
+
+
+# Serial number runs like SKU-000001 ... SKU-500000, made from a format string and a range of numbers.
+# Everything before the first replacement field of the format string is encoded once as a QrTemplate
+# (see template.py), so every number only pays for the codewords that change. The numbers are never
+# put in a list: the range is cut into chunks that are handed to the workers as they become free.
+
+DEFAULT_CHUNK_LENGTH = 64
+
+
+
+# the literal text in front of the first replacement field, e.g. "SKU-" for "SKU-{:06d}"
+# Formatter.parse splits the text at escaped braces, so "A{{x}}-{:d}" gives "A{", "x}" and "-" before the field
+def get_constant_prefix(serial_format):
+    prefix = ""
+    for literal_text, field_name, _, _ in Formatter().parse(serial_format):
+        prefix += literal_text
+        if field_name is not None:
+            return prefix
+    raise ValueError(f"The serial format {serial_format!r} needs a replacement field for the number, e.g. SKU-{{:06d}}")
+
+def format_serial(serial_format, number):
+    return serial_format.format(number)
+
+
+# template for the whole run, large enough for the longest formatted number
+def make_serial_template(serial_format, numbers, err_corr="LMQH", version_num=0):
+    prefix = get_constant_prefix(serial_format)
+    # lengths are counted after sanitize_string, like the data that ends up in the symbols
+    if len(numbers) == 0:
+        max_length = len(sanitize_string(prefix))
+    else:
+        # the widest numbers are at the ends of the range
+        max_length = max(len(sanitize_string(format_serial(serial_format, numbers[0]))), len(sanitize_string(format_serial(serial_format, numbers[-1]))))
+    return QrTemplate(prefix, err_corr, version_num, max_length - len(sanitize_string(prefix)))
+
+
+def encode_serial(template, serial_format, number, mask=-1, verify=False, timer=NULL_TIMER, mask_strategy=EXHAUSTIVE, output="png"):
+    data = format_serial(serial_format, number)
+    # template.prefix is sanitized, so the suffix is cut from the sanitized data
+    suffix = sanitize_string(data)[len(template.prefix):]
+    return encode_to_result(number, data, lambda: template.generate(suffix, mask, timer, mask_strategy), verify, timer, output)
+
+
+
+# every worker process builds the run's template once, when it starts
+_worker_template = None
+
+def init_worker(prefix, err_corr, version_num):
+    global _worker_template
+    _worker_template = QrTemplate(prefix, err_corr, version_num)
+
+def encode_chunk(args):
+    serial_format, numbers, mask, verify, mask_strategy, output = args
+    return [encode_serial(_worker_template, serial_format, number, mask, verify, mask_strategy=mask_strategy, output=output) for number in numbers]
+
+
+# encode format_serial(serial_format, n) for every n in range(start, stop, step), in order
+# yields a BatchResult per number whose index is the number, so the files are named after it
+# every symbol has the same version and ECL, picked for the longest number in the range
+def generate_serial_range(serial_format, start, stop, step=1, err_corr="LMQH", version_num=0, mask=-1, workers=1, verify=False, timer=NULL_TIMER, mask_strategy=EXHAUSTIVE, chunk_length=DEFAULT_CHUNK_LENGTH, output="png"):
+    numbers = range(start, stop, step)
+    template = make_serial_template(serial_format, numbers, err_corr, version_num)
+
+    if workers > 1:
+        # slicing a range gives another range, so the chunks are as lazy as the range itself
+        chunks = ((serial_format, numbers[i:i+chunk_length], mask, verify, mask_strategy, output) for i in range(0, len(numbers), chunk_length))
+        init_args = (template.prefix, TRANS_EC_LVL[template.ec_lvl], template.version_num)
+        with Pool(workers, init_worker, init_args) as pool:
+            for results in pool.imap(encode_chunk, chunks):
+                yield from results
+    else:
+        for number in numbers:
+            yield encode_serial(template, serial_format, number, mask, verify, timer, mask_strategy, output)
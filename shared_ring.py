@@ -0,0 +1,133 @@
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from threading import Semaphore, Event
+from functools import partial
+from io import BytesIO
+from time import perf_counter
+from encoder import generate_qr_code
+from decoder import verify_symbol
+from masks import EXHAUSTIVE
+from container import get_row_bytes, unpack_matrix
+from batch import BatchResult
+from resolutions import render_module_bytes
+
+
+# Shared memory transport for the multiprocess batch path (batch.run_jobs with transport="shared_memory").
+# Workers write the packed module matrix of every code into a slot of a ring buffer in shared memory and only
+# send back a small tuple of fixed size, so nothing that grows with the version is pickled between processes.
+# The parent reads each slot in input order and turns it into a BatchResult, rendering the PNG itself when the
+# output is "png" (the image is identical to the one the encoder draws).
+#
+# Slots are handed out in input order and a slot is only given to a new job once the parent has read the
+# result that was in it, so there are never more than slot_count codes waiting between the workers and the parent.
+
+MAX_MODULES_PER_EDGE = 177
+SLOT_SIZE = MAX_MODULES_PER_EDGE * get_row_bytes(MAX_MODULES_PER_EDGE)
+
+
+
+# slot_count slots of SLOT_SIZE bytes, created by the parent and attached to by name in the workers
+class SlotRing:
+
+    def __init__(self, slot_count, name=None):
+        self.slot_count = slot_count
+        if name is None:
+            self.memory = SharedMemory(create=True, size=slot_count * SLOT_SIZE)
+        else:
+            self.memory = SharedMemory(name)
+        self.name = self.memory.name
+
+    def write_slot(self, slot_num, data):
+        start = slot_num * SLOT_SIZE
+        self.memory.buf[start:start + len(data)] = data
+
+    # a copy of the first length bytes of the slot, so no view into the shared memory outlives close()
+    def read_slot(self, slot_num, length):
+        start = slot_num * SLOT_SIZE
+        return bytes(self.memory.buf[start:start + length])
+
+    def close(self):
+        self.memory.close()
+
+    def unlink(self):
+        self.memory.unlink()
+
+
+
+# the ring of the worker process, attached once by init_worker
+_worker_ring = None
+
+def init_worker(name, slot_count):
+    global _worker_ring
+    _worker_ring = SlotRing(slot_count, name)
+
+
+# encode one job in a worker and put its packed matrix in the job's slot
+# returns (version_num, ec_lvl, mask_num, error, encode_time), error is None if the job was encoded
+def encode_to_slot(slotted_job, verify=False, backend="pil", mask_strategy=EXHAUSTIVE):
+    slot_num, (index, data, err_corr, version_num, mask, header_bits) = slotted_job
+    start_time = perf_counter()
+    try:
+        qr_symbol = generate_qr_code(data, err_corr, version_num, mask, header_bits=header_bits, backend=backend, mask_strategy=mask_strategy)
+        if verify:
+            verify_symbol(qr_symbol, data)
+    except ValueError as e:
+        return -1, -1, -1, str(e), perf_counter() - start_time
+    _worker_ring.write_slot(slot_num, qr_symbol.get_packed_rows())
+    return qr_symbol.version_num, qr_symbol.ec_lvl, qr_symbol.mask_num, None, perf_counter() - start_time
+
+
+# the BatchResult of a job from its slot and the tuple encode_to_slot returned
+def read_result(ring, slot_num, job, outcome, output="png"):
+    index, data = job[0], job[1]
+    version_num, ec_lvl, mask_num, error, encode_time = outcome
+    if error is not None:
+        result = BatchResult(index, None, error=error)
+    else:
+        modules_per_edge = ((version_num - 1) * 4) + 21
+        packed = ring.read_slot(slot_num, modules_per_edge * get_row_bytes(modules_per_edge))
+        if output == "matrix":
+            result = BatchResult(index, None, version_num, ec_lvl, mask_num=mask_num, packed_matrix=packed)
+        else:
+            module_bytes = bytes(module for row in unpack_matrix(packed, modules_per_edge) for module in row)
+            buffer = BytesIO()
+            render_module_bytes(module_bytes, modules_per_edge, ["1x"])[0].save(buffer, format="PNG")
+            result = BatchResult(index, buffer.getvalue(), version_num, ec_lvl, mask_num=mask_num)
+    result.data = data
+    result.encode_time = encode_time
+    return result
+
+
+# batch.run_jobs for workers > 1 over a SlotRing, results are yielded in input order
+def run_jobs_shared(jobs, workers, verify=False, backend="pil", chunksize=8, mask_strategy=EXHAUSTIVE, output="png"):
+    # enough slots for every worker to have a chunk in hand and another one waiting to be read
+    slot_count = 2 * workers * chunksize
+    ring = SlotRing(slot_count)
+    free_slots = Semaphore(slot_count)
+    stopped = Event()
+    sent_jobs = {}
+
+    # runs in the pool's task handler thread, which waits here until the parent has read a slot
+    def slotted_jobs():
+        for sequence, job in enumerate(jobs):
+            free_slots.acquire()
+            if stopped.is_set():
+                return
+            sent_jobs[sequence] = job
+            yield sequence % slot_count, job
+
+    try:
+        with Pool(workers, init_worker, (ring.name, slot_count)) as pool:
+            try:
+                outcomes = pool.imap(partial(encode_to_slot, verify=verify, backend=backend, mask_strategy=mask_strategy), slotted_jobs(), chunksize)
+                for sequence, outcome in enumerate(outcomes):
+                    result = read_result(ring, sequence % slot_count, sent_jobs.pop(sequence), outcome, output)
+                    free_slots.release()
+                    yield result
+            finally:
+                # wake up the task handler if it is waiting for a slot, so the pool can shut down
+                stopped.set()
+                free_slots.release(slot_count)
+    finally:
+        ring.close()
+        ring.unlink()
@@ -0,0 +1,261 @@
+import os
+import zlib
+from PIL import Image, ImageDraw, ImageFont, TiffImagePlugin, features, __version__ as PILLOW_VERSION
+from sinks import FileSink
+
+
+# Print sheets: codes are laid out in a grid on page-sized bitmaps, straight from their module matrices,
+# so there are no per-code PNGs to write and decode again. Only the page being filled is kept in memory;
+# every finished page is handed to a page writer (PDF, multi-page TIFF or one PNG per page) right away.
+
+MM_PER_INCH = 25.4
+PAGE_SIZES = {"a4": (210, 297), "letter": (215.9, 279.4), "a5": (148, 210)}
+SHEET_EXTENSIONS = [".pdf", ".tif", ".tiff", ".png"]
+# major Pillow versions whose TiffImagePlugin.AppendingTiffWriter TiffPageWriter was checked against
+TIFF_APPEND_PILLOW_VERSIONS = range(9, 13)
+
+
+
+def mm_to_pixels(mm, dpi):
+    return int(round(mm / MM_PER_INCH * dpi))
+
+
+# page size, grid and code size of a print sheet, all lengths in mm
+# caption(item) is called for every code and returns the text printed below it, or None for no caption
+class SheetLayout:
+
+    def __init__(self, page_size=PAGE_SIZES["a4"], dpi=300, margin=10, gap=5, code_size=30, caption=None, caption_height=4, quiet_zone=1):
+        self.dpi = dpi
+        self.caption = caption
+        self.quiet_zone = quiet_zone
+        self.page_width = mm_to_pixels(page_size[0], dpi)
+        self.page_height = mm_to_pixels(page_size[1], dpi)
+        self.margin = mm_to_pixels(margin, dpi)
+        self.gap = mm_to_pixels(gap, dpi)
+        self.code_size = mm_to_pixels(code_size, dpi)
+        self.caption_height = mm_to_pixels(caption_height, dpi) if caption is not None else 0
+
+        self.cell_width = self.code_size
+        self.cell_height = self.code_size + self.caption_height
+        self.columns = (self.page_width - 2*self.margin + self.gap) // (self.cell_width + self.gap)
+        self.rows = (self.page_height - 2*self.margin + self.gap) // (self.cell_height + self.gap)
+        if self.columns < 1 or self.rows < 1:
+            raise ValueError("Not even one code fits on the page, use smaller codes or margins")
+
+    def get_codes_per_page(self):
+        return self.columns * self.rows
+
+    # top left corner of cell number cell_num on the page
+    def get_cell_position(self, cell_num):
+        row, column = divmod(cell_num, self.columns)
+        return self.margin + column * (self.cell_width + self.gap), self.margin + row * (self.cell_height + self.gap)
+
+
+
+# fills pages with codes and passes every full page to on_page(page_image)
+class SheetComposer:
+
+    def __init__(self, layout, on_page):
+        self.layout = layout
+        self.on_page = on_page
+        self.page = None
+        self.cell_num = 0
+        self.page_count = 0
+        # caption fonts by size, captions that are too wide for their cell get a smaller font
+        self.fonts = {}
+
+    def new_page(self):
+        # mode "1": white is 1, so the PDF and TIFF writers can store the bits as they are
+        self.page = Image.new("1", (self.layout.page_width, self.layout.page_height), 1)
+        self.cell_num = 0
+
+    def add(self, matrix, item=None):
+        if self.page is None:
+            self.new_page()
+        layout = self.layout
+        modules_per_edge = len(matrix)
+        module_size = layout.code_size // (modules_per_edge + 2*layout.quiet_zone)
+        if module_size < 1:
+            raise ValueError(f"A {modules_per_edge}x{modules_per_edge} code does not fit in {layout.code_size} pixels, use larger codes or a higher DPI")
+
+        # one grey pixel per module, scaled up to whole pixels per module and centered in the cell
+        code_image = Image.frombytes("L", (modules_per_edge, modules_per_edge), bytes(0 if module else 255 for row in matrix for module in row))
+        code_image = code_image.resize((modules_per_edge * module_size, modules_per_edge * module_size), Image.NEAREST).convert("1")
+        cell_x, cell_y = layout.get_cell_position(self.cell_num)
+        offset = (layout.code_size - modules_per_edge * module_size) // 2
+        self.page.paste(code_image, (cell_x + offset, cell_y + offset))
+
+        if layout.caption is not None:
+            text = layout.caption(item)
+            if text:
+                font, text = self.fit_caption(str(text))
+                draw = ImageDraw.Draw(self.page)
+                draw.text((cell_x + layout.cell_width // 2, cell_y + layout.code_size + layout.caption_height // 2), text, fill=0, font=font, anchor="mm")
+
+        self.cell_num += 1
+        if self.cell_num == layout.get_codes_per_page():
+            self.flush()
+
+    def get_font(self, size):
+        if size not in self.fonts:
+            try:
+                self.fonts[size] = ImageFont.load_default(size)
+            except TypeError: # Pillow < 10.1 only has the fixed size bitmap font
+                self.fonts[size] = ImageFont.load_default()
+        return self.fonts[size]
+
+    # shrink the font until text fits in the cell, down to half the normal size,
+    # and if it still doesn't fit, cut off the start of it since the end is usually what differs between codes
+    def fit_caption(self, text):
+        max_size = max(1, self.layout.caption_height * 3 // 4)
+        font = self.get_font(max_size)
+        text_width = font.getlength(text)
+        if text_width > self.layout.cell_width:
+            font = self.get_font(max(max_size // 2, int(max_size * self.layout.cell_width / text_width)))
+        while len(text) > 1 and font.getlength(text) > self.layout.cell_width:
+            text = "..." + text[4:] if text.startswith("...") else "..." + text[3:]
+        return font, text
+
+    # hand the current page to on_page, even if it isn't full yet
+    def flush(self):
+        if self.page is not None:
+            self.on_page(self.page)
+            self.page_count += 1
+            self.page = None
+
+
+
+# writes pages as they come into one PDF, with a page of image XObject per sheet
+class PdfPageWriter:
+
+    def __init__(self, path, dpi):
+        self.file = open(path, "wb")
+        self.dpi = dpi
+        # object 1 is the catalog and object 2 the page tree, both written last
+        self.offsets = {}
+        self.page_ids = []
+        self.file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def write_object(self, object_id, body, stream=None):
+        self.offsets[object_id] = self.file.tell()
+        self.file.write(f"{object_id} 0 obj\n".encode() + body)
+        if stream is not None:
+            self.file.write(b"\nstream\n" + stream + b"\nendstream")
+        self.file.write(b"\nendobj\n")
+
+    def write_page(self, page):
+        page_id = 3 + 3 * len(self.page_ids)
+        width = page.width * 72 / self.dpi
+        height = page.height * 72 / self.dpi
+        image_data = zlib.compress(page.tobytes())
+        contents = f"q {width:.2f} 0 0 {height:.2f} 0 0 cm /Im0 Do Q".encode()
+        self.write_object(page_id, f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width:.2f} {height:.2f}] /Resources << /XObject << /Im0 {page_id+2} 0 R >> >> /Contents {page_id+1} 0 R >>".encode())
+        self.write_object(page_id+1, f"<< /Length {len(contents)} >>".encode(), contents)
+        self.write_object(page_id+2, f"<< /Type /XObject /Subtype /Image /Width {page.width} /Height {page.height} /ColorSpace /DeviceGray /BitsPerComponent 1 /Filter /FlateDecode /Length {len(image_data)} >>".encode(), image_data)
+        self.page_ids.append(page_id)
+
+    def close(self):
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self.write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode())
+        self.write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref_offset = self.file.tell()
+        object_count = max(self.offsets) + 1
+        self.file.write(f"xref\n0 {object_count}\n0000000000 65535 f \n".encode())
+        for object_id in range(1, object_count):
+            self.file.write(f"{self.offsets[object_id]:010d} 00000 n \n".encode())
+        self.file.write(f"trailer\n<< /Size {object_count} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+        self.file.close()
+
+
+def can_append_tiff_pages():
+    return int(PILLOW_VERSION.split(".")[0]) in TIFF_APPEND_PILLOW_VERSIONS and hasattr(TiffImagePlugin, "AppendingTiffWriter")
+
+
+# writes pages into one multi-page TIFF
+# The public save_all/append_images API needs every page in memory at once, so on the Pillow versions in
+# TIFF_APPEND_PILLOW_VERSIONS each page is appended as it comes with AppendingTiffWriter, the undocumented class
+# save_all uses itself. Any other version (or append_pages=False) keeps the pages and writes them with save_all on close.
+class TiffPageWriter:
+
+    def __init__(self, path, dpi, append_pages=None):
+        self.path = path
+        self.dpi = dpi
+        self.compression = "group4" if features.check("libtiff") else None
+        if append_pages is None:
+            append_pages = can_append_tiff_pages()
+        self.writer = TiffImagePlugin.AppendingTiffWriter(path, True) if append_pages else None
+        self.pages = []
+
+    def write_page(self, page):
+        if self.writer is None:
+            self.pages.append(page)
+            return
+        page.save(self.writer, format="TIFF", dpi=(self.dpi, self.dpi), compression=self.compression)
+        self.writer.newFrame()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        elif self.pages:
+            self.pages[0].save(self.path, format="TIFF", save_all=True, append_images=self.pages[1:], dpi=(self.dpi, self.dpi), compression=self.compression)
+            self.pages = []
+
+
+# writes every page to its own PNG, sheet.png becomes sheet-1.png, sheet-2.png, ...
+class PngPageWriter:
+
+    def __init__(self, path, dpi):
+        self.base_path, self.extension = os.path.splitext(path)
+        self.dpi = dpi
+        self.page_count = 0
+
+    def write_page(self, page):
+        self.page_count += 1
+        page.save(f"{self.base_path}-{self.page_count}{self.extension}", dpi=(self.dpi, self.dpi))
+
+    def close(self):
+        pass
+
+
+def open_page_writer(path, dpi):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".pdf":
+        return PdfPageWriter(path, dpi)
+    if extension in (".tif", ".tiff"):
+        return TiffPageWriter(path, dpi)
+    if extension == ".png":
+        return PngPageWriter(path, dpi)
+    raise ValueError(f"Unknown sheet type for {path!r}, expected one of {', '.join(SHEET_EXTENSIONS)}")
+
+
+
+# lay out every item (anything with get_matrix(), like a QrSymbol or a ContainerRecord) on pages written to path
+# returns the number of pages
+def write_sheets(items, path, layout):
+    writer = open_page_writer(path, layout.dpi)
+    composer = SheetComposer(layout, writer.write_page)
+    try:
+        for item in items:
+            composer.add(item.get_matrix(), item)
+        composer.flush()
+    finally:
+        writer.close()
+    return composer.page_count
+
+
+
+# sink (see sinks.py) that puts every batch or serial result on a print sheet
+class SheetSink(FileSink):
+
+    output = "matrix"
+
+    def __init__(self, path, layout):
+        self.writer = open_page_writer(path, layout.dpi)
+        self.composer = SheetComposer(layout, self.writer.write_page)
+
+    def write(self, result):
+        self.composer.add(result.get_matrix(), result)
+
+    def close(self):
+        self.composer.flush()
+        self.writer.close()
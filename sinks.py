@@ -0,0 +1,136 @@
+import os
+import tarfile
+from io import BytesIO
+from time import time
+from zipfile import ZipFile, ZIP_STORED
+from hashlib import sha1
+from string import Formatter
+from container import ContainerWriter
+from encoder import TRANS_EC_LVL
+
+
+# Where batch and serial results go. Every sink writes each BatchResult as soon as it arrives,
+# so memory use doesn't grow with the size of the run and no temporary files are needed.
+# sink.output tells the encoder what each result has to hold (see batch.OUTPUT_FORMATS).
+
+ARCHIVE_EXTENSIONS = [".zip", ".tar", ".tar.gz", ".tgz", ".qrc"]
+NAME_TEMPLATE_FIELDS = ["version", "ecl", "mask", "index", "count", "hash", "pid"]
+
+
+
+def is_name_template(path):
+    return "{" in path
+
+# whether name_template has a replacement field for field, e.g. "count" in "{index}of{count}.png"
+def uses_template_field(name_template, field):
+    try:
+        return any(field_name == field for _, field_name, _, _ in Formatter().parse(name_template))
+    except ValueError:
+        return False
+
+# fill in a naming template like "out/{index}-{version}{ecl}.png"
+# hash is the start of the SHA-1 of the data and pid the process id, so parallel runs don't overwrite each other
+def format_output_name(name_template, version_num, ec_lvl, mask_num=-1, index=1, count=1, data=""):
+    try:
+        return name_template.format(version=version_num, ecl=TRANS_EC_LVL[ec_lvl], mask=mask_num, index=index, count=count,
+                                    hash=sha1(data.encode("latin-1", "ignore")).hexdigest()[:12], pid=os.getpid())
+    except (KeyError, IndexError) as e:
+        raise ValueError(f"Unknown field {e} in the output name {name_template!r}, the fields are {', '.join(NAME_TEMPLATE_FIELDS)}")
+
+
+
+# one PNG file per code, named by BatchResult.get_default_filename or by name_template (see format_output_name)
+# count is the number of codes in the run, which a name_template using {count} can't do without
+class FileSink:
+
+    output = "png"
+
+    def __init__(self, directory=".", name_template=None, count=None):
+        if count is None and name_template is not None and uses_template_field(name_template, "count"):
+            raise ValueError(f"The output name {name_template!r} uses {{count}}, but the number of codes isn't known")
+        self.directory = directory
+        self.name_template = name_template
+        self.count = count
+
+    def write(self, result):
+        if self.name_template is not None:
+            filename = format_output_name(self.name_template, result.version_num, result.ec_lvl, result.mask_num, result.index, self.count, result.data or "")
+            if os.path.dirname(filename):
+                os.makedirs(os.path.dirname(filename), exist_ok=True)
+        else:
+            filename = os.path.join(self.directory, os.path.basename(result.get_default_filename()))
+        with open(filename, "wb") as image_file:
+            image_file.write(result.png_bytes)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+
+# every PNG as a member of one ZIP file, stored as is since PNGs are already compressed
+class ZipSink(FileSink):
+
+    def __init__(self, path):
+        self.archive = ZipFile(path, "w", ZIP_STORED)
+
+    def write(self, result):
+        self.archive.writestr(os.path.basename(result.get_default_filename()), result.png_bytes)
+
+    def close(self):
+        self.archive.close()
+
+
+
+# every PNG as a member of one tar file, gzipped if path ends in .tar.gz or .tgz
+class TarSink(FileSink):
+
+    def __init__(self, path):
+        self.archive = tarfile.open(path, "w:gz" if path.endswith((".tar.gz", ".tgz")) else "w")
+
+    def write(self, result):
+        member = tarfile.TarInfo(os.path.basename(result.get_default_filename()))
+        member.size = len(result.png_bytes)
+        member.mtime = int(time())
+        self.archive.addfile(member, BytesIO(result.png_bytes))
+
+    def close(self):
+        self.archive.close()
+
+
+
+# the packed module matrices in one indexed container (see container.py), no images at all
+class ContainerSink(FileSink):
+
+    output = "matrix"
+
+    def __init__(self, path, append=False):
+        self.writer = ContainerWriter(path, append)
+
+    def write(self, result):
+        self.writer.write(result.index, result.version_num, result.ec_lvl, result.mask_num, result.packed_matrix)
+
+    def close(self):
+        self.writer.close()
+
+
+
+# pick a sink from the path: nothing or a directory means one file per code, a naming template one file
+# per code named after it (count is the number of codes, see FileSink), otherwise the extension decides
+def open_sink(path=None, append=False, count=None):
+    if path is None or os.path.isdir(path):
+        return FileSink(path or ".")
+    if is_name_template(path):
+        return FileSink(name_template=path, count=count)
+    if path.endswith(".zip"):
+        return ZipSink(path)
+    if path.endswith((".tar", ".tar.gz", ".tgz")):
+        return TarSink(path)
+    if path.endswith(".qrc"):
+        return ContainerSink(path, append)
+    raise ValueError(f"Unknown archive type for {path!r}, expected a directory, a naming template or one of {', '.join(ARCHIVE_EXTENSIONS)}")
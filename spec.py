@@ -0,0 +1,79 @@
+from spec_tables import CODEWORD_TABLE, ALIGNMENT_PATTERN_LOCS, FORMAT_WORDS, VERSION_WORDS
+from functools import lru_cache
+
+
+# Tables from the QR code specification, shared by every symbol and never modified.
+# The large tables live in spec_tables.py, which is generated and checked by gen_spec_tables.py.
+
+FINDER_PATTERN = ((0,0,0,0,0,0,0,0,0),
+                  (0,1,1,1,1,1,1,1,0),
+                  (0,1,0,0,0,0,0,1,0),
+                  (0,1,0,1,1,1,0,1,0),
+                  (0,1,0,1,1,1,0,1,0),
+                  (0,1,0,1,1,1,0,1,0),
+                  (0,1,0,0,0,0,0,1,0),
+                  (0,1,1,1,1,1,1,1,0),
+                  (0,0,0,0,0,0,0,0,0))
+
+ALIGNMENT_PATTERN = ((1,1,1,1,1),
+                     (1,0,0,0,1),
+                     (1,0,1,0,1),
+                     (1,0,0,0,1),
+                     (1,1,1,1,1))
+
+# mask conditions indexed by mask number, a module is flipped where its condition is true (row = y and column = x)
+MASK_CONDITIONS = (lambda row, column: (row + column) % 2 == 0,
+                   lambda row, column: row % 2 == 0,
+                   lambda row, column: column % 3 == 0,
+                   lambda row, column: (row + column) % 3 == 0,
+                   lambda row, column: ((row // 2) + (column // 3)) % 2 == 0,
+                   lambda row, column: ((row * column) % 2) + ((row * column) % 3) == 0,
+                   lambda row, column: (((row * column) % 2) + ((row * column) % 3)) % 2 == 0,
+                   lambda row, column: (((row + column) % 2) + ((row * column) % 3)) % 2 == 0)
+
+# Micro QR symbols use the masks 1, 4, 6 and 7
+MICRO_MASK_CONDITIONS = tuple(MASK_CONDITIONS[mask_num] for mask_num in (1, 4, 6, 7))
+
+# index of every error correction level in the entries of CODEWORD_TABLE (H, Q, M, L)
+ECL_TABLE_INDEX = {2: 0, 3: 1, 0: 2, 1: 3}
+
+
+
+# object that holds all the information about any specific version and error correction level QR code
+class CodewordCounts:
+
+    def __init__(self, groups, eccw_count):
+        self.block_counts = []
+        self.data_cw_counts = []
+        self.max_data_bits = 0
+        for group in groups:
+            self.block_counts.append(group[0])
+            self.data_cw_counts.append(group[1])
+            self.max_data_bits += (group[0] * group[1])
+        self.max_data_bits *= 8
+        self.groups_count = len(groups)
+        self.eccw_count = eccw_count
+
+    def getECCWCount(self):
+        return self.eccw_count
+    def getGroupsCount(self):
+        return self.groups_count
+    def getBlocksCount(self, group_num):
+        return self.block_counts[group_num]
+    def getDataCWCount(self, group_num):
+        return self.data_cw_counts[group_num]
+    def getMaxDataBits(self):
+        return self.max_data_bits
+
+
+
+# CodewordCounts for ECL H, Q, M and L of a version, only built the first time the version is used
+@lru_cache(maxsize=None)
+def get_codeword_counts(version_num):
+    return tuple(CodewordCounts(groups, eccw_count) for groups, eccw_count in CODEWORD_TABLE[version_num-1])
+
+def get_format_word(ec_lvl, mask_num):
+    return FORMAT_WORDS[ec_lvl][mask_num]
+
+def get_version_word(version_num):
+    return VERSION_WORDS[version_num-7]
@@ -0,0 +1,134 @@
+# Generated by gen_spec_tables.py, do not edit by hand.
+
+# versions 1 - 40, each holding H, Q, M, L as (((block count, data codewords per block), ...), ec codewords per block)
+CODEWORD_TABLE = (
+    ((((1, 9),), 17), (((1, 13),), 13), (((1, 16),), 10), (((1, 19),), 7)), # 1
+    ((((1, 16),), 28), (((1, 22),), 22), (((1, 28),), 16), (((1, 34),), 10)), # 2
+    ((((2, 13),), 22), (((2, 17),), 18), (((1, 44),), 26), (((1, 55),), 15)), # 3
+    ((((4, 9),), 16), (((2, 24),), 26), (((2, 32),), 18), (((1, 80),), 20)), # 4
+    ((((2, 11), (2, 12)), 22), (((2, 15), (2, 16)), 18), (((2, 43),), 24), (((1, 108),), 26)), # 5
+    ((((4, 15),), 28), (((4, 19),), 24), (((4, 27),), 16), (((2, 68),), 18)), # 6
+    ((((4, 13), (1, 14)), 26), (((2, 14), (4, 15)), 18), (((4, 31),), 18), (((2, 78),), 20)), # 7
+    ((((4, 14), (2, 15)), 26), (((4, 18), (2, 19)), 22), (((2, 38), (2, 39)), 22), (((2, 97),), 24)), # 8
+    ((((4, 12), (4, 13)), 24), (((4, 16), (4, 17)), 20), (((3, 36), (2, 37)), 22), (((2, 116),), 30)), # 9
+    ((((6, 15), (2, 16)), 28), (((6, 19), (2, 20)), 24), (((4, 43), (1, 44)), 26), (((2, 68), (2, 69)), 18)), # 10
+    ((((3, 12), (8, 13)), 24), (((4, 22), (4, 23)), 28), (((1, 50), (4, 51)), 30), (((4, 81),), 20)), # 11
+    ((((7, 14), (4, 15)), 28), (((4, 20), (6, 21)), 26), (((6, 36), (2, 37)), 22), (((2, 92), (2, 93)), 24)), # 12
+    ((((12, 11), (4, 12)), 22), (((8, 20), (4, 21)), 24), (((8, 37), (1, 38)), 22), (((4, 107),), 26)), # 13
+    ((((11, 12), (5, 13)), 24), (((11, 16), (5, 17)), 20), (((4, 40), (5, 41)), 24), (((3, 115), (1, 116)), 30)), # 14
+    ((((11, 12), (7, 13)), 24), (((5, 24), (7, 25)), 30), (((5, 41), (5, 42)), 24), (((5, 87), (1, 88)), 22)), # 15
+    ((((3, 15), (13, 16)), 30), (((15, 19), (2, 20)), 24), (((7, 45), (3, 46)), 28), (((5, 98), (1, 99)), 24)), # 16
+    ((((2, 14), (17, 15)), 28), (((1, 22), (15, 23)), 28), (((10, 46), (1, 47)), 28), (((1, 107), (5, 108)), 28)), # 17
+    ((((2, 14), (19, 15)), 28), (((17, 22), (1, 23)), 28), (((9, 43), (4, 44)), 26), (((5, 120), (1, 121)), 30)), # 18
+    ((((9, 13), (16, 14)), 26), (((17, 21), (4, 22)), 26), (((3, 44), (11, 45)), 26), (((3, 113), (4, 114)), 28)), # 19
+    ((((15, 15), (10, 16)), 28), (((15, 24), (5, 25)), 30), (((3, 41), (13, 42)), 26), (((3, 107), (5, 108)), 28)), # 20
+    ((((19, 16), (6, 17)), 30), (((17, 22), (6, 23)), 28), (((17, 42),), 26), (((4, 116), (4, 117)), 28)), # 21
+    ((((34, 13),), 24), (((7, 24), (16, 25)), 30), (((17, 46),), 28), (((2, 111), (7, 112)), 28)), # 22
+    ((((16, 15), (14, 16)), 30), (((11, 24), (14, 25)), 30), (((4, 47), (14, 48)), 28), (((4, 121), (5, 122)), 30)), # 23
+    ((((30, 16), (2, 17)), 30), (((11, 24), (16, 25)), 30), (((6, 45), (14, 46)), 28), (((6, 117), (4, 118)), 30)), # 24
+    ((((22, 15), (13, 16)), 30), (((7, 24), (22, 25)), 30), (((8, 47), (13, 48)), 28), (((8, 106), (4, 107)), 26)), # 25
+    ((((33, 16), (4, 17)), 30), (((28, 22), (6, 23)), 28), (((19, 46), (4, 47)), 28), (((10, 114), (2, 115)), 28)), # 26
+    ((((12, 15), (28, 16)), 30), (((8, 23), (26, 24)), 30), (((22, 45), (3, 46)), 28), (((8, 122), (4, 123)), 30)), # 27
+    ((((11, 15), (31, 16)), 30), (((4, 24), (31, 25)), 30), (((3, 45), (23, 46)), 28), (((3, 117), (10, 118)), 30)), # 28
+    ((((19, 15), (26, 16)), 30), (((1, 23), (37, 24)), 30), (((21, 45), (7, 46)), 28), (((7, 116), (7, 117)), 30)), # 29
+    ((((23, 15), (25, 16)), 30), (((15, 24), (25, 25)), 30), (((19, 47), (10, 48)), 28), (((5, 115), (10, 116)), 30)), # 30
+    ((((23, 15), (28, 16)), 30), (((42, 24), (1, 25)), 30), (((2, 46), (29, 47)), 28), (((13, 115), (3, 116)), 30)), # 31
+    ((((19, 15), (35, 16)), 30), (((10, 24), (35, 25)), 30), (((10, 46), (23, 47)), 28), (((17, 115),), 30)), # 32
+    ((((11, 15), (46, 16)), 30), (((29, 24), (19, 25)), 30), (((14, 46), (21, 47)), 28), (((17, 115), (1, 116)), 30)), # 33
+    ((((59, 16), (1, 17)), 30), (((44, 24), (7, 25)), 30), (((14, 46), (23, 47)), 28), (((13, 115), (6, 116)), 30)), # 34
+    ((((22, 15), (41, 16)), 30), (((39, 24), (14, 25)), 30), (((12, 47), (26, 48)), 28), (((12, 121), (7, 122)), 30)), # 35
+    ((((2, 15), (64, 16)), 30), (((46, 24), (10, 25)), 30), (((6, 47), (34, 48)), 28), (((6, 121), (14, 122)), 30)), # 36
+    ((((24, 15), (46, 16)), 30), (((49, 24), (10, 25)), 30), (((29, 46), (14, 47)), 28), (((17, 122), (4, 123)), 30)), # 37
+    ((((42, 15), (32, 16)), 30), (((48, 24), (14, 25)), 30), (((13, 46), (32, 47)), 28), (((4, 122), (18, 123)), 30)), # 38
+    ((((10, 15), (67, 16)), 30), (((43, 24), (22, 25)), 30), (((40, 47), (7, 48)), 28), (((20, 117), (4, 118)), 30)), # 39
+    ((((20, 15), (61, 16)), 30), (((34, 24), (34, 25)), 30), (((18, 47), (31, 48)), 28), (((19, 118), (6, 119)), 30)), # 40
+)
+
+# versions 2 - 40
+ALIGNMENT_PATTERN_LOCS = (
+    (6, 18), # 2
+    (6, 22), # 3
+    (6, 26), # 4
+    (6, 30), # 5
+    (6, 34), # 6
+    (6, 22, 38), # 7
+    (6, 24, 42), # 8
+    (6, 26, 46), # 9
+    (6, 28, 50), # 10
+    (6, 30, 54), # 11
+    (6, 32, 58), # 12
+    (6, 34, 62), # 13
+    (6, 26, 46, 66), # 14
+    (6, 26, 48, 70), # 15
+    (6, 26, 50, 74), # 16
+    (6, 30, 54, 78), # 17
+    (6, 30, 56, 82), # 18
+    (6, 30, 58, 86), # 19
+    (6, 34, 62, 90), # 20
+    (6, 28, 50, 72, 94), # 21
+    (6, 26, 50, 74, 98), # 22
+    (6, 30, 54, 78, 102), # 23
+    (6, 28, 54, 80, 106), # 24
+    (6, 32, 58, 84, 110), # 25
+    (6, 30, 58, 86, 114), # 26
+    (6, 34, 62, 90, 118), # 27
+    (6, 26, 50, 74, 98, 122), # 28
+    (6, 30, 54, 78, 102, 126), # 29
+    (6, 26, 52, 78, 104, 130), # 30
+    (6, 30, 56, 82, 108, 134), # 31
+    (6, 34, 60, 86, 112, 138), # 32
+    (6, 30, 58, 86, 114, 142), # 33
+    (6, 34, 62, 90, 118, 146), # 34
+    (6, 30, 54, 78, 102, 126, 150), # 35
+    (6, 24, 50, 76, 102, 128, 154), # 36
+    (6, 28, 54, 80, 106, 132, 158), # 37
+    (6, 32, 58, 84, 110, 136, 162), # 38
+    (6, 26, 54, 82, 110, 138, 166), # 39
+    (6, 30, 58, 86, 114, 142, 170), # 40
+)
+
+# 15 bit format words, FORMAT_WORDS[ec_lvl][mask_num] with M == 0, L == 1, H == 2, Q == 3
+FORMAT_WORDS = (
+    (0b101010000010010, 0b101000100100101, 0b101111001111100, 0b101101101001011, 0b100010111111001, 0b100000011001110, 0b100111110010111, 0b100101010100000),
+    (0b111011111000100, 0b111001011110011, 0b111110110101010, 0b111100010011101, 0b110011000101111, 0b110001100011000, 0b110110001000001, 0b110100101110110),
+    (0b001011010001001, 0b001001110111110, 0b001110011100111, 0b001100111010000, 0b000011101100010, 0b000001001010101, 0b000110100001100, 0b000100000111011),
+    (0b011010101011111, 0b011000001101000, 0b011111100110001, 0b011101000000110, 0b010010010110100, 0b010000110000011, 0b010111011011010, 0b010101111101101),
+)
+
+# 18 bit version words for versions 7 - 40
+VERSION_WORDS = (
+    0b000111110010010100, # 7
+    0b001000010110111100, # 8
+    0b001001101010011001, # 9
+    0b001010010011010011, # 10
+    0b001011101111110110, # 11
+    0b001100011101100010, # 12
+    0b001101100001000111, # 13
+    0b001110011000001101, # 14
+    0b001111100100101000, # 15
+    0b010000101101111000, # 16
+    0b010001010001011101, # 17
+    0b010010101000010111, # 18
+    0b010011010100110010, # 19
+    0b010100100110100110, # 20
+    0b010101011010000011, # 21
+    0b010110100011001001, # 22
+    0b010111011111101100, # 23
+    0b011000111011000100, # 24
+    0b011001000111100001, # 25
+    0b011010111110101011, # 26
+    0b011011000010001110, # 27
+    0b011100110000011010, # 28
+    0b011101001100111111, # 29
+    0b011110110101110101, # 30
+    0b011111001001010000, # 31
+    0b100000100111010101, # 32
+    0b100001011011110000, # 33
+    0b100010100010111010, # 34
+    0b100011011110011111, # 35
+    0b100100101100001011, # 36
+    0b100101010000101110, # 37
+    0b100110101001100100, # 38
+    0b100111010101000001, # 39
+    0b101000110001101001, # 40
+)
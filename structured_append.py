@@ -0,0 +1,63 @@
+from encoder import select_version, sanitize_string, TRANS_EC_LVL
+from batch import run_jobs
+from masks import EXHAUSTIVE
+
+
+# Structured Append: a payload that is too large for one symbol is split across up to 16 symbols.
+# Every symbol starts with a header holding its position, the total number of symbols and a parity
+# byte of the whole payload, which lets a scanner put the parts back together in the right order.
+
+MAX_SYMBOLS = 16
+STRUCTURED_APPEND_MODE_BITS = "0011"
+DEFAULT_MAX_VERSION = 25 # larger symbols take noticeably longer to render and scan
+
+
+
+# XOR of every byte of the payload
+def calc_parity(cleaned_data):
+    parity = 0
+    for char in cleaned_data:
+        parity ^= ord(char)
+    return parity
+
+# index is 0 based, total is the number of symbols in the sequence
+def get_header_bits(index, total, parity):
+    return STRUCTURED_APPEND_MODE_BITS + f'{index:04b}' + f'{total-1:04b}' + f'{parity:08b}'
+
+
+def split_evenly(cleaned_data, part_count):
+    part_size = -(-len(cleaned_data) // part_count) # ceiling division
+    return [cleaned_data[i:i+part_size] for i in range(0, len(cleaned_data), part_size)]
+
+def fits_in_symbol(cleaned_data, err_corr="LMQH", header_bits="", max_version=40):
+    try:
+        select_version(cleaned_data, err_corr, 0, header_bits, max_version)
+    except ValueError:
+        return False
+    return True
+
+
+# split cleaned_data into the fewest parts whose symbols are all version max_version or smaller
+# if 16 parts at max_version are not enough, the version limit is raised one step at a time up to 40
+def split_payload(cleaned_data, err_corr="LMQH", max_version=DEFAULT_MAX_VERSION):
+    parity = calc_parity(cleaned_data)
+    for version_limit in range(max_version, 41):
+        for part_count in range(2, MAX_SYMBOLS+1):
+            parts = split_evenly(cleaned_data, part_count)
+            # the first part is always the largest, so if it fits, they all do
+            if len(parts) == part_count and fits_in_symbol(parts[0], err_corr, get_header_bits(0, part_count, parity), version_limit):
+                return parts, parity
+    raise ValueError(f"The data you entered is too large to fit in {MAX_SYMBOLS} structured append QR codes.")
+
+
+# generate every part of a structured append sequence, in parallel if workers > 1
+# returns a list of BatchResults whose index is the 1 based position of the symbol in the sequence
+def generate_structured_append(data, err_corr="LMQH", max_version=DEFAULT_MAX_VERSION, mask=-1, workers=1, verify=False, backend="pil", mask_strategy=EXHAUSTIVE):
+    cleaned_data = sanitize_string(data)
+    parts, parity = split_payload(cleaned_data, err_corr, max_version)
+    jobs = [(index+1, part, err_corr, 0, mask, get_header_bits(index, len(parts), parity)) for index, part in enumerate(parts)]
+    return list(run_jobs(jobs, min(workers, len(jobs)), verify, backend, mask_strategy=mask_strategy))
+
+
+def get_part_filename(result, part_count):
+    return f"./image-{result.version_num}{TRANS_EC_LVL[result.ec_lvl]}-{result.index}of{part_count}.png"
@@ -0,0 +1,199 @@
+from encoder import QrSymbol, GF, select_version, sanitize_string, pad_data_bits, place_data_bits, get_module_size, calculate_error_correction, create_generator_polynomial, MODE_BITS, TRANS_EC_LVL
+from bitboard import BitboardModuleArray, BitboardQrMask, render_image
+from masks import EXHAUSTIVE
+from profiling import NULL_TIMER
+from PIL import Image
+from copy import copy
+
+
+# Templates for payloads that share a long constant prefix, e.g. "https://example.com/t/?id=" + id.
+# Reed-Solomon is linear over GF(256): the error correction words of a block are the XOR of the error
+# correction words of each of its codewords on their own. A template encodes the prefix once, at a fixed
+# version and error correction level, and keeps its codewords, error correction words and placed modules.
+# Every suffix then only redoes the codewords that differ from the template, their share of the error
+# correction words, the modules they sit on, masking and rendering.
+# The symbols are identical to the ones generate_qr_code produces for prefix + suffix at the same version and ECL.
+
+
+
+# ModuleArray that records where every data bit is placed instead of remembering its value
+class PlacementRecorder(BitboardModuleArray):
+
+    def __init__(self, version_num, modules_per_edge):
+        self.placement_path = []
+        BitboardModuleArray.__init__(self, version_num, modules_per_edge)
+        # forget the function pattern modules written while the array was set up
+        self.placement_path = []
+
+    def update_module(self, x, y, value, force_update=False):
+        result = BitboardModuleArray.update_module(self, x, y, value, force_update)
+        if result == 0 and not force_update:
+            self.placement_path.append((x, y))
+        return result
+
+
+
+# the error correction words of a single non-zero codeword at every position of a block
+# basis[position][j] is the j-th error correction word for a block that is all zeros except for a 1 at position
+def get_ecc_basis(data_cw_count, eccw_count, gf):
+    generator_coeffs = create_generator_polynomial(eccw_count, gf)
+    # the last codeword of the block is divided by the generator polynomial once
+    remainder = calculate_error_correction([1], eccw_count, gf)
+    basis = [remainder]
+    # every position further forward multiplies the remainder by x once more
+    for _ in range(data_cw_count-1):
+        lead = remainder[0]
+        remainder = remainder[1:] + [0]
+        if lead != 0:
+            remainder = [value ^ gf.multiply(coeff, lead) for value, coeff in zip(remainder, generator_coeffs[1:])]
+        basis.append(remainder)
+    basis.reverse()
+    return basis
+
+
+# split the padded data bits into codeword ints
+def get_codewords(data_bits):
+    return [int(data_bits[i:i+8], 2) for i in range(0, len(data_bits), 8)]
+
+
+
+class QrTemplate:
+
+    # err_corr and version_num work like in generate_qr_code, chosen so that the prefix and a suffix of
+    # max_suffix_length characters fit, and every symbol made from this template uses that version and ECL
+    def __init__(self, prefix, err_corr="LMQH", version_num=0, max_suffix_length=0, backend="bitboard"):
+        if backend != "bitboard":
+            raise ValueError("Templates keep the matrix as row ints and only support the bitboard backend")
+        self.prefix = sanitize_string(prefix)
+        self.gf = GF
+
+        self.cw_info, self.version_num, self.ec_lvl, _ = select_version(self.prefix + " " * max_suffix_length, err_corr, version_num)
+        self.modules_per_edge = ((self.version_num - 1) * 4) + 21
+        self.module_size = get_module_size(self.modules_per_edge)
+
+        # the longest suffix that still fits at this version and ECL
+        char_count_length = 16 if self.version_num >= 10 else 8
+        self.max_suffix_length = (self.cw_info.getMaxDataBits() - len(MODE_BITS) - char_count_length) // 8 - len(self.prefix)
+
+        # (start, length) of every block in the data codewords, in the order the blocks are filled
+        self.blocks = []
+        start = 0
+        for group_num in range(self.cw_info.getGroupsCount()):
+            for _ in range(self.cw_info.getBlocksCount(group_num)):
+                self.blocks.append((start, self.cw_info.getDataCWCount(group_num)))
+                start += self.cw_info.getDataCWCount(group_num)
+        eccw_count = self.cw_info.getECCWCount()
+        bases = {}
+        for _, length in self.blocks:
+            if length not in bases:
+                bases[length] = get_ecc_basis(length, eccw_count, self.gf)
+        self.block_bases = [bases[length] for _, length in self.blocks]
+
+        # position of every data codeword and every error correction word in the interleaved content
+        self.data_positions = [0] * start
+        self.ecc_positions = [[0] * eccw_count for _ in self.blocks]
+        position = 0
+        for cw_num in range(max(length for _, length in self.blocks)):
+            for block_start, length in self.blocks:
+                if cw_num < length:
+                    self.data_positions[block_start + cw_num] = position
+                    position += 1
+        for cw_num in range(eccw_count):
+            for block_num in range(len(self.blocks)):
+                self.ecc_positions[block_num][cw_num] = position
+                position += 1
+
+        # the template symbol is the prefix with an empty suffix, placed but not masked
+        self.codewords = get_codewords(self.get_data_bits(""))
+        self.ecc_words = [calculate_error_correction(self.codewords[block_start:block_start+length], eccw_count, self.gf) for block_start, length in self.blocks]
+        content_bits = self.build_content_bits(self.codewords, self.ecc_words)
+
+        recorder = PlacementRecorder(self.version_num, self.modules_per_edge)
+        place_data_bits(recorder, content_bits)
+        self.placement_path = recorder.placement_path
+        self.state = recorder.get_state()
+        # every symbol gets a shallow copy of this, sharing its protected modules
+        self.module_arr = BitboardModuleArray(self.version_num, self.modules_per_edge)
+
+
+    def get_data_bits(self, suffix):
+        _, _, _, data_bits = select_version(self.prefix + suffix, TRANS_EC_LVL[self.ec_lvl], self.version_num, max_version=self.version_num)
+        return pad_data_bits(data_bits, self.cw_info)
+
+    def build_content_bits(self, codewords, ecc_words):
+        content_ints = [0] * (len(codewords) + len(ecc_words) * self.cw_info.getECCWCount())
+        for cw_num, codeword in enumerate(codewords):
+            content_ints[self.data_positions[cw_num]] = codeword
+        for block_num, block_ecc in enumerate(ecc_words):
+            for cw_num, ecc_word in enumerate(block_ecc):
+                content_ints[self.ecc_positions[block_num][cw_num]] = ecc_word
+        return "".join(f'{cont_int:08b}' for cont_int in content_ints)
+
+    # flip the modules of the content codeword at position by the bits set in delta
+    def flip_codeword(self, rows, columns, position, delta):
+        for bit in range(8):
+            if (delta >> (7-bit)) & 1:
+                x, y = self.placement_path[position*8 + bit]
+                rows[y] ^= 1 << x
+                columns[x] ^= 1 << y
+
+
+    # encode prefix + suffix and return a QrSymbol, mask and mask_strategy work like in generate_qr_code
+    def generate(self, suffix, mask=-1, timer=NULL_TIMER, mask_strategy=EXHAUSTIVE):
+        with timer.phase("select_version"):
+            suffix = sanitize_string(suffix)
+            if len(suffix) > self.max_suffix_length:
+                raise ValueError(f"The suffix is {len(suffix)} characters long, but this template only has room for {self.max_suffix_length}.")
+            codewords = get_codewords(self.get_data_bits(suffix))
+
+        with timer.phase("error_correction"):
+            exp, log = self.gf.exp, self.gf.log
+            rows, columns = list(self.state[0]), list(self.state[1])
+            changed_count = 0
+            for block_num, (block_start, length) in enumerate(self.blocks):
+                basis = self.block_bases[block_num]
+                ecc_words = list(self.ecc_words[block_num])
+                for cw_num in range(block_start, block_start+length):
+                    delta = codewords[cw_num] ^ self.codewords[cw_num]
+                    if delta == 0:
+                        continue
+                    changed_count += 1
+                    self.flip_codeword(rows, columns, self.data_positions[cw_num], delta)
+                    log_delta = log[delta]
+                    for j, basis_word in enumerate(basis[cw_num-block_start]):
+                        if basis_word != 0:
+                            ecc_words[j] ^= exp[(log_delta + log[basis_word]) % 255]
+                for j, ecc_word in enumerate(ecc_words):
+                    delta = ecc_word ^ self.ecc_words[block_num][j]
+                    if delta != 0:
+                        self.flip_codeword(rows, columns, self.ecc_positions[block_num][j], delta)
+
+        with timer.phase("place_data"):
+            module_arr = copy(self.module_arr)
+            module_arr.set_state((rows, columns))
+
+        with timer.phase("mask"):
+            qr_masks = BitboardQrMask(self.modules_per_edge, self.ec_lvl, mask_strategy)
+            if mask >= 0:
+                module_arr = qr_masks.apply_specific_mask(module_arr, mask)
+                mask_num = mask
+            else:
+                module_arr = qr_masks.apply_best_mask(module_arr)
+                mask_num = qr_masks.best_mask
+
+        with timer.phase("render"):
+            image_size = self.module_size * (self.modules_per_edge+2)
+            qr_image = Image.new(mode="P", size=[image_size, image_size], color="white")
+            render_image(module_arr, self.module_size, qr_image)
+
+        timer.count("changed_codewords", changed_count)
+        timer.set("version_num", self.version_num)
+        timer.set("ec_lvl", TRANS_EC_LVL[self.ec_lvl])
+        timer.set("mask", mask_num)
+        timer.set("mask_scores", qr_masks.mask_scores)
+        if qr_masks.quality_report is not None:
+            timer.set("mask_report", qr_masks.quality_report)
+
+        qr_symbol = QrSymbol(qr_image, module_arr, self.version_num, self.ec_lvl, mask_num)
+        qr_symbol.mask_report = qr_masks.quality_report
+        return qr_symbol
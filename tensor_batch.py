@@ -0,0 +1,233 @@
+import numpy as np
+from functools import lru_cache
+from io import BytesIO
+from time import perf_counter
+from PIL import Image
+from encoder import select_version, sanitize_string, pad_data_bits, get_module_size, GF
+from spec import ECL_TABLE_INDEX, get_codeword_counts
+from template import get_ecc_basis
+from batch import BatchResult
+from decoder import get_placement_path, verify_matrix, VerificationError
+
+
+# Tensorized batch engine (batch.run_jobs with engine="tensor", needs NumPy).
+# Jobs are read in windows, and the jobs of a window that share a version and error correction level are
+# encoded together as arrays, one row per symbol:
+#   - Reed-Solomon is linear over GF(2), so the error correction bits of every block are one matrix product
+#     of the data bits with a cached basis (see template.get_ecc_basis)
+#   - interleaving is one cached permutation of the codewords
+#   - the bits are scattered along the cached placement path into every symbol at once, and XORed with the
+#     8 masked empty symbols of the version (function patterns, format information and mask pattern), built once
+#     by the bitboard backend, which gives every symbol with every mask as a (symbols, 8, n, n) array
+#   - all 4 penalty rules are computed for every symbol and mask at once, with the same quirks as QrMask
+#     (finder-like patterns are searched with a light module past the bottom and right edges)
+# The output is identical to encoding every job on its own with generate_qr_code and exhaustive mask search.
+
+DEFAULT_WINDOW = 1024
+# most modules (symbols * 8 masks * modules per symbol) held in one array, large versions are split up to stay below it
+MAX_GROUP_MODULES = 1 << 24
+
+FINDER_LIKE_PATTERNS = ((0, 0, 0, 0, 1, 0, 1, 1, 1, 0, 1),
+                        (1, 0, 1, 1, 1, 0, 1, 0, 0, 0, 0))
+
+
+
+# everything about a version and error correction level that is the same for every symbol
+class GroupTables:
+
+    def __init__(self, version_num, ec_lvl):
+        from bitboard import BitboardModuleArray, BitboardQrMask
+        self.version_num = version_num
+        self.ec_lvl = ec_lvl
+        self.modules_per_edge = ((version_num - 1) * 4) + 21
+        self.cw_info = get_codeword_counts(version_num)[ECL_TABLE_INDEX[ec_lvl]]
+        self.eccw_count = self.cw_info.getECCWCount()
+
+        self.block_lengths = []
+        for group_num in range(self.cw_info.getGroupsCount()):
+            self.block_lengths += [self.cw_info.getDataCWCount(group_num)] * self.cw_info.getBlocksCount(group_num)
+        self.ecc_bases = {length: get_ecc_bit_basis(length, self.eccw_count) for length in set(self.block_lengths)}
+
+        # position in [data codewords block by block, ecc codewords block by block] of every interleaved codeword
+        data_starts = [sum(self.block_lengths[:block_num]) for block_num in range(len(self.block_lengths))]
+        data_count = sum(self.block_lengths)
+        order = []
+        for cw_num in range(max(self.block_lengths)):
+            for block_num, length in enumerate(self.block_lengths):
+                if cw_num < length:
+                    order.append(data_starts[block_num] + cw_num)
+        for cw_num in range(self.eccw_count):
+            for block_num in range(len(self.block_lengths)):
+                order.append(data_count + (block_num * self.eccw_count) + cw_num)
+        self.bit_order = (np.array(order)[:, None] * 8 + np.arange(8)).ravel()
+
+        path = get_placement_path(version_num)
+        self.path_indices = np.array([(y * self.modules_per_edge) + x for x, y in path[:len(self.bit_order)]])
+
+        # the symbol without data under each of the 8 masks
+        templates = []
+        for mask_num in range(8):
+            module_arr = BitboardModuleArray(version_num, self.modules_per_edge)
+            BitboardQrMask(self.modules_per_edge, ec_lvl).apply_specific_mask(module_arr, mask_num)
+            templates.append(module_arr.to_matrix())
+        self.templates = np.array(templates, dtype=np.uint8).reshape(8, -1)
+
+    # the interleaved codeword bits of every row of data_bits (symbols, data bits)
+    def build_content_bits(self, data_bits):
+        data_parts = []
+        ecc_parts = []
+        start = 0
+        for length in self.block_lengths:
+            block_bits = data_bits[:, start*8:(start+length)*8]
+            data_parts.append(block_bits)
+            ecc_parts.append((block_bits.astype(np.float32) @ self.ecc_bases[length]).astype(np.int32) & 1)
+            start += length
+        return np.concatenate(data_parts + ecc_parts, axis=1).astype(np.uint8)[:, self.bit_order]
+
+    # every symbol of content_bits under every mask, (symbols, 8, n, n)
+    def place_and_mask(self, content_bits):
+        placed = np.zeros((len(content_bits), self.modules_per_edge * self.modules_per_edge), dtype=np.uint8)
+        placed[:, self.path_indices] = content_bits[:, :len(self.path_indices)]
+        masked = placed[:, None, :] ^ self.templates[None, :, :]
+        return masked.reshape(len(content_bits), 8, self.modules_per_edge, self.modules_per_edge)
+
+@lru_cache(maxsize=None)
+def get_group_tables(version_num, ec_lvl):
+    return GroupTables(version_num, ec_lvl)
+
+
+# (8 * data_cw_count, 8 * eccw_count) matrix whose row for every data bit holds the error correction bits of a block
+# with only that bit set, so the error correction bits of a block are its data bits times this matrix, mod 2
+@lru_cache(maxsize=None)
+def get_ecc_bit_basis(data_cw_count, eccw_count):
+    basis = get_ecc_basis(data_cw_count, eccw_count, GF)
+    rows = []
+    for position in range(data_cw_count):
+        for bit_num in range(8):
+            rows.append(bytes(GF.multiply(1 << (7 - bit_num), ecc_word) for ecc_word in basis[position]))
+    return np.unpackbits(np.frombuffer(b"".join(rows), dtype=np.uint8).reshape(len(rows), eccw_count), axis=1).astype(np.float32)
+
+
+
+# penalty of every symbol under every mask, symbols is (..., n, n) and the result has the shape of symbols[..., 0, 0]
+def calc_penalties(symbols):
+    modules_per_edge = symbols.shape[-1]
+    penalty = np.zeros(symbols.shape[:-2], dtype=np.int64)
+
+    # Evaluation Condition #1: 3 points for every run of 5 same-colored modules and 1 for every module after that
+    for lines in (symbols, np.swapaxes(symbols, -1, -2)):
+        same = lines[..., 1:] == lines[..., :-1]
+        fifth = same[..., 3:] & same[..., 2:-1] & same[..., 1:-2] & same[..., :-3]
+        first = fifth.copy()
+        first[..., 1:] &= ~same[..., :-4]
+        penalty += fifth.sum(axis=(-1, -2)) + 2 * first.sum(axis=(-1, -2))
+
+    # Evaluation Condition #2: 3 points for every 2x2 square of one color
+    square = (symbols[..., :-1, :-1] == symbols[..., 1:, :-1]) & (symbols[..., :-1, :-1] == symbols[..., :-1, 1:]) & (symbols[..., :-1, :-1] == symbols[..., 1:, 1:])
+    penalty += 3 * square.sum(axis=(-1, -2))
+
+    # Evaluation Condition #3: 40 points for every finder-like pattern starting in one of the first n-9 rows and columns,
+    # reading a light module past the last row and column like QrMask does
+    padded = np.zeros(symbols.shape[:-2] + (modules_per_edge+1, modules_per_edge+1), dtype=symbols.dtype)
+    padded[..., :modules_per_edge, :modules_per_edge] = symbols
+    starts = modules_per_edge - 9
+    for lines in (padded, np.swapaxes(padded, -1, -2)):
+        for pattern in FINDER_LIKE_PATTERNS:
+            found = np.ones(symbols.shape[:-2] + (starts, starts), dtype=bool)
+            for i, value in enumerate(pattern):
+                found &= lines[..., :starts, i:i+starts] == value
+            penalty += 40 * found.sum(axis=(-1, -2))
+
+    # Evaluation Condition #4: 10 points for every 5% the dark modules are away from half, like QrMask
+    dark_percent = (symbols.sum(axis=(-1, -2)) / (modules_per_edge * modules_per_edge)) * 100
+    penalty += np.maximum(0, np.trunc(np.abs(dark_percent - 50)).astype(np.int64) - 1) * 10
+    return penalty
+
+
+
+# the PNG generate_qr_code renders for a matrix
+def render_png(matrix, module_size):
+    modules = np.pad(matrix, 1)
+    pixels = np.repeat(np.repeat(modules, module_size, axis=0), module_size, axis=1)
+    image = Image.new(mode="P", size=[pixels.shape[1], pixels.shape[0]], color="white")
+    image.frombytes(pixels.tobytes())
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+# encode the jobs of one group, which all have the same version and error correction level
+# group holds (job, cleaned_data, padded data bits) for every job, the results are in the same order
+def encode_group(tables, group, verify=False, output="png"):
+    start_time = perf_counter()
+    data_bits = np.frombuffer("".join(padded_bits for _, _, padded_bits in group).encode("ascii"), dtype=np.uint8).reshape(len(group), -1) - ord("0")
+    symbols = tables.place_and_mask(tables.build_content_bits(data_bits))
+
+    mask_nums = np.array([job[4] for job, _, _ in group])
+    if (mask_nums < 0).any():
+        mask_nums = np.where(mask_nums < 0, np.argmin(calc_penalties(symbols), axis=1), mask_nums)
+    chosen = symbols[np.arange(len(group)), mask_nums]
+
+    module_size = get_module_size(tables.modules_per_edge)
+    results = []
+    for (job, cleaned_data, _), matrix, mask_num in zip(group, chosen, mask_nums.tolist()):
+        try:
+            if verify:
+                decoded = verify_matrix(matrix.tolist(), cleaned_data)
+                if (decoded.version_num, decoded.ec_lvl, decoded.mask_num) != (tables.version_num, tables.ec_lvl, mask_num):
+                    raise VerificationError("decoded version, error correction level or mask does not match the generated symbol")
+        except ValueError as e:
+            result = BatchResult(job[0], None, error=str(e))
+        else:
+            if output == "matrix":
+                result = BatchResult(job[0], None, tables.version_num, tables.ec_lvl, mask_num=mask_num, packed_matrix=np.packbits(matrix, axis=1).tobytes())
+            else:
+                result = BatchResult(job[0], render_png(matrix, module_size), tables.version_num, tables.ec_lvl, mask_num=mask_num)
+        result.data = job[1]
+        results.append(result)
+
+    # the time of the whole group is shared out evenly between its jobs
+    encode_time = (perf_counter() - start_time) / len(group)
+    for result in results:
+        result.encode_time = encode_time
+    return results
+
+
+# encode a window of jobs, returns their BatchResults in the same order
+def encode_window(jobs, verify=False, output="png"):
+    results = [None] * len(jobs)
+    groups = {}
+    for position, job in enumerate(jobs):
+        index, data, err_corr, version_num, mask, header_bits = job
+        start_time = perf_counter()
+        try:
+            cleaned_data = sanitize_string(data)
+            cw_info, version_num, ec_lvl, data_bits = select_version(cleaned_data, err_corr, version_num, header_bits)
+        except ValueError as e:
+            results[position] = BatchResult(index, None, error=str(e))
+            results[position].data = data
+            results[position].encode_time = perf_counter() - start_time
+            continue
+        groups.setdefault((version_num, ec_lvl), []).append((position, (job, cleaned_data, pad_data_bits(data_bits, cw_info))))
+
+    for (version_num, ec_lvl), group in groups.items():
+        tables = get_group_tables(version_num, ec_lvl)
+        group_size = max(1, MAX_GROUP_MODULES // (8 * tables.modules_per_edge * tables.modules_per_edge))
+        for start in range(0, len(group), group_size):
+            part = group[start:start+group_size]
+            for (position, _), result in zip(part, encode_group(tables, [entry for _, entry in part], verify, output)):
+                results[position] = result
+
+    return results
+
+
+# split jobs into lists of window jobs
+def get_windows(jobs, window=DEFAULT_WINDOW):
+    current = []
+    for job in jobs:
+        current.append(job)
+        if len(current) == window:
+            yield current
+            current = []
+    if current:
+        yield current
@@ -0,0 +1,75 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from encoder import generate_qr_code, generate_qr_code_bytes
+from container import unpack_matrix
+from profiling import PhaseTimer
+from async_encoder import AsyncEncoder
+
+LINES = ["https://example.com/a", "12345", "HELLO WORLD", "x" * 3000, "https://example.com/b"]
+
+
+async def collect(encoder, lines, **options):
+    return [result async for result in encoder.encode_batch(lines, **options)]
+
+
+def test_encode_and_encode_bytes():
+    async def encode():
+        encoder = AsyncEncoder(backend="bitboard", err_corr="Q")
+        return await encoder.encode(LINES[0]), await encoder.encode_bytes(LINES[0], err_corr="M")
+    qr_symbol, png_bytes = asyncio.run(encode())
+    assert qr_symbol.get_matrix() == generate_qr_code(LINES[0], "Q").get_matrix()
+    assert png_bytes == generate_qr_code_bytes(LINES[0], err_corr="M")
+
+
+def test_render_sizes():
+    async def render():
+        encoder = AsyncEncoder(backend="bitboard")
+        qr_symbol = await encoder.encode(LINES[0])
+        return qr_symbol, await encoder.render(qr_symbol), await encoder.render_sizes(qr_symbol, ["1x"])
+    qr_symbol, png_bytes, images = asyncio.run(render())
+    assert png_bytes == qr_symbol.to_bytes()
+    assert images[0].tobytes() == qr_symbol.image.tobytes()
+
+
+def test_encode_batch_keeps_order():
+    results = asyncio.run(collect(AsyncEncoder(max_concurrency=2, backend="bitboard"), LINES, verify=True))
+    assert [result.index for result in results] == [1, 2, 3, 4, 5]
+    assert results[3].error is not None
+    for result, line in zip(results, LINES):
+        if result.error is None:
+            assert result.png_bytes == generate_qr_code_bytes(line, backend="bitboard")
+
+
+def test_encode_batch_async_lines_and_matrix_output():
+    async def lines():
+        for line in LINES[:3]:
+            yield line
+    results = asyncio.run(collect(AsyncEncoder(backend="bitboard"), lines(), output="matrix"))
+    for result, line in zip(results, LINES):
+        qr_symbol = generate_qr_code(line)
+        assert unpack_matrix(result.packed_matrix, qr_symbol.modules_per_edge) == qr_symbol.get_matrix()
+
+
+def test_encode_batch_passes_every_option():
+    results = asyncio.run(collect(AsyncEncoder(backend="bitboard", micro=True), LINES[1:3], verify=True, err_corr="L", mask=2))
+    for result, line in zip(results, LINES[1:3]):
+        assert result.error is None
+        assert result.png_bytes == generate_qr_code_bytes(line, err_corr="L", mask=2, micro=True)
+    with pytest.raises(ValueError, match="can't use a timer"):
+        asyncio.run(collect(AsyncEncoder(), LINES, timer=PhaseTimer()))
+
+
+def test_process_executor():
+    with ProcessPoolExecutor(2) as executor:
+        encoder = AsyncEncoder(executor, backend="bitboard", micro=True)
+        results = asyncio.run(collect(encoder, LINES[1:3]))
+        assert [result.png_bytes for result in results] == [generate_qr_code_bytes(line, micro=True) for line in LINES[1:3]]
+        assert asyncio.run(encoder.encode_bytes(LINES[0])) == generate_qr_code_bytes(LINES[0])
+        with pytest.raises(ValueError, match="needs a thread executor"):
+            asyncio.run(encoder.encode(LINES[0]))
+
+
+def test_max_concurrency():
+    with pytest.raises(ValueError, match="max_concurrency"):
+        AsyncEncoder(max_concurrency=-1)
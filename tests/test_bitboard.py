@@ -0,0 +1,29 @@
+import pytest
+from encoder import generate_qr_code
+from decoder import verify_symbol
+
+CASES = [("a", "LMQH", 0, -1),
+         ("https://example.com/bitboard", "M", 0, -1),
+         ("every mask", "Q", 0, 2),
+         ("version seven", "H", 7, -1),
+         ("\xe9" * 120, "L", 0, 6)]
+
+
+@pytest.mark.parametrize("data, err_corr, version_num, mask", CASES)
+def test_same_symbol_as_pil(data, err_corr, version_num, mask):
+    pil_symbol = generate_qr_code(data, err_corr, version_num, mask, backend="pil")
+    bitboard_symbol = generate_qr_code(data, err_corr, version_num, mask, backend="bitboard")
+    assert (bitboard_symbol.version_num, bitboard_symbol.ec_lvl, bitboard_symbol.mask_num) == (pil_symbol.version_num, pil_symbol.ec_lvl, pil_symbol.mask_num)
+    assert bitboard_symbol.get_matrix() == pil_symbol.get_matrix()
+    assert bitboard_symbol.to_bytes() == pil_symbol.to_bytes()
+    verify_symbol(bitboard_symbol, data)
+
+
+def test_every_mask_matches_pil():
+    for mask in range(8):
+        assert generate_qr_code("mask", "M", 2, mask, backend="bitboard").get_matrix() == generate_qr_code("mask", "M", 2, mask, backend="pil").get_matrix()
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match="Unknown backend"):
+        generate_qr_code("x", backend="numpy")
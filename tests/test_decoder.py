@@ -0,0 +1,56 @@
+import pytest
+from encoder import generate_qr_code
+from decoder import verify_symbol, verify_matrix, decode_matrix, read_image_matrix, get_alignment_centers, VerificationError
+from gen_spec_tables import calc_alignment_locs
+
+
+@pytest.mark.parametrize("data, err_corr, version_num, mask", [("hello", "LMQH", 0, -1),
+                                                               ("https://example.com/path?q=1", "L", 0, 3),
+                                                               ("latin-1 \xe9\xfc\xdf", "M", 0, 5),
+                                                               ("version 7 carries version information", "Q", 7, -1),
+                                                               ("x" * 300, "H", 0, 7),
+                                                               ("", "LMQH", 0, -1)])
+def test_round_trip(data, err_corr, version_num, mask):
+    qr_symbol = generate_qr_code(data, err_corr, version_num, mask, backend="bitboard")
+    decoded = verify_symbol(qr_symbol, data)
+    assert decoded.data == data
+    assert (decoded.version_num, decoded.ec_lvl, decoded.mask_num) == (qr_symbol.version_num, qr_symbol.ec_lvl, qr_symbol.mask_num)
+
+
+def test_reads_the_rendered_image():
+    qr_symbol = generate_qr_code("read from pixels")
+    assert read_image_matrix(qr_symbol.image, qr_symbol.module_arr.module_size) == qr_symbol.get_matrix()
+
+
+def test_wrong_data_is_rejected():
+    qr_symbol = generate_qr_code("expected", backend="bitboard")
+    with pytest.raises(VerificationError, match="does not match"):
+        verify_symbol(qr_symbol, "something else")
+
+
+def test_any_flipped_module_is_rejected():
+    matrix = generate_qr_code("damage", "M", backend="bitboard").get_matrix()
+    # a data module, a timing pattern module and a format information module
+    for x, y in [(20, 20), (10, 6), (8, 2)]:
+        damaged = [list(row) for row in matrix]
+        damaged[y][x] ^= 1
+        with pytest.raises(VerificationError):
+            verify_matrix(damaged, "damage")
+
+
+def test_invalid_size_is_rejected():
+    with pytest.raises(VerificationError, match="not a valid"):
+        decode_matrix([[0] * 22 for _ in range(22)])
+
+
+def test_alignment_centers_match_the_spec_formula():
+    assert get_alignment_centers(1) == ()
+    for version_num in range(2, 41):
+        assert list(get_alignment_centers(version_num)) == list(calc_alignment_locs(version_num))
+
+
+def test_decoder_shares_the_encoder_field():
+    import decoder
+    import encoder
+    assert decoder.GF is encoder.GF
+    assert not any(isinstance(value, encoder.GaloisField) and value is not encoder.GF for value in vars(decoder).values())
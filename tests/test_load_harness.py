@@ -0,0 +1,38 @@
+import json
+from load_harness import make_jobs, run_mode, print_comparison, percentile, WORKLOADS
+
+
+def test_workloads_are_seeded():
+    for workload in WORKLOADS:
+        assert make_jobs(workload, 5, 3) == make_jobs(workload, 5, 3)
+    assert make_jobs("mix", 20, 1) != make_jobs("mix", 20, 2)
+
+
+def test_run_mode_report():
+    jobs = make_jobs("short_url", 4, 0)
+    for mode in ("inprocess", "batch", "threads"):
+        run = run_mode(mode, jobs, 2, "bitboard", 0.05)
+        assert run["count"] == 4
+        assert run["failures"] == 0
+        assert run["latency_ms"]["p50"] <= run["latency_ms"]["p99"] <= run["latency_ms"]["max"]
+
+
+def test_run_without_jobs_has_no_latencies(capsys):
+    run = run_mode("inprocess", [], 1, "bitboard", 0.05)
+    assert run["count"] == 0
+    assert run["latency_ms"] is None
+    assert percentile([], 50) is None
+    # and comparing it to another report doesn't divide by nothing
+    print_comparison({"runs": [run]}, {"runs": [run]})
+    assert capsys.readouterr().out == ""
+
+
+def test_cli(run_script):
+    completed = run_script(["--workload", "short_url", "--count", "3", "--mode", "inprocess", "--backend", "bitboard"], script="load_harness.py")
+    assert completed.returncode == 0
+    report = json.loads(completed.stdout)
+    assert [run["mode"] for run in report["runs"]] == ["inprocess"]
+
+    completed = run_script(["--count", "0"], script="load_harness.py")
+    assert completed.returncode == 2
+    assert b"--count must be at least 1" in completed.stderr
@@ -0,0 +1,42 @@
+import pytest
+from encoder import generate_qr_code
+from decoder import verify_symbol
+from masks import MaskStrategy, EXHAUSTIVE
+
+DATA = "https://example.com/masks?id=42"
+
+
+@pytest.mark.parametrize("backend", ["pil", "bitboard"])
+def test_report_of_the_exhaustive_search(backend):
+    qr_symbol = generate_qr_code(DATA, backend=backend, mask_strategy=MaskStrategy(report=True))
+    report = qr_symbol.mask_report
+    assert report["mask"] == qr_symbol.mask_num == report["optimal_mask"]
+    assert report["penalty_over_optimal"] == 0
+    assert qr_symbol.mask_num == generate_qr_code(DATA, backend=backend).mask_num
+
+
+@pytest.mark.parametrize("backend", ["pil", "bitboard"])
+def test_sampled_strategy(backend):
+    qr_symbol = generate_qr_code(DATA, backend=backend, mask_strategy=MaskStrategy("sampled", sample_step=3, report=True))
+    verify_symbol(qr_symbol, DATA)
+    report = qr_symbol.mask_report
+    assert report["strategy"] == "sampled"
+    assert report["penalty"] == report["penalties"][qr_symbol.mask_num]
+    assert report["penalty_over_optimal"] >= 0
+
+
+@pytest.mark.parametrize("backend", ["pil", "bitboard"])
+def test_fixed_strategy_keeps_its_mask_or_falls_back(backend):
+    kept = generate_qr_code(DATA, backend=backend, mask_strategy=MaskStrategy("fixed", fixed_mask=5, penalty_threshold=100, report=True))
+    assert kept.mask_num == 5
+    assert kept.mask_report["fell_back"] is False
+    assert kept.get_matrix() == generate_qr_code(DATA, mask=5, backend=backend).get_matrix()
+
+    fallen_back = generate_qr_code(DATA, backend=backend, mask_strategy=MaskStrategy("fixed", fixed_mask=5, penalty_threshold=0, report=True))
+    assert fallen_back.mask_report["fell_back"] is True
+    assert fallen_back.mask_num == generate_qr_code(DATA, backend=backend, mask_strategy=EXHAUSTIVE).mask_num
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError, match="Unknown mask strategy"):
+        MaskStrategy("random")
@@ -0,0 +1,62 @@
+import io
+import pytest
+from encoder import generate_qr_code
+from decoder import verify_matrix
+from matrix_export import to_qrm_bytes, read_qrm_bytes, to_npy_bytes, read_npy_bytes, save_matrix
+from container import unpack_matrix
+
+DATA = "https://example.com/matrix"
+
+
+@pytest.fixture(params=["pil", "bitboard"])
+def qr_symbol(request):
+    return generate_qr_code(DATA, "M", backend=request.param)
+
+
+def test_qrm_round_trip(qr_symbol):
+    record = read_qrm_bytes(to_qrm_bytes(qr_symbol))
+    assert (record.version_num, record.ec_lvl, record.mask_num) == (qr_symbol.version_num, qr_symbol.ec_lvl, qr_symbol.mask_num)
+    matrix = unpack_matrix(record.packed, qr_symbol.modules_per_edge)
+    assert matrix == qr_symbol.get_matrix()
+    verify_matrix(matrix, DATA)
+    with pytest.raises(ValueError):
+        read_qrm_bytes(b"\x89PNG" + bytes(8))
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_npy_round_trip(qr_symbol, packed):
+    data = to_npy_bytes(qr_symbol, packed)
+    # the array data starts at a multiple of 64 bytes, like numpy writes it
+    assert (len(data) - len(qr_symbol.get_packed_rows() if packed else qr_symbol.get_module_bytes())) % 64 == 0
+    assert read_npy_bytes(data) == qr_symbol.get_matrix()
+
+
+def test_npy_loads_in_numpy(qr_symbol):
+    numpy = pytest.importorskip("numpy")
+    array = numpy.load(io.BytesIO(to_npy_bytes(qr_symbol)))
+    assert array.dtype == numpy.uint8 and array.tolist() == qr_symbol.get_matrix()
+    packed = numpy.load(io.BytesIO(to_npy_bytes(qr_symbol, packed=True)))
+    assert numpy.unpackbits(packed, axis=1)[:, :qr_symbol.modules_per_edge].tolist() == qr_symbol.get_matrix()
+
+
+def test_module_buffer(qr_symbol):
+    buffer = qr_symbol.get_module_buffer()
+    assert buffer.shape == (qr_symbol.modules_per_edge, qr_symbol.modules_per_edge)
+    assert buffer.tolist() == qr_symbol.get_matrix()
+
+
+def test_save_matrix(tmp_path, qr_symbol):
+    save_matrix(qr_symbol, str(tmp_path / "code.qrm"))
+    assert (tmp_path / "code.qrm").read_bytes() == qr_symbol.to_bytes("qrm")
+    file_object = io.BytesIO()
+    save_matrix(qr_symbol, file_object, "npy", packed=True)
+    assert file_object.getvalue() == to_npy_bytes(qr_symbol, packed=True)
+    with pytest.raises(ValueError, match="Unknown matrix format"):
+        save_matrix(qr_symbol, io.BytesIO(), "svg")
+
+
+@pytest.mark.parametrize("matrix_format", ["qrm", "npy"])
+def test_cli_matrix(tmp_path, run_script, matrix_format):
+    completed = run_script([DATA, "-e", "M", "--matrix", matrix_format, "-o", tmp_path / f"code.{matrix_format}"])
+    assert completed.returncode == 0, completed.stderr
+    assert (tmp_path / f"code.{matrix_format}").read_bytes() == generate_qr_code(DATA, "M").to_bytes(matrix_format)
@@ -0,0 +1,83 @@
+import pytest
+from encoder import generate_qr_code
+from decoder import decode_matrix, verify_symbol
+from capacity import MICRO_SYMBOLS, TRANS_EC_LVL
+from micro import generate_micro_qr_code
+
+# (data, err_corr, version name, ECL letter) of the smallest Micro QR symbol for the data
+CASES = [("1", "LMQH", "M1", "L"),
+         ("12345", "L", "M1", "L"),
+         ("12345678", "LMQH", "M2", "M"),
+         ("HELLO", "LMQH", "M2", "M"),
+         ("HELLO WORLD", "L", "M3", "L"),
+         ("hello", "LMQH", "M3", "M"),
+         ("https://ex.com", "L", "M4", "L"),
+         ("12345", "Q", "M4", "Q")]
+
+
+@pytest.mark.parametrize("data, err_corr, version_name, ecl", CASES)
+def test_micro_symbols_decode(data, err_corr, version_name, ecl):
+    qr_symbol = generate_qr_code(data, err_corr, micro=True)
+    assert qr_symbol.is_micro
+    assert (qr_symbol.get_version_name(), TRANS_EC_LVL[qr_symbol.ec_lvl]) == (version_name, ecl)
+    assert qr_symbol.modules_per_edge == 2 * int(version_name[1]) + 9
+    assert qr_symbol.get_default_filename() == f"./image-{version_name}{ecl}.png"
+    decoded = verify_symbol(qr_symbol, data)
+    assert decoded.data == data
+
+
+@pytest.mark.parametrize("mask", range(4))
+def test_every_mask(mask):
+    qr_symbol = generate_micro_qr_code("HELLO 123", mask=mask)
+    assert decode_matrix(qr_symbol.get_matrix()).mask_num == mask
+    verify_symbol(qr_symbol, "HELLO 123")
+    with pytest.raises(ValueError, match="only have masks"):
+        generate_micro_qr_code("1", mask=4)
+
+
+def test_every_symbol_size():
+    for micro_version, ec_lvl in MICRO_SYMBOLS:
+        data = "7" * (MICRO_SYMBOLS[(micro_version, ec_lvl)][1] // 4)
+        qr_symbol = generate_micro_qr_code(data, TRANS_EC_LVL[ec_lvl])
+        assert qr_symbol.version_num <= micro_version
+        verify_symbol(qr_symbol, data)
+
+
+def test_falls_back_to_regular_qr_code():
+    data = "https://example.com/too/long/for/micro"
+    qr_symbol = generate_qr_code(data, micro=True)
+    assert not qr_symbol.is_micro
+    assert qr_symbol.get_matrix() == generate_qr_code(data).get_matrix()
+    # a version, a mask above 3 or header bits need a regular symbol as well
+    assert not generate_qr_code("1", version_num=1, micro=True).is_micro
+    assert not generate_qr_code("1", mask=5, micro=True).is_micro
+    with pytest.raises(ValueError, match="too large for a Micro QR symbol"):
+        generate_micro_qr_code(data)
+
+
+def test_same_symbol_from_both_backends():
+    assert generate_qr_code("HELLO", micro=True, backend="bitboard").get_matrix() == generate_qr_code("HELLO", micro=True).get_matrix()
+
+
+def test_output_formats():
+    qr_symbol = generate_qr_code("12345", micro=True)
+    assert qr_symbol.to_bytes("png").startswith(b"\x89PNG")
+    assert qr_symbol.to_bytes("npy").startswith(b"\x93NUMPY")
+    with pytest.raises(ValueError, match="can't be saved as .qrm"):
+        qr_symbol.to_bytes("qrm")
+
+
+def test_independent_decoder():
+    zxingcpp = pytest.importorskip("zxingcpp")
+    qr_symbol = generate_qr_code("HELLO WORLD", "L", micro=True)
+    image = qr_symbol.render_sizes(["4x"])[0].convert("L")
+    results = zxingcpp.read_barcodes(image)
+    assert [result.text for result in results] == ["HELLO WORLD"]
+
+
+def test_cli_micro(tmp_path, run_script):
+    completed = run_script(["HELLO", "--micro", "--verify", "-o", tmp_path / "code.png"])
+    assert completed.returncode == 0, completed.stderr
+    assert (tmp_path / "code.png").read_bytes() == generate_qr_code("HELLO", micro=True).to_bytes()
+    completed = run_script(["--micro", "-b", tmp_path / "code.png"])
+    assert completed.returncode == 2 and b"--micro only works for a single code" in completed.stderr
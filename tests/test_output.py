@@ -0,0 +1,69 @@
+import io
+from PIL import Image
+import pytest
+from encoder import generate_qr_code, get_output_format
+from decoder import read_image_matrix, verify_matrix
+from sinks import format_output_name
+
+DATA = "https://example.com/output"
+
+
+@pytest.fixture(scope="module")
+def qr_symbol():
+    return generate_qr_code(DATA, "Q")
+
+
+def test_png_bytes_read_back(qr_symbol):
+    image = Image.open(io.BytesIO(qr_symbol.to_bytes()))
+    matrix = read_image_matrix(image, qr_symbol.module_arr.module_size)
+    assert matrix == qr_symbol.get_matrix()
+    verify_matrix(matrix, DATA)
+
+
+def test_save_destinations(tmp_path, qr_symbol):
+    png_bytes = qr_symbol.to_bytes()
+    assert qr_symbol.save(str(tmp_path / "code.png")) == len(png_bytes)
+    assert (tmp_path / "code.png").read_bytes() == png_bytes
+    # the format follows the extension of a path
+    qr_symbol.save(tmp_path / "code.qrm")
+    assert (tmp_path / "code.qrm").read_bytes() == qr_symbol.to_bytes("qrm")
+
+    file_object = io.BytesIO()
+    qr_symbol.save(file_object)
+    assert file_object.getvalue() == png_bytes
+
+    buffer = bytearray(len(png_bytes) + 10)
+    assert qr_symbol.save(buffer) == len(png_bytes)
+    assert bytes(buffer[:len(png_bytes)]) == png_bytes
+    with pytest.raises(ValueError, match="The buffer holds"):
+        qr_symbol.save(bytearray(10))
+
+
+def test_output_format():
+    assert [get_output_format(name) for name in ("a.png", "a.QRM", "b/a.npy", "a", "a.jpg")] == ["png", "qrm", "npy", "png", "png"]
+
+
+def test_name_template(qr_symbol):
+    name = format_output_name("{version}-{ecl}-{mask}.png", qr_symbol.version_num, qr_symbol.ec_lvl, qr_symbol.mask_num)
+    assert name == f"{qr_symbol.version_num}-Q-{qr_symbol.mask_num}.png"
+    assert format_output_name("{hash}", 1, 0, data=DATA) != format_output_name("{hash}", 1, 0, data=DATA + "!")
+    with pytest.raises(ValueError, match="Unknown field"):
+        format_output_name("{size}.png", 1, 0)
+
+
+def test_cli_stdout(run_script, qr_symbol):
+    completed = run_script([DATA, "-e", "Q", "-o", "-"])
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout == qr_symbol.to_bytes()
+
+
+def test_cli_name_template(tmp_path, run_script, qr_symbol):
+    completed = run_script([DATA, "-e", "Q", "-o", tmp_path / "{version}{ecl}.png"])
+    assert completed.returncode == 0, completed.stderr
+    assert (tmp_path / f"{qr_symbol.version_num}Q.png").read_bytes() == qr_symbol.to_bytes()
+
+
+def test_cli_sizes_need_png_output(tmp_path, run_script):
+    completed = run_script([DATA, "--sizes", "2x", "-o", tmp_path / "code.qrm"])
+    assert completed.returncode == 2 and b"--sizes only writes PNG images" in completed.stderr
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,87 @@
+import io
+import json
+import subprocess
+import sys
+import pytest
+from encoder import generate_qr_code
+from conftest import REPO_DIR
+from preflight import preflight, preflight_column, summarize_results
+
+PAYLOADS = [("https://example.com", "LMQH"), ("x" * 200, "M"), ("ÄÖÜ€", "H"), ("y" * 2900, "L"), ("", "Q")]
+
+
+@pytest.mark.parametrize("data, err_corr", PAYLOADS)
+def test_matches_generate_qr_code(data, err_corr):
+    result = preflight(data, err_corr, sizes=["2x", 300])
+    qr_symbol = generate_qr_code(data, err_corr, backend="bitboard")
+    assert result.fits()
+    assert (result.version_num, result.ec_lvl, result.get_version_name()) == (qr_symbol.version_num, qr_symbol.ec_lvl, qr_symbol.get_version_name())
+    assert result.modules_per_edge == qr_symbol.modules_per_edge
+    assert result.image_size == qr_symbol.image.size[0]
+    images = qr_symbol.render_sizes(["2x", 300])
+    assert result.sizes == {"2x": images[0].size[0], "300": images[1].size[0]}
+
+
+@pytest.mark.parametrize("data, err_corr", [("12345", "LMQH"), ("HELLO", "M"), ("hello", "L"), ("12345", "Q"), ("z" * 40, "LMQH")])
+def test_micro_matches_generate_qr_code(data, err_corr):
+    result = preflight(data, err_corr, micro=True, sizes=["3x"])
+    qr_symbol = generate_qr_code(data, err_corr, micro=True)
+    assert (result.is_micro, result.get_version_name(), result.ec_lvl) == (qr_symbol.is_micro, qr_symbol.get_version_name(), qr_symbol.ec_lvl)
+    assert result.image_size == qr_symbol.image.size[0]
+    assert result.sizes["3x"] == qr_symbol.render_sizes(["3x"])[0].size[0]
+
+
+def test_forced_version():
+    result = preflight("abc", "H", version_num=7)
+    qr_symbol = generate_qr_code("abc", "H", version_num=7)
+    assert (result.version_num, result.modules_per_edge) == (7, qr_symbol.modules_per_edge)
+
+
+def test_too_large_has_the_same_error():
+    data = "x" * 3000
+    with pytest.raises(ValueError) as error:
+        generate_qr_code(data, "L")
+    result = preflight(data, "L", index=4)
+    assert not result.fits()
+    assert result.error == str(error.value)
+    assert result.to_dict() == {"index": 4, "fits": False, "error": str(error.value)}
+
+
+def test_preflight_column():
+    csv_file = io.StringIO("name,url\na,https://example.com/a\nb\nc," + "x" * 3000 + "\nd,12345\n")
+    results = list(preflight_column(csv_file, "url", micro=True))
+    assert [result.index for result in results] == [1, 2, 3, 4]
+    assert [result.fits() for result in results] == [True, False, False, True]
+    assert results[1].error == "Row 2 has no column url"
+    assert results[3].get_version_name() == "M1"
+    assert summarize_results(results) == {"rows": 4, "fit": 2, "failed": 2, "versions": {"2": 1, "M1": 1}}
+    with pytest.raises(ValueError, match="Unknown column"):
+        list(preflight_column(io.StringIO("name\nx\n"), "url"))
+    results = list(preflight_column(io.StringIO("a;12345\n"), 1, has_header=False, delimiter=";"))
+    assert results[0].version_num == generate_qr_code("12345").version_num
+
+
+def test_does_not_import_pil():
+    code = "import sys, preflight; preflight.preflight('https://example.com', sizes=['2x']); print('PIL' in sys.modules)"
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, cwd=REPO_DIR, timeout=60)
+    assert completed.stdout.strip() == b"False", completed.stderr
+
+
+def test_cli(tmp_path, run_script):
+    completed = run_script(["https://example.com", "-e", "M", "--sizes", "2x"], script="preflight.py")
+    assert completed.returncode == 0
+    report = json.loads(completed.stdout)
+    assert (report["version"], report["ecl"]) == (generate_qr_code("https://example.com", "M").get_version_name(), "M")
+
+    assert run_script(["x" * 3000, "-e", "L"], script="preflight.py").returncode == 1
+
+    csv_path = tmp_path / "rows.csv"
+    csv_path.write_text("url\nhttps://example.com\n" + "x" * 3000 + "\n")
+    completed = run_script(["--csv", csv_path, "--column", "url"], script="preflight.py")
+    assert completed.returncode == 1
+    assert [json.loads(line)["fits"] for line in completed.stdout.splitlines()] == [True, False]
+    assert json.loads(completed.stderr)["failed"] == 1
+
+    completed = run_script(["--csv", "-", "--column", "0", "--no-header"], script="preflight.py", input=b"12345\n")
+    assert completed.returncode == 0
+    assert run_script([], script="preflight.py").returncode == 2
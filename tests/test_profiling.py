@@ -0,0 +1,53 @@
+import json
+from encoder import generate_qr_code
+from profiling import PhaseTimer, NULL_TIMER
+
+
+def test_timer_records_every_stage_of_an_encode():
+    timer = PhaseTimer()
+    qr_symbol = generate_qr_code("https://example.com", timer=timer)
+    report = timer.report()
+    for stage in ("select_version", "error_correction", "function_patterns", "place_data", "mask"):
+        assert report["stages"][stage] >= 0
+    assert report["version_num"] == qr_symbol.version_num
+    assert report["mask"] == qr_symbol.mask_num
+    assert sorted(report["mask_scores"]) == list(range(8))
+    assert report["module_writes"] > 0
+    assert json.loads(timer.to_json())["stages"].keys() == report["stages"].keys()
+
+
+def test_timer_does_not_change_the_symbol():
+    assert generate_qr_code("timed", timer=PhaseTimer()).get_matrix() == generate_qr_code("timed", timer=NULL_TIMER).get_matrix()
+
+
+def test_repeated_stages_accumulate_and_call_on_stage():
+    seen = []
+    timer = PhaseTimer(lambda name, seconds: seen.append(name))
+    for _ in range(3):
+        with timer.phase("write"):
+            pass
+    timer.count("codes", 2)
+    timer.count("codes")
+    assert seen == ["write"] * 3
+    assert timer.report()["codes"] == 3
+
+
+def test_cli_profile_report(run_script, tmp_path):
+    completed = run_script(["hello", "-o", tmp_path / "code.png", "--profile"])
+    assert completed.returncode == 0
+    report = json.loads(completed.stderr.decode().strip().splitlines()[-1])
+    assert report["version_num"] == 1
+    assert "mask" in report["stages"]
+    assert (tmp_path / "code.png").exists()
+
+
+def test_module_writes_are_only_counted_with_a_timer():
+    for options in ({}, {"backend": "bitboard"}, {"micro": True}):
+        timer = PhaseTimer()
+        timed = generate_qr_code("12345", timer=timer, **options)
+        assert timer.report()["module_writes"] > 0
+        assert timed.module_arr.write_count == timer.report()["module_writes"]
+        untimed = generate_qr_code("12345", **options)
+        assert untimed.module_arr.write_count == 0
+        assert type(untimed.module_arr) is not type(timed.module_arr)
+        assert untimed.get_matrix() == timed.get_matrix()
@@ -0,0 +1,87 @@
+import pytest
+from encoder import generate_qr_code
+from decoder import read_image_matrix, verify_matrix
+from capacity import get_target_module_size, parse_size_targets, MAX_IMAGE_SIZE
+from resolutions import get_size_filename
+
+DATA = "https://example.com/sizes"
+
+
+@pytest.fixture(params=["pil", "bitboard"])
+def qr_symbol(request):
+    return generate_qr_code(DATA, backend=request.param)
+
+
+def test_1x_is_the_encoded_image(qr_symbol):
+    image, = qr_symbol.render_sizes(["1x"])
+    assert image.size == qr_symbol.image.size
+    assert image.tobytes() == qr_symbol.image.tobytes()
+
+
+def test_sizes_read_back(qr_symbol):
+    targets = ["2x", "0.5x", 512, "300", "2x"]
+    images = qr_symbol.render_sizes(targets)
+    assert len(images) == len(targets)
+    for target, image in zip(targets, images):
+        module_size = get_target_module_size(target, qr_symbol.modules_per_edge)
+        assert image.size[0] == module_size * (qr_symbol.modules_per_edge + 2)
+        matrix = read_image_matrix(image, module_size)
+        assert matrix == qr_symbol.get_matrix()
+        verify_matrix(matrix, DATA)
+    # a pixel target is the largest image that fits in it
+    assert images[2].size[0] <= 512 < images[2].size[0] + qr_symbol.modules_per_edge + 2
+
+
+def test_micro_sizes():
+    qr_symbol = generate_qr_code("12345", micro=True)
+    image, = qr_symbol.render_sizes(["3x"])
+    module_size = get_target_module_size("3x", qr_symbol.modules_per_edge, qr_symbol.quiet_zone)
+    assert read_image_matrix(image, module_size, qr_symbol.quiet_zone) == qr_symbol.get_matrix()
+
+
+def test_unknown_size(qr_symbol):
+    with pytest.raises(ValueError, match="Unknown size"):
+        qr_symbol.render_sizes(["big"])
+
+
+@pytest.mark.parametrize("target", ["0x", "-2x", "0", "-5", "infx", "nanx"])
+def test_sizes_have_to_be_positive(qr_symbol, target):
+    with pytest.raises(ValueError, match="has to be a positive"):
+        qr_symbol.render_sizes([target])
+
+
+@pytest.mark.parametrize("target", ["1e9x", 10**9])
+def test_sizes_have_a_limit(qr_symbol, target):
+    with pytest.raises(ValueError, match=f"the largest is {MAX_IMAGE_SIZE}"):
+        qr_symbol.render_sizes([target])
+
+
+def test_parse_size_targets():
+    assert parse_size_targets(" 1x, 2X,512 ,") == ["1x", "2X", "512"]
+    with pytest.raises(ValueError, match="No sizes given"):
+        parse_size_targets(" , ")
+    with pytest.raises(ValueError, match="has to be a positive"):
+        parse_size_targets("2x,0x")
+
+
+def test_size_filename():
+    assert get_size_filename("out/image-3M.png", "2x") == "out/image-3M@2x.png"
+    assert get_size_filename("image-3M.png", 512) == "image-3M@512px.png"
+    assert get_size_filename("code", " 0.5X ") == "code@0.5x.png"
+
+
+def test_cli_sizes(tmp_path, run_script):
+    completed = run_script([DATA, "-o", tmp_path / "code.png", "--sizes", "1x,2x,256"])
+    assert completed.returncode == 0, completed.stderr
+    qr_symbol = generate_qr_code(DATA)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["code@1x.png", "code@256px.png", "code@2x.png"]
+    assert (tmp_path / "code@1x.png").read_bytes() == qr_symbol.to_bytes()
+
+
+@pytest.mark.parametrize("script", ["qr-code-gen.py", "preflight.py"])
+def test_cli_rejects_bad_sizes(tmp_path, run_script, script):
+    for sizes in ("0x", "-5", "infx", "1e9x"):
+        completed = run_script([DATA, f"--sizes={sizes}"], script=script, cwd=tmp_path)
+        assert completed.returncode == 2, completed.stderr
+        assert b"Traceback" not in completed.stderr
+    assert list(tmp_path.iterdir()) == []
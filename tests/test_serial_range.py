@@ -0,0 +1,48 @@
+import pytest
+from encoder import generate_qr_code, sanitize_string, TRANS_EC_LVL
+from decoder import decode_matrix
+from serial_range import generate_serial_range, get_constant_prefix
+
+
+def decode_results(results):
+    return [decode_matrix(result.get_matrix()).data for result in results]
+
+
+def test_symbols_match_generate_qr_code():
+    results = list(generate_serial_range("SKU-{:04d}", 8, 12, output="matrix"))
+    assert [result.index for result in results] == [8, 9, 10, 11]
+    for result in results:
+        expected = generate_qr_code(result.data, TRANS_EC_LVL[result.ec_lvl], result.version_num, backend="bitboard")
+        assert result.mask_num == expected.mask_num
+        assert result.get_matrix() == expected.get_matrix()
+
+
+def test_one_version_for_the_whole_run():
+    results = list(generate_serial_range("N{:d}", 1, 200, 33, output="matrix", verify=True))
+    assert all(result.error is None for result in results)
+    assert len({(result.version_num, result.ec_lvl) for result in results}) == 1
+    assert decode_results(results) == [f"N{number}" for number in range(1, 200, 33)]
+
+
+def test_workers_give_the_same_symbols():
+    one = list(generate_serial_range("ID-{:05d}", 0, 150, 7, output="matrix"))
+    two = list(generate_serial_range("ID-{:05d}", 0, 150, 7, output="matrix", workers=2, chunk_length=4))
+    assert [result.packed_matrix for result in one] == [result.packed_matrix for result in two]
+
+
+def test_prefix_that_sanitizing_shortens():
+    results = list(generate_serial_range("€–{:d}-\xe9", 1, 3, output="matrix", verify=True))
+    assert [result.error for result in results] == [None, None]
+    assert decode_results(results) == [sanitize_string(f"€–{number}-\xe9") for number in (1, 2)]
+
+
+def test_escaped_braces_in_the_prefix():
+    assert get_constant_prefix("A{{x}}-{:d}") == "A{x}-"
+    assert get_constant_prefix("{:d}") == ""
+    results = list(generate_serial_range("A{{x}}-{:d}", 5, 7, output="matrix", verify=True))
+    assert decode_results(results) == ["A{x}-5", "A{x}-6"]
+
+
+def test_format_without_a_field():
+    with pytest.raises(ValueError, match="needs a replacement field"):
+        get_constant_prefix("A{{x}}")
@@ -0,0 +1,53 @@
+import os
+import pytest
+from batch import run_jobs, run_batch
+from load_harness import make_jobs
+from shared_ring import run_jobs_shared
+
+LINES = ["https://example.com/ring", "x" * 3000, "y" * 300] + [f"line {number}" for number in range(17)]
+
+
+def get_shared_memory():
+    return set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+
+
+def get_outcomes(results):
+    return [(result.index, result.version_num, result.ec_lvl, result.mask_num, result.error, result.png_bytes, result.packed_matrix) for result in results]
+
+
+@pytest.mark.parametrize("output", ["png", "matrix"])
+def test_same_results_as_pickle(output):
+    shared_memory = get_shared_memory()
+    expected = get_outcomes(run_batch(LINES, workers=2, backend="bitboard", output=output, verify=True))
+    results = list(run_batch(LINES, workers=2, backend="bitboard", output=output, verify=True, transport="shared_memory"))
+    assert get_outcomes(results) == expected
+    assert [result.data for result in results] == LINES
+    assert results[1].error is not None
+    assert get_shared_memory() == shared_memory
+
+
+def test_ring_wraps_around():
+    # 2 workers and chunks of 2 only have 8 slots for the 30 jobs
+    jobs = make_jobs("every_ecl", 30, 0)
+    expected = get_outcomes(run_jobs(jobs, backend="bitboard", output="matrix"))
+    assert get_outcomes(run_jobs_shared(jobs, 2, backend="bitboard", chunksize=2, output="matrix")) == expected
+
+
+def test_closing_early_frees_the_ring():
+    shared_memory = get_shared_memory()
+    results = run_jobs_shared(make_jobs("short_url", 40, 0), 2, backend="bitboard", chunksize=2)
+    assert next(results).index == 1
+    results.close()
+    assert get_shared_memory() == shared_memory
+
+
+def test_cli_transport(tmp_path, run_script):
+    batch_file = tmp_path / "lines.txt"
+    batch_file.write_text("\n".join(LINES[2:8]) + "\n")
+    for transport in ("pickle", "shared_memory"):
+        (tmp_path / transport).mkdir()
+        completed = run_script(["-b", batch_file, "-j", 2, "--transport", transport, "--archive", tmp_path / transport])
+        assert completed.returncode == 0, completed.stderr
+    pickled = sorted((path.name, path.read_bytes()) for path in (tmp_path / "pickle").iterdir())
+    assert len(pickled) == 6
+    assert sorted((path.name, path.read_bytes()) for path in (tmp_path / "shared_memory").iterdir()) == pickled
@@ -0,0 +1,98 @@
+from PIL import Image
+import pytest
+from encoder import generate_qr_code
+from decoder import verify_matrix
+from PIL import __version__ as PILLOW_VERSION
+from sheets import SheetLayout, SheetComposer, TiffPageWriter, write_sheets, can_append_tiff_pages, PAGE_SIZES, TIFF_APPEND_PILLOW_VERSIONS
+
+DATA = [f"https://example.com/item/{number}" for number in range(14)]
+
+
+# the matrix of the code in cell cell_num of a page, read back from the center of every module
+def read_cell(page, layout, cell_num, modules_per_edge):
+    cell_x, cell_y = layout.get_cell_position(cell_num)
+    module_size = layout.code_size // (modules_per_edge + 2*layout.quiet_zone)
+    offset = (layout.code_size - modules_per_edge * module_size) // 2 + module_size // 2
+    return [[0 if page.getpixel((cell_x + offset + x*module_size, cell_y + offset + y*module_size)) else 1
+             for x in range(modules_per_edge)]
+            for y in range(modules_per_edge)]
+
+
+def test_codes_on_the_pages_read_back():
+    layout = SheetLayout(PAGE_SIZES["a5"], dpi=150, code_size=25, caption=lambda item: item)
+    pages = []
+    composer = SheetComposer(layout, pages.append)
+    symbols = [generate_qr_code(data, backend="bitboard") for data in DATA]
+    for data, qr_symbol in zip(DATA, symbols):
+        composer.add(qr_symbol.get_matrix(), data)
+    composer.flush()
+
+    per_page = layout.get_codes_per_page()
+    assert len(pages) == -(-len(DATA) // per_page)
+    for code_num, (data, qr_symbol) in enumerate(zip(DATA, symbols)):
+        matrix = read_cell(pages[code_num // per_page], layout, code_num % per_page, qr_symbol.modules_per_edge)
+        assert matrix == qr_symbol.get_matrix()
+        verify_matrix(matrix, data)
+
+
+@pytest.mark.parametrize("extension", [".pdf", ".tif", ".png"])
+def test_page_writers(tmp_path, extension):
+    layout = SheetLayout(PAGE_SIZES["a5"], dpi=100, code_size=40)
+    symbols = [generate_qr_code(data, backend="bitboard") for data in DATA]
+    page_count = write_sheets(symbols, str(tmp_path / f"sheet{extension}"), layout)
+    assert page_count == -(-len(DATA) // layout.get_codes_per_page())
+    if extension == ".pdf":
+        pdf = (tmp_path / "sheet.pdf").read_bytes()
+        assert pdf.startswith(b"%PDF-1.4") and pdf.rstrip().endswith(b"%%EOF")
+        assert pdf.count(b"/Type /Page ") == page_count
+    elif extension == ".tif":
+        with Image.open(tmp_path / "sheet.tif") as tiff:
+            assert tiff.n_frames == page_count
+    else:
+        assert sorted(path.name for path in tmp_path.iterdir()) == [f"sheet-{page_num}.png" for page_num in range(1, page_count+1)]
+
+
+# TiffPageWriter appends pages with Pillow's undocumented AppendingTiffWriter, check it again before
+# adding a new Pillow version to TIFF_APPEND_PILLOW_VERSIONS
+def test_pillow_version_is_pinned():
+    assert int(PILLOW_VERSION.split(".")[0]) in TIFF_APPEND_PILLOW_VERSIONS
+    assert can_append_tiff_pages()
+
+
+def test_tiff_pages_appended_or_saved_at_once(tmp_path):
+    layout = SheetLayout(PAGE_SIZES["a5"], dpi=100, code_size=40)
+    pages = []
+    composer = SheetComposer(layout, pages.append)
+    for data in DATA:
+        composer.add(generate_qr_code(data, backend="bitboard").get_matrix())
+    composer.flush()
+    assert len(pages) > 1
+    for append_pages in (True, False):
+        writer = TiffPageWriter(str(tmp_path / f"{append_pages}.tif"), 100, append_pages)
+        for page in pages:
+            writer.write_page(page)
+        writer.close()
+        with Image.open(tmp_path / f"{append_pages}.tif") as tiff:
+            assert tiff.n_frames == len(pages)
+            for page_num, page in enumerate(pages):
+                tiff.seek(page_num)
+                assert tiff.convert("1").tobytes() == page.tobytes()
+                assert tuple(round(value) for value in tiff.info["dpi"]) == (100, 100)
+
+
+def test_codes_that_do_not_fit():
+    with pytest.raises(ValueError, match="Not even one code fits"):
+        SheetLayout(PAGE_SIZES["a5"], code_size=500)
+    composer = SheetComposer(SheetLayout(dpi=72, code_size=5), lambda page: None)
+    with pytest.raises(ValueError, match="does not fit"):
+        composer.add(generate_qr_code("x" * 500, backend="bitboard").get_matrix())
+
+
+def test_cli_sheets(tmp_path, run_script):
+    batch_file = tmp_path / "lines.txt"
+    batch_file.write_text("\n".join(DATA) + "\n")
+    completed = run_script(["-b", batch_file, "--sheets", tmp_path / "codes.pdf", "--page-size", "a5", "--dpi", 100, "--caption"])
+    assert completed.returncode == 0, completed.stderr
+    assert (tmp_path / "codes.pdf").read_bytes().startswith(b"%PDF")
+    completed = run_script(["-b", batch_file, "--sheets", tmp_path / "codes.pdf", "--archive", tmp_path / "codes.zip"])
+    assert completed.returncode != 0 and b"only one of --sheets" in completed.stderr
@@ -0,0 +1,136 @@
+import os
+import tarfile
+from zipfile import ZipFile
+import pytest
+from encoder import generate_qr_code, TRANS_EC_LVL
+from batch import run_batch
+from container import ContainerReader, ContainerWriter, pack_matrix, unpack_matrix
+from sinks import open_sink, FileSink, ZipSink, TarSink, ContainerSink
+
+LINES = ["first", "https://example.com/second", "third line", "x" * 80]
+
+
+def write_batch(path, append=False):
+    with open_sink(path, append) as sink:
+        for result in run_batch(LINES, backend="bitboard", output=sink.output):
+            sink.write(result)
+
+
+def expected_png(result_index):
+    return generate_qr_code(LINES[result_index-1], backend="bitboard").to_bytes()
+
+
+def test_open_sink_picks_by_extension(tmp_path):
+    assert isinstance(open_sink(str(tmp_path)), FileSink)
+    for name, sink_class in [("a.zip", ZipSink), ("a.tar", TarSink), ("a.tgz", TarSink), ("a.qrc", ContainerSink)]:
+        sink = open_sink(str(tmp_path / name))
+        assert type(sink) is sink_class
+        sink.close()
+    with pytest.raises(ValueError, match="Unknown archive type"):
+        open_sink(str(tmp_path / "a.rar"))
+
+
+def test_zip_and_tar_hold_the_pngs(tmp_path):
+    write_batch(str(tmp_path / "codes.zip"))
+    write_batch(str(tmp_path / "codes.tar.gz"))
+    with ZipFile(tmp_path / "codes.zip") as archive:
+        zip_members = {name: archive.read(name) for name in archive.namelist()}
+    with tarfile.open(tmp_path / "codes.tar.gz") as archive:
+        tar_members = {member.name: archive.extractfile(member).read() for member in archive.getmembers()}
+    assert zip_members == tar_members
+    assert len(zip_members) == len(LINES)
+    for name, png_bytes in zip_members.items():
+        assert png_bytes == expected_png(int(name.split("-")[1]))
+
+
+def test_name_template(tmp_path):
+    with open_sink(str(tmp_path / "out" / "{index}-{version}{ecl}.png")) as sink:
+        for result in run_batch(LINES[:2], backend="bitboard"):
+            sink.write(result)
+    expected = []
+    for index, line in enumerate(LINES[:2], 1):
+        qr_symbol = generate_qr_code(line, backend="bitboard")
+        expected.append(f"{index}-{qr_symbol.version_num}{TRANS_EC_LVL[qr_symbol.ec_lvl]}.png")
+    assert sorted(os.listdir(tmp_path / "out")) == expected
+
+
+def test_name_template_count(tmp_path):
+    with open_sink(str(tmp_path / "{index}of{count}.png"), count=len(LINES)) as sink:
+        for result in run_batch(LINES, backend="bitboard"):
+            sink.write(result)
+    assert sorted(os.listdir(tmp_path)) == [f"{index}of4.png" for index in range(1, 5)]
+    with pytest.raises(ValueError, match="uses {count}"):
+        open_sink(str(tmp_path / "{index}of{count}.png"))
+
+
+def test_container_round_trip_and_append(tmp_path):
+    path = str(tmp_path / "codes.qrc")
+    write_batch(path)
+    write_batch(path, append=True)
+    with ContainerReader(path) as reader:
+        records = list(reader)
+    assert [record.index for record in records] == [1, 2, 3, 4] * 2
+    for record in records:
+        qr_symbol = generate_qr_code(LINES[record.index-1], backend="bitboard")
+        assert (record.version_num, record.ec_lvl, record.mask_num) == (qr_symbol.version_num, qr_symbol.ec_lvl, qr_symbol.mask_num)
+        assert record.get_matrix() == qr_symbol.get_matrix()
+
+
+def test_container_without_index_is_rebuilt(tmp_path):
+    path = str(tmp_path / "unclosed.qrc")
+    qr_symbol = generate_qr_code("never closed", backend="bitboard")
+    writer = ContainerWriter(path)
+    writer.write(7, qr_symbol.version_num, qr_symbol.ec_lvl, qr_symbol.mask_num, qr_symbol.get_packed_rows())
+    writer.file.flush()
+    with ContainerReader(path) as reader:
+        assert len(reader) == 1
+        assert reader[0].index == 7
+        assert reader[0].get_matrix() == qr_symbol.get_matrix()
+    writer.close()
+
+
+@pytest.mark.parametrize("content", [b"", b"QRM", b"\x89PNG\r\n\x1a\n", b"QRMC\x07\x00\x00\x00"])
+def test_not_a_container(tmp_path, content):
+    path = tmp_path / "broken.qrc"
+    path.write_bytes(content)
+    with pytest.raises(ValueError, match="is not a QRMC container"):
+        ContainerReader(str(path))
+
+
+def test_truncated_container(tmp_path):
+    path = str(tmp_path / "codes.qrc")
+    write_batch(path)
+    with open(path, "rb") as container_file:
+        content = container_file.read()
+    # only the header and a part of the first record are left
+    with open(path, "wb") as container_file:
+        container_file.write(content[:20])
+    with ContainerReader(path) as reader:
+        assert len(reader) == 0
+
+
+def test_pack_matrix_round_trip():
+    matrix = generate_qr_code("packed", "H", 3, backend="bitboard").get_matrix()
+    assert unpack_matrix(pack_matrix(matrix), len(matrix)) == matrix
+
+
+def test_cli_archive(run_script, tmp_path):
+    lines_path = tmp_path / "lines.txt"
+    lines_path.write_text("\n".join(LINES) + "\n")
+    completed = run_script(["-b", lines_path, "--archive", tmp_path / "codes.zip", "--backend", "bitboard"])
+    assert completed.returncode == 0, completed.stderr
+    with ZipFile(tmp_path / "codes.zip") as archive:
+        assert len(archive.namelist()) == len(LINES)
+
+
+def test_cli_count_in_name_template(run_script, tmp_path):
+    lines_path = tmp_path / "lines.txt"
+    lines_path.write_text("\n".join(LINES) + "\n")
+    completed = run_script(["-b", lines_path, "-o", tmp_path / "t" / "{index}of{count}.png", "--backend", "bitboard"])
+    assert completed.returncode == 0, completed.stderr
+    assert sorted(os.listdir(tmp_path / "t")) == [f"{index}of4.png" for index in range(1, 5)]
+    completed = run_script(["--serial", "S{:d}", "--start", 5, "--stop", 8, "-o", tmp_path / "s" / "{index}of{count}.png"])
+    assert completed.returncode == 0, completed.stderr
+    assert sorted(os.listdir(tmp_path / "s")) == ["5of3.png", "6of3.png", "7of3.png"]
+    completed = run_script(["-b", "-", "-o", tmp_path / "{count}.png"], input=b"a\n")
+    assert completed.returncode == 2 and b"{count} can't be used with --batch -" in completed.stderr
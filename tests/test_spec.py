@@ -0,0 +1,66 @@
+import spec_tables
+from spec import FORMAT_WORDS, VERSION_WORDS, MASK_CONDITIONS, MICRO_MASK_CONDITIONS, get_format_word, get_version_word, get_codeword_counts
+from gen_spec_tables import check_tables, calc_format_word, calc_version_word, write_tables
+from masks import QrMask
+import bitboard
+import decoder
+import micro
+
+
+def test_generated_tables_pass_their_checks():
+    check_tables(FORMAT_WORDS, VERSION_WORDS)
+    for ec_lvl in range(4):
+        for mask_num in range(8):
+            assert get_format_word(ec_lvl, mask_num) == calc_format_word(ec_lvl, mask_num)
+    for version_num in range(7, 41):
+        assert get_version_word(version_num) == calc_version_word(version_num)
+
+
+def test_spec_tables_are_up_to_date(tmp_path):
+    with open(tmp_path / "spec_tables.py", "w") as output_file:
+        write_tables(output_file, FORMAT_WORDS, VERSION_WORDS)
+    with open(spec_tables.__file__) as checked_in:
+        assert (tmp_path / "spec_tables.py").read_text() == checked_in.read()
+
+
+def test_cli(tmp_path, run_script):
+    completed = run_script(["--check"], script="gen_spec_tables.py", cwd=tmp_path)
+    assert completed.returncode == 0 and b"is up to date" in completed.stdout
+    assert run_script(["--help"], script="gen_spec_tables.py", cwd=tmp_path).returncode == 0
+    assert list(tmp_path.iterdir()) == []
+
+    stale_tables = tmp_path / "stale.py"
+    stale_tables.write_text("CODEWORD_TABLE = ()\n")
+    assert run_script([stale_tables, "--check"], script="gen_spec_tables.py").returncode == 1
+    assert run_script([stale_tables], script="gen_spec_tables.py").returncode == 0
+    with open(spec_tables.__file__) as checked_in:
+        assert stale_tables.read_text() == checked_in.read()
+
+
+def test_codeword_counts_are_shared_and_immutable():
+    assert get_codeword_counts(5) is get_codeword_counts(5)
+    assert isinstance(get_codeword_counts(5), tuple)
+    # version 5 Q: 2 blocks of 15 and 2 blocks of 16 data codewords, 18 error correction codewords each
+    q_cw_info = get_codeword_counts(5)[1]
+    assert (q_cw_info.getBlocksCount(0), q_cw_info.getDataCWCount(0), q_cw_info.getBlocksCount(1), q_cw_info.getDataCWCount(1), q_cw_info.getECCWCount()) == (2, 15, 2, 16, 18)
+
+
+def test_mask_conditions_are_defined_once():
+    assert bitboard.MASK_CONDITIONS is MASK_CONDITIONS
+    assert decoder.MASK_CONDITIONS is MASK_CONDITIONS
+    assert micro.MICRO_MASK_CONDITIONS is MICRO_MASK_CONDITIONS
+    assert list(MICRO_MASK_CONDITIONS) == [MASK_CONDITIONS[mask_num] for mask_num in (1, 4, 6, 7)]
+
+
+class FakeModules:
+
+    def get_module(self, x, y):
+        return 0
+
+
+def test_qr_mask_flips_where_the_condition_holds():
+    qr_mask = QrMask(21, 0)
+    for mask_num, condition in enumerate(MASK_CONDITIONS):
+        for row in range(12):
+            for column in range(12):
+                assert bool(qr_mask.get_masked_module(FakeModules(), column, row, mask_num)) == condition(row, column)
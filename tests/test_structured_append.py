@@ -0,0 +1,59 @@
+from io import BytesIO
+from PIL import Image
+import pytest
+from encoder import generate_qr_code, get_module_size
+from decoder import decode_matrix, read_image_matrix
+from structured_append import generate_structured_append, split_payload, calc_parity, get_header_bits, MAX_SYMBOLS
+
+DATA = "".join(chr(32 + (i * 7) % 95) for i in range(400))
+
+
+def decode_result(result):
+    modules_per_edge = ((result.version_num - 1) * 4) + 21
+    return decode_matrix(read_image_matrix(Image.open(BytesIO(result.png_bytes)), get_module_size(modules_per_edge)))
+
+
+def test_parts_read_back_into_the_payload():
+    results = generate_structured_append(DATA, "M", max_version=5, backend="bitboard", verify=True)
+    assert len(results) > 1
+    parts = []
+    for position, result in enumerate(results):
+        assert result.error is None
+        assert result.index == position + 1
+        assert result.version_num <= 5
+        decoded = decode_result(result)
+        assert decoded.structured_append == (position, len(results), calc_parity(DATA))
+        parts.append(decoded.data)
+    assert "".join(parts) == DATA
+
+
+def test_parts_match_single_symbols_with_their_header():
+    results = generate_structured_append(DATA, "L", max_version=6, backend="bitboard")
+    parts, parity = split_payload(DATA, "L", 6)
+    for position, (result, part) in enumerate(zip(results, parts)):
+        qr_symbol = generate_qr_code(part, "L", header_bits=get_header_bits(position, len(parts), parity), backend="bitboard")
+        assert result.png_bytes == qr_symbol.to_bytes()
+
+
+def test_workers_give_the_same_parts():
+    one = generate_structured_append(DATA, "Q", max_version=5, backend="bitboard")
+    two = generate_structured_append(DATA, "Q", max_version=5, backend="bitboard", workers=2)
+    assert [result.png_bytes for result in one] == [result.png_bytes for result in two]
+
+
+def test_too_large_for_sixteen_symbols():
+    with pytest.raises(ValueError, match=f"{MAX_SYMBOLS} structured append"):
+        split_payload("x" * (MAX_SYMBOLS * 3000), "H", 40)
+
+
+def test_cli_name_template(tmp_path, run_script):
+    data = "x" * 40
+    completed = run_script([data, "-s", 1, "-o", tmp_path / "parts" / "{index}of{count}.png"])
+    assert completed.returncode == 0, completed.stderr
+    results = generate_structured_append(data, max_version=1)
+    assert sorted(path.name for path in (tmp_path / "parts").iterdir()) == [f"{index}of{len(results)}.png" for index in range(1, len(results)+1)]
+    assert (tmp_path / "parts" / f"1of{len(results)}.png").read_bytes() == results[0].png_bytes
+    # a file in the way of the directory is reported, not a traceback
+    (tmp_path / "blocker").write_bytes(b"")
+    completed = run_script([data, "-s", 1, "-o", tmp_path / "blocker" / "{index}.png"])
+    assert b"Error saving file:" in completed.stdout and b"Traceback" not in completed.stderr
@@ -0,0 +1,35 @@
+import pytest
+from encoder import generate_qr_code, TRANS_EC_LVL
+from decoder import verify_symbol
+from template import QrTemplate
+
+PREFIX = "https://example.com/t/?id="
+
+
+@pytest.mark.parametrize("err_corr, version_num", [("LMQH", 0), ("L", 0), ("H", 12)])
+def test_same_symbols_as_a_full_encode(err_corr, version_num):
+    template = QrTemplate(PREFIX, err_corr, version_num, max_suffix_length=12)
+    for suffix in ["", "1", "000042", "abcdefghijkl", "\xe9t\xe9"]:
+        qr_symbol = template.generate(suffix)
+        expected = generate_qr_code(PREFIX + suffix, TRANS_EC_LVL[template.ec_lvl], template.version_num, backend="bitboard")
+        assert (qr_symbol.version_num, qr_symbol.ec_lvl, qr_symbol.mask_num) == (expected.version_num, expected.ec_lvl, expected.mask_num)
+        assert qr_symbol.get_matrix() == expected.get_matrix()
+        assert qr_symbol.to_bytes() == expected.to_bytes()
+        verify_symbol(qr_symbol, PREFIX + suffix)
+
+
+def test_fixed_mask():
+    template = QrTemplate(PREFIX, "M", max_suffix_length=6)
+    for mask in range(8):
+        assert template.generate("123456", mask).get_matrix() == generate_qr_code(PREFIX + "123456", TRANS_EC_LVL[template.ec_lvl], template.version_num, mask).get_matrix()
+
+
+def test_suffix_too_long():
+    template = QrTemplate(PREFIX, "M", max_suffix_length=4)
+    with pytest.raises(ValueError, match="only has room for"):
+        template.generate("x" * (template.max_suffix_length + 1))
+
+
+def test_only_the_bitboard_backend():
+    with pytest.raises(ValueError):
+        QrTemplate(PREFIX, backend="pil")
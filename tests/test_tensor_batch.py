@@ -0,0 +1,56 @@
+import pytest
+from batch import run_jobs, run_batch
+from masks import MaskStrategy
+from load_harness import make_jobs
+
+pytest.importorskip("numpy")
+from tensor_batch import encode_window, get_windows
+
+LINES = ["https://example.com/tensor", "x" * 3000, "", "ÄÖÜ€", "y" * 500] + [f"line {number}" for number in range(10)]
+
+
+def get_outcomes(results):
+    return [(result.index, result.data, result.version_num, result.ec_lvl, result.mask_num, result.error, result.png_bytes, result.packed_matrix) for result in results]
+
+
+@pytest.mark.parametrize("output", ["png", "matrix"])
+def test_same_results_as_symbol_engine(output):
+    expected = get_outcomes(run_batch(LINES, verify=True, backend="bitboard", output=output))
+    assert get_outcomes(run_batch(LINES, verify=True, output=output, engine="tensor")) == expected
+
+
+def test_every_ecl_version_and_mask():
+    jobs = make_jobs("every_ecl", 40, 0) + make_jobs("high_version", 4, 0)
+    jobs += [(100 + mask, "fixed mask", "M", 2, mask, "") for mask in range(8)]
+    expected = get_outcomes(run_jobs(jobs, verify=True, backend="bitboard", output="matrix"))
+    assert get_outcomes(run_jobs(jobs, verify=True, output="matrix", engine="tensor")) == expected
+
+
+def test_windows_and_workers():
+    jobs = make_jobs("short_url", 30, 2)
+    expected = get_outcomes(run_jobs(jobs, backend="bitboard"))
+    assert [len(window) for window in get_windows(jobs, 8)] == [8, 8, 8, 6]
+    assert get_outcomes(result for window in get_windows(jobs, 8) for result in encode_window(window)) == expected
+    assert get_outcomes(run_jobs(jobs, workers=2, engine="tensor")) == expected
+
+
+def test_only_exhaustive_mask_search():
+    for mask_strategy in (MaskStrategy("sampled"), MaskStrategy("fixed"), MaskStrategy("exhaustive", report=True)):
+        with pytest.raises(ValueError, match="always scores all 8 masks"):
+            list(run_batch(LINES, mask_strategy=mask_strategy, engine="tensor"))
+    with pytest.raises(ValueError, match="Unknown engine"):
+        list(run_batch(LINES, engine="gpu"))
+
+
+def test_cli_engine(tmp_path, run_script):
+    batch_file = tmp_path / "lines.txt"
+    batch_file.write_text("\n".join(LINES[5:]) + "\n")
+    for engine in ("symbol", "tensor"):
+        (tmp_path / engine).mkdir()
+        completed = run_script(["-b", batch_file, "--backend", "bitboard", "--engine", engine, "--archive", tmp_path / engine])
+        assert completed.returncode == 0, completed.stderr
+    symbol_files = sorted((path.name, path.read_bytes()) for path in (tmp_path / "symbol").iterdir())
+    assert len(symbol_files) == 10
+    assert sorted((path.name, path.read_bytes()) for path in (tmp_path / "tensor").iterdir()) == symbol_files
+    completed = run_script(["-b", batch_file, "--engine", "tensor", "--mask-strategy", "sampled"])
+    assert completed.returncode == 2 and b"--engine tensor only works with --mask-strategy exhaustive" in completed.stderr
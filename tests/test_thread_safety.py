@@ -0,0 +1,44 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from encoder import generate_qr_code, QrEncoder
+from decoder import verify_symbol
+from masks import MaskStrategy
+from load_harness import make_jobs, run_stress
+
+
+# the check of load_harness.py --stress, with fewer threads and jobs
+
+
+# the pil backend is much slower, so it gets fewer jobs
+@pytest.mark.parametrize("backend, job_count", [("pil", 3), ("bitboard", 12)])
+def test_stress(backend, job_count):
+    report = run_stress(make_jobs("every_ecl", job_count, 0), 4, backend, 0)
+    assert report["encodes"] == 4 * job_count
+    assert report["mismatches"] == 0
+    assert report["errors"] == []
+
+
+@pytest.mark.parametrize("backend", ["pil", "bitboard"])
+def test_encoder_matches_generate_qr_code(backend):
+    encoder = QrEncoder("Q", backend=backend, mask_strategy=MaskStrategy("sampled"))
+    for index, data, _, _, _, _ in make_jobs("short_url", 3, 1):
+        qr_symbol = encoder.encode(data)
+        verify_symbol(qr_symbol, data)
+        expected = generate_qr_code(data, "Q", backend=backend, mask_strategy=MaskStrategy("sampled"))
+        assert qr_symbol.get_matrix() == expected.get_matrix()
+        assert encoder.encode_bytes(data) == expected.to_bytes()
+
+
+def test_shared_encoder_from_threads():
+    encoder = QrEncoder("M", micro=True, backend="bitboard")
+    payloads = [str(number) * (number % 7 + 1) for number in range(40)]
+    with ThreadPoolExecutor(8) as executor:
+        matrices = list(executor.map(lambda data: encoder.encode(data).get_matrix(), payloads))
+    assert matrices == [generate_qr_code(data, "M", backend="bitboard", micro=True).get_matrix() for data in payloads]
+
+
+def test_cli_stress(run_script):
+    completed = run_script(["--stress", "2", "--count", "4", "--workload", "short_url", "--backend", "bitboard"], script="load_harness.py")
+    assert completed.returncode == 0, completed.stderr
+    assert json.loads(completed.stdout)["stress"]["mismatches"] == 0